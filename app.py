@@ -1,41 +1,5 @@
-from flask import Flask
-from config import Config
-from app.extensions import db, login_manager, cache
-import os
-
-def create_app():
-    # Create Flask app with explicit template folder
-    template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'app', 'templates'))
-    static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'app', 'static'))
-    
-    app = Flask(__name__, 
-                template_folder=template_dir,
-                static_folder=static_dir)
-    
-    app.config.from_object(Config)
-
-    # Initialize extensions
-    db.init_app(app)
-    login_manager.init_app(app)
-    cache.init_app(app)
-
-    # Register blueprints
-    from app.routes.auth import auth_bp
-    from app.routes.main import main_bp
-    from app.routes.api import api_bp
-    from app.routes.admin import admin_bp
-
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(main_bp)
-    app.register_blueprint(api_bp, url_prefix='/api')
-    app.register_blueprint(admin_bp, url_prefix='/admin')
-
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-
-    return app
+from app import create_app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True) 
\ No newline at end of file
+    app.run(debug=True)
@@ -1,30 +1,59 @@
 # This file makes the app directory a Python package 
 
+import os
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
 from config import Config
-
-db = SQLAlchemy()
-login_manager = LoginManager()
+from app.extensions import db, replica_router, login_manager, cache, limiter, sql_instrumentation, metrics, profiler
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Initialize extensions
+    replica_router.init_app(app)
     db.init_app(app)
+    # Flask-Migrate pulls in alembic, which only the flask command needs
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from flask_migrate import Migrate
+        Migrate(app, db, render_as_batch=True)
     login_manager.init_app(app)
-    login_manager.login_view = 'auth.login'
-
+    cache.init_app(app)
+    metrics.init_app(app)
+    limiter.init_app(app)
+    sql_instrumentation.init_app(app)
+    profiler.init_app(app)
+
+    # Register blueprints
+    from app.routes.auth import auth_bp, token_cache
     from app.routes.main import main_bp
-    from app.routes.auth import auth_bp
     from app.routes.api import api_bp
-    from app.cli import scrape_ipl_command
-
+    from app.routes.admin import admin_bp
+    from app.cli import (init_db_command, scrape_ipl_command, verify_indexes_command, sync_replicas_command,
+                         rebuild_head_to_head_command, rebuild_venues_command,
+                         rebuild_standings_command, rebuild_from_deliveries_command,
+                         replay_match_command, score_fantasy_command)
+    from app.models.user import user_cache
+    # Routes import the ball-by-ball model lazily, but create_all and
+    # migrations need its table in the metadata from the start
+    from app.models import delivery
+
+    app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
-    app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
 
-    app.cli.add_command(scrape_ipl_command)
+    metrics.register_cache('tokens', token_cache)
+    metrics.register_cache('users', user_cache)
 
-    return app 
\ No newline at end of file
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(scrape_ipl_command)
+    app.cli.add_command(verify_indexes_command)
+    app.cli.add_command(sync_replicas_command)
+    app.cli.add_command(rebuild_head_to_head_command)
+    app.cli.add_command(rebuild_venues_command)
+    app.cli.add_command(rebuild_standings_command)
+    app.cli.add_command(rebuild_from_deliveries_command)
+    app.cli.add_command(replay_match_command)
+    app.cli.add_command(score_fantasy_command)
+
+    return app
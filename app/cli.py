@@ -1,14 +1,152 @@
+import sys
 import click
 from flask.cli import with_appcontext
-from app.scraper import populate_database
-from app import create_app
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create any missing tables and mark the database as migrated to head."""
+    from flask_migrate import stamp
+    from app.extensions import db
+    
+    db.create_all()
+    stamp()
+    click.echo('Database initialized')
 
 @click.command('scrape-ipl')
 @with_appcontext
 def scrape_ipl_command():
     """Scrape IPL data and populate the database."""
-    app = create_app()
-    with app.app_context():
-        click.echo('Starting IPL data scraping...')
-        populate_database()
-        click.echo('Scraping completed!') 
\ No newline at end of file
+    from app.scraper import populate_database
+    
+    click.echo('Starting IPL data scraping...')
+    populate_database()
+    click.echo('Scraping completed!') 
+
+@click.command('verify-indexes')
+@with_appcontext
+def verify_indexes_command():
+    """EXPLAIN the routes' hot queries and check they use the expected indexes."""
+    from app.utils.query_plans import verify_route_indexes
+    
+    failures = 0
+    for routes, description, plan, missing in verify_route_indexes():
+        status = 'ok' if not missing else 'MISSING ' + ', '.join(missing)
+        click.echo(f'[{status}] {description} ({routes})')
+        click.echo(f'    {plan}')
+        failures += bool(missing)
+    
+    if failures:
+        click.echo(f'{failures} queries are not using their indexes')
+        sys.exit(1)
+    click.echo('All route queries use their indexes')
+
+
+@click.command('sync-replicas')
+@with_appcontext
+def sync_replicas_command():
+    """Copy the primary SQLite database over each SQLite read replica."""
+    import sqlite3
+    from flask import current_app
+    from sqlalchemy.engine import make_url
+    
+    primary = make_url(current_app.config['SQLALCHEMY_DATABASE_URI'])
+    if primary.get_backend_name() != 'sqlite':
+        click.echo('sync-replicas only copies SQLite databases, use your database\'s replication instead')
+        sys.exit(1)
+    
+    source = sqlite3.connect(primary.database)
+    for uri in current_app.config['SQLALCHEMY_REPLICA_URIS']:
+        replica = make_url(uri)
+        if replica.get_backend_name() != 'sqlite':
+            click.echo(f'Skipping {replica!r}, not a SQLite database')
+            continue
+        target = sqlite3.connect(replica.database)
+        source.backup(target)
+        target.close()
+        click.echo(f'Copied {primary.database} to {replica.database}')
+    source.close()
+
+@click.command('rebuild-head-to-head')
+@with_appcontext
+def rebuild_head_to_head_command():
+    """Recount the team head-to-head table from the completed matches."""
+    from app.extensions import db
+    from app.services.head_to_head import rebuild_head_to_head
+    
+    matches = rebuild_head_to_head()
+    db.session.commit()
+    click.echo(f'Head-to-head rebuilt from {matches} matches')
+
+@click.command('rebuild-venues')
+@with_appcontext
+def rebuild_venues_command():
+    """Link matches and teams to venues and recount the venue rollups."""
+    from app.extensions import db
+    from app.services.venues import rebuild_venues
+    
+    venues = rebuild_venues()
+    db.session.commit()
+    click.echo(f'Venue rollups rebuilt for {venues} venues')
+
+@click.command('rebuild-standings')
+@click.option('--season', help='Only recount this season')
+@with_appcontext
+def rebuild_standings_command(season):
+    """Recount the league tables from the completed league matches."""
+    from app.extensions import db
+    from app.services.points_table import rebuild_standings
+    
+    rows = rebuild_standings(season)
+    db.session.commit()
+    click.echo(f'League tables rebuilt ({rows} standings rows)')
+
+@click.command('rebuild-from-deliveries')
+@with_appcontext
+def rebuild_from_deliveries_command():
+    """Rederive performances and match totals from the ball-by-ball deliveries."""
+    from app.extensions import db
+    from app.services.ball_by_ball import rebuild_from_deliveries
+    
+    matches, deliveries = rebuild_from_deliveries()
+    db.session.commit()
+    click.echo(f'Rebuilt {matches} matches from {deliveries} deliveries')
+
+@click.command('replay-match')
+@click.argument('match_id', type=int)
+@click.option('--speed', default=60.0, help='Times faster than real time')
+@click.option('--per-over', is_flag=True, help='Send a whole over per update instead of each ball')
+@with_appcontext
+def replay_match_command(match_id, speed, per_over):
+    """Replay a recorded match's deliveries into a new live match."""
+    from app.services.live_scoring import LiveScoringError, replay_match
+    
+    def show(match, batch):
+        innings, over, ball = batch[-1][:3]
+        click.echo(f'{innings}:{over}.{ball}  {match.team1_score or 0}/{match.team1_wickets or 0} '
+                   f'v {match.team2_score or 0}/{match.team2_wickets or 0}')
+    
+    try:
+        replay = replay_match(match_id, speed, per_over, on_update=show)
+    except LiveScoringError as e:
+        raise click.ClickException(e.message)
+    click.echo(f'Replayed match {match_id} as match {replay.id}')
+
+@click.command('score-fantasy')
+@click.argument('match_id', type=int)
+@with_appcontext
+def score_fantasy_command(match_id):
+    """Score a match for the fantasy contests it counts towards."""
+    from app.extensions import db
+    from app.models.match import Match
+    from app.services.fantasy import FantasyError, score_match
+    
+    match = Match.get_by_id(match_id)
+    if match is None:
+        raise click.ClickException('Match not found')
+    try:
+        players, user_teams = score_match(match)
+    except FantasyError as e:
+        raise click.ClickException(e.message)
+    db.session.commit()
+    click.echo(f'Scored {players} players; {user_teams} user teams changed')
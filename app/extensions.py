@@ -1,11 +1,20 @@
-from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_caching import Cache
+from app.utils.ratelimit import RateLimiter
+from app.utils.db_routing import RoutingSQLAlchemy, ReplicaRouter
+from app.utils.sql_instrumentation import QueryInstrumentation
+from app.utils.metrics import Metrics
+from app.utils.profiler import RequestProfiler
 
 # Initialize Flask extensions
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
+replica_router = ReplicaRouter()
 login_manager = LoginManager()
 cache = Cache()
+limiter = RateLimiter()
+sql_instrumentation = QueryInstrumentation()
+metrics = Metrics()
+profiler = RequestProfiler()
 
 # Set up login manager
 login_manager.login_view = 'auth.login'
@@ -39,18 +39,30 @@ class AuctionLot(BaseModel, TimestampMixin):
     status = db.Column(db.String(20), default='unsold')  # unsold, sold
     sold_to_team_id = db.Column(db.Integer, db.ForeignKey('teams.id'))
     
+    # Leading bid, kept in step with auction_bids by the bid path
+    leading_bid_amount = db.Column(db.Float)
+    leading_team_id = db.Column(db.Integer, db.ForeignKey('teams.id'))
+    
     # Relationships
     player = db.relationship('Player', backref='auction_lots')
-    sold_to_team = db.relationship('Team', backref='purchased_lots')
+    sold_to_team = db.relationship('Team', foreign_keys=[sold_to_team_id], backref='purchased_lots')
+    leading_team = db.relationship('Team', foreign_keys=[leading_team_id])
     bids = db.relationship('AuctionBid', backref='lot', lazy=True, order_by='AuctionBid.bid_amount.desc()')
     
+    __table_args__ = (
+        # Lot listings and settlement scan one auction, optionally by status
+        db.Index('ix_auction_lots_auction_id_status', 'auction_id', 'status'),
+        # Market value: a player's highest sold price
+        db.Index('ix_auction_lots_player_id_sold_price', 'player_id', 'sold_price'),
+    )
+    
     @property
     def current_highest_bid(self):
-        return max([bid.bid_amount for bid in self.bids]) if self.bids else self.base_price
+        return self.leading_bid_amount if self.leading_bid_amount is not None else self.base_price
     
     @property
     def current_highest_bidder(self):
-        return self.bids[0].team if self.bids else None
+        return self.leading_team
 
 class AuctionBid(BaseModel, TimestampMixin):
     __tablename__ = 'auction_bids'
@@ -62,9 +74,47 @@ class AuctionBid(BaseModel, TimestampMixin):
     # Relationships
     team = db.relationship('Team', backref='auction_bids')
     
+    __table_args__ = (
+        # lot.bids is ordered by bid_amount DESC
+        db.Index('ix_auction_bids_lot_id_bid_amount', 'lot_id', 'bid_amount'),
+        db.Index('ix_auction_bids_team_id', 'team_id'),
+    )
+    
     @classmethod
     def get_team_bids(cls, team_id, auction_id):
         return cls.query.join(AuctionLot).filter(
             cls.team_id == team_id,
             AuctionLot.auction_id == auction_id
-        ).order_by(cls.bid_amount.desc()).all() 
\ No newline at end of file
+        ).order_by(cls.bid_amount.desc()).all() 
+
+class TeamPurse(BaseModel, TimestampMixin):
+    __tablename__ = 'team_purses'
+    
+    auction_id = db.Column(db.Integer, db.ForeignKey('auctions.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    initial_purse = db.Column(db.Float, nullable=False)
+    committed_amount = db.Column(db.Float, nullable=False, default=0.0)  # sum of current leading bids
+    spent_amount = db.Column(db.Float, nullable=False, default=0.0)  # sum of won lots
+    retained_players = db.Column(db.Integer, nullable=False, default=0)
+    players_bought = db.Column(db.Integer, nullable=False, default=0)
+    leading_lots = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    auction = db.relationship('Auction', backref=db.backref('purses', lazy=True))
+    team = db.relationship('Team', backref=db.backref('purses', lazy=True))
+    
+    __table_args__ = (
+        db.UniqueConstraint('auction_id', 'team_id', name='unique_auction_team_purse'),
+    )
+    
+    @property
+    def remaining_purse(self):
+        return self.initial_purse - self.spent_amount - self.committed_amount
+    
+    @property
+    def squad_size(self):
+        return self.retained_players + self.players_bought + self.leading_lots
+    
+    @classmethod
+    def get_for_team(cls, auction_id, team_id):
+        return cls.query.filter_by(auction_id=auction_id, team_id=team_id).first()
@@ -0,0 +1,40 @@
+from app.extensions import db
+from app.models.base import BaseModel
+
+# Codes stored in Delivery.extra_kind and Delivery.wicket_kind; the position
+# in the tuple is the code, 0 meaning none.
+EXTRA_KINDS = ('', 'wide', 'noball', 'bye', 'legbye', 'penalty')
+WICKET_KINDS = ('', 'bowled', 'caught', 'lbw', 'run out', 'stumped', 'hit wicket',
+                'caught and bowled', 'retired hurt', 'obstructing the field')
+WIDE, NOBALL, BYE, LEGBYE, PENALTY = range(1, 6)
+(BOWLED, CAUGHT, LBW, RUN_OUT, STUMPED, HIT_WICKET,
+ CAUGHT_AND_BOWLED, RETIRED_HURT, OBSTRUCTING) = range(1, 10)
+# Dismissals credited to the bowler
+BOWLER_WICKETS = (BOWLED, CAUGHT, LBW, STUMPED, HIT_WICKET, CAUGHT_AND_BOWLED)
+
+class Delivery(BaseModel):
+    __tablename__ = 'deliveries'
+    
+    # One row per ball bowled, wides and no-balls included. Innings 1 and 2
+    # are the match (team1 bats first); 3 and 4 are a super over.
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), nullable=False)
+    innings = db.Column(db.SmallInteger, nullable=False)
+    over = db.Column(db.SmallInteger, nullable=False)  # 0-based
+    ball = db.Column(db.SmallInteger, nullable=False)  # 1-based, counting every delivery of the over
+    batter_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    bowler_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    runs = db.Column(db.SmallInteger, nullable=False, default=0)  # off the bat
+    extras = db.Column(db.SmallInteger, nullable=False, default=0)
+    extra_kind = db.Column(db.SmallInteger, nullable=False, default=0)  # EXTRA_KINDS
+    wicket_kind = db.Column(db.SmallInteger, nullable=False, default=0)  # WICKET_KINDS
+    # The batter who was out, who is the non-striker for some run outs
+    player_out_id = db.Column(db.Integer, db.ForeignKey('players.id'))
+    fielder_id = db.Column(db.Integer, db.ForeignKey('players.id'))
+    
+    __table_args__ = (
+        # Reading a match in order, and keeping a ball from being stored twice
+        db.Index('ix_deliveries_match_id_innings_over_ball', 'match_id', 'innings', 'over', 'ball', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<Delivery {self.match_id} {self.innings}:{self.over}.{self.ball}>"
@@ -0,0 +1,68 @@
+from datetime import datetime
+from app.extensions import db
+from app.models.base import BaseModel, TimestampMixin
+
+class FantasyContest(BaseModel, TimestampMixin):
+    __tablename__ = 'fantasy_contests'
+    
+    name = db.Column(db.String(100), nullable=False)
+    # Only matches of this season count; None counts every match
+    season = db.Column(db.String(10))
+    # Bumped whenever a scored match changes the entries' points, so each
+    # worker knows to reload its copy of the leaderboard
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    entries = db.relationship('FantasyEntry', backref='contest', lazy='dynamic')
+    
+    def __repr__(self):
+        return f"<FantasyContest {self.id} - {self.name}>"
+
+class FantasyEntry(BaseModel):
+    __tablename__ = 'fantasy_entries'
+    
+    # A user team in a contest. Points accumulate from the matches scored
+    # after it joined.
+    contest_id = db.Column(db.Integer, db.ForeignKey('fantasy_contests.id'), nullable=False)
+    user_team_id = db.Column(db.Integer, db.ForeignKey('user_teams.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    joined_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relationships
+    user_team = db.relationship('UserTeam', backref=db.backref('fantasy_entries', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_fantasy_entries_contest_id_user_team_id', 'contest_id', 'user_team_id', unique=True),
+        db.Index('ix_fantasy_entries_user_team_id', 'user_team_id'),
+    )
+
+class FantasyPlayerPoints(BaseModel):
+    __tablename__ = 'fantasy_player_points'
+    
+    # A player's fantasy points for one match, worked out once from the
+    # performance when the match is scored
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), nullable=False)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    # When the match was first scored; rescoring keeps it, so corrections
+    # reach the same entries as the original points
+    scored_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_fantasy_player_points_match_id_player_id', 'match_id', 'player_id', unique=True),
+        db.Index('ix_fantasy_player_points_player_id', 'player_id'),
+    )
+
+class FantasyTeamPoints(BaseModel):
+    __tablename__ = 'fantasy_team_points'
+    
+    # A user team's points from one match: the sum of the changes scoring
+    # applied to its contest entries, so its summary agrees with them
+    user_team_id = db.Column(db.Integer, db.ForeignKey('user_teams.id'), nullable=False)
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_fantasy_team_points_user_team_id_match_id', 'user_team_id', 'match_id', unique=True),
+        db.Index('ix_fantasy_team_points_match_id', 'match_id'),
+    )
@@ -7,6 +7,7 @@ class Match(BaseModel, TimestampMixin):
     
     match_date = db.Column(db.DateTime, nullable=False)
     venue = db.Column(db.String(100), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'))
     team1_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
     team2_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
     team1_score = db.Column(db.Integer)
@@ -15,6 +16,8 @@ class Match(BaseModel, TimestampMixin):
     team2_overs = db.Column(db.Float)
     team1_wickets = db.Column(db.Integer)
     team2_wickets = db.Column(db.Integer)
+    toss_winner_id = db.Column(db.Integer, db.ForeignKey('teams.id'))
+    toss_decision = db.Column(db.String(10))  # bat, field
     result = db.Column(db.String(100))
     season = db.Column(db.String(10), nullable=False)
     match_type = db.Column(db.String(20), default='league')  # league, playoff, final
@@ -22,8 +25,20 @@ class Match(BaseModel, TimestampMixin):
     # Relationships
     team1 = db.relationship('Team', foreign_keys=[team1_id], backref='home_matches')
     team2 = db.relationship('Team', foreign_keys=[team2_id], backref='away_matches')
+    toss_winner = db.relationship('Team', foreign_keys=[toss_winner_id])
     performances = db.relationship('PlayerPerformance', backref='match', lazy=True)
     
+    __table_args__ = (
+        # Team fixtures, newest first: (team1_id = ? OR team2_id = ?) ORDER BY match_date DESC
+        db.Index('ix_matches_team1_id_match_date', 'team1_id', 'match_date'),
+        db.Index('ix_matches_team2_id_match_date', 'team2_id', 'match_date'),
+        # Season listings and the recent matches strip
+        db.Index('ix_matches_season_match_date', 'season', 'match_date'),
+        db.Index('ix_matches_match_date', 'match_date'),
+        # Recounting one venue's rollup
+        db.Index('ix_matches_venue_id_season', 'venue_id', 'season'),
+    )
+    
     @property
     def winner(self):
         if self.result and 'won' in self.result.lower():
@@ -51,7 +66,7 @@ class Match(BaseModel, TimestampMixin):
             query = query.filter_by(season=season)
         return query.order_by(cls.match_date.desc()).all()
 
-class PlayerPerformance(BaseModel):
+class PlayerPerformance(BaseModel, TimestampMixin):
     __tablename__ = 'player_performances'
     
     match_id = db.Column(db.Integer, db.ForeignKey('matches.id'))
@@ -76,6 +91,15 @@ class PlayerPerformance(BaseModel):
     stumpings = db.Column(db.Integer, default=0)
     run_outs = db.Column(db.Integer, default=0)
     
+    __table_args__ = (
+        # Player history and the Player -> performances joins behind every leaderboard
+        db.Index('ix_player_performances_player_id_match_id', 'player_id', 'match_id'),
+        # Match scorecards
+        db.Index('ix_player_performances_match_id', 'match_id'),
+        # Rows updated in place (live scoring), polled by the timelines and similarity indexes
+        db.Index('ix_player_performances_updated_at', 'updated_at'),
+    )
+    
     def calculate_strike_rate(self):
         if self.balls_faced == 0:
             return 0
@@ -95,4 +119,62 @@ class PlayerPerformance(BaseModel):
     
     @classmethod
     def get_match_performances(cls, match_id):
-        return cls.query.filter_by(match_id=match_id).all() 
\ No newline at end of file
+        return cls.query.filter_by(match_id=match_id).all() 
+
+class TeamHeadToHead(BaseModel):
+    __tablename__ = 'team_head_to_head'
+    
+    # One row per pair of teams per season, plus an ALL_SEASONS row per pair.
+    # team_a_id is always the lower id, so each pair is stored once.
+    ALL_SEASONS = 'all'
+    
+    season = db.Column(db.String(10), nullable=False)
+    team_a_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    team_b_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    played = db.Column(db.Integer, nullable=False, default=0)
+    team_a_wins = db.Column(db.Integer, nullable=False, default=0)
+    team_b_wins = db.Column(db.Integer, nullable=False, default=0)
+    no_results = db.Column(db.Integer, nullable=False, default=0)
+    # Averages are taken over the matches with both scores recorded
+    scored_matches = db.Column(db.Integer, nullable=False, default=0)
+    team_a_runs = db.Column(db.Integer, nullable=False, default=0)
+    team_b_runs = db.Column(db.Integer, nullable=False, default=0)
+    # Last five outcomes, oldest first: A, B or N (no result)
+    recent_results = db.Column(db.String(5), nullable=False, default='')
+    last_match_date = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Pair lookups and the per-season matrix
+        db.Index('ix_team_head_to_head_season_team_a_id_team_b_id', 'season', 'team_a_id', 'team_b_id', unique=True),
+    )
+
+class SeasonStanding(BaseModel):
+    __tablename__ = 'season_standings'
+    
+    # A team's line in a season's league table. Net run rate is kept as run
+    # and ball sums so it can be updated one match at a time.
+    season = db.Column(db.String(10), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    played = db.Column(db.Integer, nullable=False, default=0)
+    won = db.Column(db.Integer, nullable=False, default=0)
+    lost = db.Column(db.Integer, nullable=False, default=0)
+    tied = db.Column(db.Integer, nullable=False, default=0)
+    no_result = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    runs_for = db.Column(db.Integer, nullable=False, default=0)
+    balls_faced = db.Column(db.Integer, nullable=False, default=0)
+    runs_against = db.Column(db.Integer, nullable=False, default=0)
+    balls_bowled = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    team = db.relationship('Team')
+    
+    __table_args__ = (
+        db.Index('ix_season_standings_season_team_id', 'season', 'team_id', unique=True),
+    )
+    
+    @property
+    def net_run_rate(self):
+        runs_per_over = self.runs_for * 6 / self.balls_faced if self.balls_faced else 0
+        conceded_per_over = self.runs_against * 6 / self.balls_bowled if self.balls_bowled else 0
+        return round(runs_per_over - conceded_per_over, 3)
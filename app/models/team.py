@@ -9,11 +9,16 @@ class Team(BaseModel, TimestampMixin):
     short_name = db.Column(db.String(10), unique=True, nullable=False)
     logo_url = db.Column(db.String(255))
     home_ground = db.Column(db.String(100))
+    home_venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'))
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     # Relationships
     players = db.relationship('Player', backref='team', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_teams_owner_id', 'owner_id'),
+    )
+    
     def __repr__(self):
         return f"<Team {self.id} - {self.name}>"
 
@@ -94,6 +99,15 @@ class Player(BaseModel, TimestampMixin):
     current_value = db.Column(db.Float)
     base_price = db.Column(db.Float)
     
+    __table_args__ = (
+        db.Index('ix_players_team_id', 'team_id'),
+        db.Index('ix_players_role', 'role'),
+        # The player picker: pages by name, filters by nationality and price
+        db.Index('ix_players_name', 'name'),
+        db.Index('ix_players_nationality', 'nationality'),
+        db.Index('ix_players_current_value', 'current_value'),
+    )
+    
     @property
     def batting_average(self):
         if self.matches_played == 0:
@@ -1,7 +1,16 @@
+import time
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from app.extensions import db, login_manager
+from app.extensions import db, login_manager, cache
+from sqlalchemy.orm import make_transient_to_detached
 from app.models.base import BaseModel, TimestampMixin
+from app.utils.ttl_cache import TTLCache
+
+# Detached snapshots of recently loaded users, see User.get_cached
+user_cache = TTLCache(maxsize=2048, ttl=60)
+
+def _version_key(user_id):
+    return f'user_version:{user_id}'
 
 class User(BaseModel, UserMixin, TimestampMixin):
     __tablename__ = 'users'
@@ -34,7 +43,34 @@ class User(BaseModel, UserMixin, TimestampMixin):
     @classmethod
     def get_by_username(cls, username):
         return cls.query.filter_by(username=username).first()
+    
+    @classmethod
+    def get_cached(cls, user_id):
+        """Return the user attached to the current session, skipping the
+        database when a recent snapshot is cached. Call invalidate_cache
+        after changing a user so other requests see the change.
+        
+        Each snapshot records the user's version stamp from the shared
+        cache, and a hit whose stamp has moved on is reloaded, so a change
+        made through any worker applies at once on all of them.
+        """
+        version = cache.get(_version_key(user_id))
+        entry = user_cache.get(user_id)
+        if entry is not None and entry[1] == version:
+            return db.session.merge(entry[0], load=False)
+        
+        user = cls.get_by_id(user_id)
+        if user is not None:
+            snapshot = cls(**{column.key: getattr(user, column.key) for column in cls.__table__.columns})
+            make_transient_to_detached(snapshot)
+            user_cache.set(user_id, (snapshot, version))
+        return user
+    
+    @staticmethod
+    def invalidate_cache(user_id):
+        cache.set(_version_key(user_id), time.time(), timeout=0)
+        user_cache.pop(user_id)
 
 @login_manager.user_loader
 def load_user(id):
-    return User.get_by_id(int(id)) 
\ No newline at end of file
+    return User.get_cached(int(id)) 
\ No newline at end of file
@@ -15,6 +15,10 @@ class UserTeam(db.Model):
     
     # Relationship with players through association table
     players = db.relationship('Player', secondary='user_team_players', backref=db.backref('user_teams', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_user_teams_user_id', 'user_id'),
+    )
 
 class UserTeamPlayer(db.Model):
     __tablename__ = 'user_team_players'
@@ -31,4 +35,6 @@ class UserTeamPlayer(db.Model):
     # Unique constraint to prevent duplicate players in a team
     __table_args__ = (
         db.UniqueConstraint('user_team_id', 'player_id', name='unique_team_player'),
+        # Every squad holding a player, for fantasy scoring
+        db.Index('ix_user_team_players_player_id', 'player_id'),
     ) 
\ No newline at end of file
@@ -0,0 +1,56 @@
+import re
+from app.extensions import db
+from app.models.base import BaseModel, TimestampMixin
+
+class Venue(BaseModel, TimestampMixin):
+    __tablename__ = 'venues'
+    
+    name = db.Column(db.String(100), nullable=False)
+    city = db.Column(db.String(50))
+    # Normalized name shared by every spelling of the ground, see normalize_key
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    
+    # Relationships
+    stats = db.relationship('VenueSeasonStats', backref='venue', lazy=True)
+    
+    def __repr__(self):
+        return f"<Venue {self.id} - {self.name}>"
+    
+    @staticmethod
+    def normalize_key(name):
+        """'M. Chinnaswamy Stadium, Bengaluru' and 'M Chinnaswamy  stadium'
+        both give 'm chinnaswamy stadium'."""
+        ground = name.split(',')[0]
+        return ' '.join(re.sub(r'[^\w\s]', ' ', ground).lower().split())
+    
+    @classmethod
+    def get_by_name(cls, name):
+        return cls.query.filter_by(key=cls.normalize_key(name)).first()
+
+class VenueSeasonStats(BaseModel):
+    __tablename__ = 'venue_season_stats'
+    
+    # One row per venue per season, plus an ALL_SEASONS row per venue.
+    # team1 is the side that batted first.
+    ALL_SEASONS = 'all'
+    
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable=False)
+    season = db.Column(db.String(10), nullable=False)
+    matches = db.Column(db.Integer, nullable=False, default=0)
+    # Innings averages are taken over the matches with both scores recorded
+    scored_matches = db.Column(db.Integer, nullable=False, default=0)
+    first_innings_runs = db.Column(db.Integer, nullable=False, default=0)
+    second_innings_runs = db.Column(db.Integer, nullable=False, default=0)
+    decided_matches = db.Column(db.Integer, nullable=False, default=0)
+    chasing_wins = db.Column(db.Integer, nullable=False, default=0)
+    # Decided matches with the toss recorded, and how many the toss winner won
+    toss_matches = db.Column(db.Integer, nullable=False, default=0)
+    toss_winner_wins = db.Column(db.Integer, nullable=False, default=0)
+    highest_total = db.Column(db.Integer)
+    lowest_total = db.Column(db.Integer)
+    # Both innings of one match together
+    highest_match_runs = db.Column(db.Integer)
+    
+    __table_args__ = (
+        db.Index('ix_venue_season_stats_venue_id_season', 'venue_id', 'season', unique=True),
+    )
@@ -1,11 +1,19 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+import os
+from datetime import datetime
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app, send_from_directory, Response
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
 from functools import wraps
 from app.extensions import db
 from app.models.user import User
 from app.models.team import Team, Player
 from app.models.match import Match, PlayerPerformance
 from app.models.auction import Auction, AuctionLot, AuctionBid
+from app.models.fantasy import FantasyContest
+from app.services.auction_settlement import SettlementError, settle_auction, settle_lot
+from app.services.match_results import RESULT_FIELDS, record_match_result
+from app.services.venues import resolve_venue
+from app.utils.profiler import RequestProfiler, list_profiles, is_profile_name, summarize_profile
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -14,7 +22,7 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated or not current_user.is_admin():
             flash('You do not have permission to access this page.', 'danger')
-            return redirect(url_for('main.index'))
+            return redirect(url_for('main_bp.index'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -59,6 +67,7 @@ def update_user(user_id):
         user.is_active = data['is_active']
     
     db.session.commit()
+    User.invalidate_cache(user.id)
     
     return jsonify({'message': 'User updated successfully'})
 
@@ -81,12 +90,14 @@ def create_team():
     if Team.query.filter_by(short_name=data['short_name']).first():
         return jsonify({'message': 'Team short name already exists'}), 400
     
+    venue = resolve_venue(data.get('home_ground'))
     team = Team(
         name=data['name'],
         short_name=data['short_name'],
         owner_id=data.get('owner_id'),
         logo_url=data.get('logo_url'),
-        home_ground=data.get('home_ground')
+        home_ground=data.get('home_ground'),
+        home_venue_id=venue.id if venue else None
     )
     
     db.session.add(team)
@@ -121,7 +132,9 @@ def update_team(team_id):
         team.logo_url = data['logo_url']
     
     if 'home_ground' in data:
+        venue = resolve_venue(data['home_ground'])
         team.home_ground = data['home_ground']
+        team.home_venue_id = venue.id if venue else None
     
     db.session.commit()
     
@@ -198,10 +211,16 @@ def manage_matches():
 @admin_required
 def create_match():
     data = request.get_json()
+    try:
+        match_date = datetime.fromisoformat(data['match_date'])
+    except ValueError:
+        return jsonify({'message': 'match_date must be an ISO date'}), 400
     
+    venue = resolve_venue(data['venue'])
     match = Match(
-        match_date=data['match_date'],
+        match_date=match_date,
         venue=data['venue'],
+        venue_id=venue.id if venue else None,
         team1_id=data['team1_id'],
         team2_id=data['team2_id'],
         season=data['season'],
@@ -209,10 +228,39 @@ def create_match():
     )
     
     db.session.add(match)
+    # A match entered after it was played comes with its toss and result
+    result = {key: data[key] for key in RESULT_FIELDS if key in data}
+    if result:
+        try:
+            record_match_result(match, **result)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 400
     db.session.commit()
     
     return jsonify({'message': 'Match created successfully', 'match_id': match.id}), 201
 
+@admin_bp.route('/matches/<int:match_id>/result', methods=['POST'])
+@login_required
+@admin_required
+def record_result(match_id):
+    match = Match.get_by_id(match_id)
+    if not match:
+        return jsonify({'message': 'Match not found'}), 404
+    
+    data = request.get_json()
+    result = {key: data[key] for key in RESULT_FIELDS if key in data}
+    if not result:
+        return jsonify({'message': f'Pass at least one of {", ".join(RESULT_FIELDS)}'}), 400
+    
+    try:
+        record_match_result(match, **result)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({'message': 'Result recorded successfully', 'match_id': match.id})
+
 @admin_bp.route('/matches/<int:match_id>/performances', methods=['POST'])
 @login_required
 @admin_required
@@ -242,6 +290,97 @@ def add_match_performance(match_id):
     
     return jsonify({'message': 'Performance added successfully', 'performance_id': performance.id}), 201
 
+@admin_bp.route('/matches/<int:match_id>/deliveries', methods=['POST'])
+@login_required
+@admin_required
+def add_match_deliveries(match_id):
+    """Append ball-by-ball deliveries, then rederive the match's
+    performances and totals from everything stored for it."""
+    from app.services.ball_by_ball import FIELDS, append_deliveries, derive_match
+    
+    match = Match.get_by_id(match_id)
+    if not match:
+        return jsonify({'message': 'Match not found'}), 404
+    
+    deliveries = (request.get_json() or {}).get('deliveries')
+    if not isinstance(deliveries, list) or not deliveries:
+        return jsonify({'message': f'deliveries must be a list of [{", ".join(FIELDS)}] rows or objects'}), 400
+    
+    try:
+        added = len(append_deliveries(match, deliveries))
+        derive_match(match)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Some of these deliveries are already stored'}), 409
+    db.session.commit()
+    
+    return jsonify({'message': 'Deliveries added successfully', 'match_id': match.id, 'added': added,
+                    'team1_score': match.team1_score, 'team2_score': match.team2_score}), 201
+
+@admin_bp.route('/matches/<int:match_id>/live', methods=['POST'])
+@login_required
+@admin_required
+def ingest_live_deliveries(match_id):
+    """Score a match in play: the next ball (``delivery``) or over
+    (``deliveries``), folded into the score and pushed to live pages."""
+    from app.services.ball_by_ball import FIELDS
+    from app.services.live_scoring import LiveScoringError, ingest_deliveries, live_score
+    
+    data = request.get_json() or {}
+    deliveries = [data['delivery']] if data.get('delivery') else data.get('deliveries')
+    if not isinstance(deliveries, list) or not deliveries:
+        return jsonify({'message': f'Send a delivery or a list of deliveries as [{", ".join(FIELDS)}] rows or objects'}), 400
+    
+    try:
+        match, added = ingest_deliveries(match_id, deliveries)
+    except LiveScoringError as e:
+        db.session.rollback()
+        return jsonify({'message': e.message}), e.status_code
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Some of these deliveries are already stored'}), 409
+    db.session.commit()
+    
+    return jsonify({'match_id': match.id, 'added': added, 'score': live_score(match)}), 201
+
+@admin_bp.route('/matches/<int:match_id>/fantasy', methods=['POST'])
+@login_required
+@admin_required
+def score_match_fantasy(match_id):
+    """Score a finished match for every fantasy contest it counts towards."""
+    from app.services.fantasy import FantasyError, score_match
+    
+    match = Match.get_by_id(match_id)
+    if not match:
+        return jsonify({'message': 'Match not found'}), 404
+    
+    try:
+        players, user_teams = score_match(match)
+    except FantasyError as e:
+        db.session.rollback()
+        return jsonify({'message': e.message}), e.status_code
+    db.session.commit()
+    
+    return jsonify({'message': 'Match scored successfully', 'match_id': match.id,
+                    'players': players, 'user_teams': user_teams})
+
+@admin_bp.route('/fantasy/contests', methods=['POST'])
+@login_required
+@admin_required
+def create_fantasy_contest():
+    data = request.get_json() or {}
+    if not data.get('name'):
+        return jsonify({'message': 'name is required'}), 400
+    
+    contest = FantasyContest(name=data['name'], season=data.get('season'), version=0)
+    db.session.add(contest)
+    db.session.commit()
+    
+    return jsonify({'message': 'Contest created successfully', 'contest_id': contest.id}), 201
+
 @admin_bp.route('/auctions')
 @login_required
 @admin_required
@@ -288,6 +427,36 @@ def add_auction_lot(auction_id):
     
     return jsonify({'message': 'Lot added successfully', 'lot_id': lot.id}), 201
 
+@admin_bp.route('/auctions/<int:auction_id>/settle', methods=['POST'])
+@login_required
+@admin_required
+def settle_auction_lots(auction_id):
+    auction = Auction.get_by_id(auction_id)
+    if not auction:
+        return jsonify({'message': 'Auction not found'}), 404
+    
+    try:
+        report = settle_auction(auction_id)
+    except SettlementError as e:
+        return jsonify({'message': str(e)}), 409
+    
+    return jsonify({'message': 'Auction settled successfully', 'report': report})
+
+@admin_bp.route('/auctions/<int:auction_id>/lots/<int:lot_id>/settle', methods=['POST'])
+@login_required
+@admin_required
+def settle_auction_lot(auction_id, lot_id):
+    lot = AuctionLot.get_by_id(lot_id)
+    if not lot or lot.auction_id != auction_id:
+        return jsonify({'message': 'Lot not found'}), 404
+    
+    try:
+        report = settle_lot(auction_id, lot_id)
+    except SettlementError as e:
+        return jsonify({'message': str(e)}), 409
+    
+    return jsonify({'message': 'Lot settled successfully', 'report': report})
+
 @admin_bp.route('/import-data', methods=['POST'])
 @login_required
 @admin_required
@@ -320,4 +489,38 @@ def export_data():
         # Export logic here
         return jsonify({'message': 'Data exported successfully'})
     except Exception as e:
-        return jsonify({'message': f'Error exporting data: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'message': f'Error exporting data: {str(e)}'}), 500 
+
+@admin_bp.route('/profiles')
+@login_required
+@admin_required
+def list_request_profiles():
+    config = current_app.config
+    profiles = list_profiles(RequestProfiler.profile_dir())
+    return render_template('admin/profiles.html',
+                          profiles=profiles,
+                          profiler_enabled=config['PROFILER_ENABLED'],
+                          profiler_header=config['PROFILER_HEADER'],
+                          sample_rate=config['PROFILER_SAMPLE_RATE'],
+                          sample_endpoints=config['PROFILER_SAMPLE_ENDPOINTS'])
+
+@admin_bp.route('/profiles/<name>')
+@login_required
+@admin_required
+def download_request_profile(name):
+    if not is_profile_name(name):
+        return jsonify({'message': 'Profile not found'}), 404
+    return send_from_directory(RequestProfiler.profile_dir(), name, as_attachment=True)
+
+@admin_bp.route('/profiles/<name>/summary')
+@login_required
+@admin_required
+def request_profile_summary(name):
+    path = os.path.join(RequestProfiler.profile_dir(), name)
+    if not is_profile_name(name) or not os.path.exists(path):
+        return jsonify({'message': 'Profile not found'}), 404
+    
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'ncalls'):
+        return jsonify({'message': 'Invalid sort key'}), 400
+    return Response(summarize_profile(path, sort=sort), mimetype='text/plain')
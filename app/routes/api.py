@@ -1,10 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app, render_template
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app, render_template, Response
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models.team import Team, Player
 from app.models.match import Match, PlayerPerformance
-from app.models.auction import Auction, AuctionLot, AuctionBid
+from app.models.auction import Auction, AuctionLot, TeamPurse
+from app.models.fantasy import FantasyContest
 from app.routes.auth import token_required
+from app.services.auction_ledger import BidError, place_bid as record_bid
+from app.services.comparison import compare_players, compare_teams, parse_ids
+from app.services.head_to_head import head_to_head, head_to_head_matrix
+from app.services.player_timeline import get_timeline, summarize
+from app.services.points_table import get_points_table
+from app.services.venues import get_venue as get_venue_record, list_venues
 
 api_bp = Blueprint('api', __name__)
 
@@ -54,6 +63,41 @@ def get_team(team_id):
         'players': players
     })
 
+@api_bp.route('/teams/<int:team_id>/vs/<int:other_team_id>', methods=['GET'])
+def get_head_to_head(team_id, other_team_id):
+    """Head-to-head record from ``team_id``'s side, overall or for ``?season=``."""
+    if team_id == other_team_id:
+        return jsonify({'message': 'Pick two different teams'}), 400
+    teams = {team.id: team for team in Team.query.filter(Team.id.in_((team_id, other_team_id)))}
+    if len(teams) < 2:
+        return jsonify({'message': 'Team not found'}), 404
+    
+    record = head_to_head(team_id, other_team_id, request.args.get('season') or None)
+    return jsonify({
+        'team': {'id': team_id, 'name': teams[team_id].name, 'short_name': teams[team_id].short_name},
+        'opponent': {'id': other_team_id, 'name': teams[other_team_id].name,
+                     'short_name': teams[other_team_id].short_name},
+        **record
+    })
+
+@api_bp.route('/teams/head-to-head', methods=['GET'])
+def get_head_to_head_matrix():
+    """Every pair's record as square matrices, overall or for ``?season=``."""
+    return jsonify(head_to_head_matrix(request.args.get('season') or None))
+
+# Venue Routes
+@api_bp.route('/venues', methods=['GET'])
+def get_venues():
+    """Every venue with its rollup for ``?season=`` or all seasons."""
+    return jsonify(list_venues(request.args.get('season') or None))
+
+@api_bp.route('/venues/<int:venue_id>', methods=['GET'])
+def get_venue(venue_id):
+    venue = get_venue_record(venue_id)
+    if venue is None:
+        return jsonify({'message': 'Venue not found'}), 404
+    return jsonify(venue)
+
 # Player Routes
 @api_bp.route('/players', methods=['GET'])
 def get_players():
@@ -110,7 +154,10 @@ def search_players():
     if len(query) < 2:
         return jsonify({'error': 'Query too short'}), 400
     
-    players = Player.query.filter(Player.name.ilike(f'%{query}%')).limit(10).all()
+    players = (Player.query.options(joinedload(Player.team))
+               .filter(Player.name.ilike(f'%{query}%'))
+               .limit(10)
+               .all())
     return jsonify([{
         'id': player.id,
         'name': player.name,
@@ -118,6 +165,160 @@ def search_players():
         'role': player.role
     } for player in players])
 
+@api_bp.route('/teams/search', methods=['GET'])
+def search_teams():
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': 'Query too short'}), 400
+    
+    teams = (Team.query
+             .filter(Team.name.ilike(f'%{query}%') | Team.short_name.ilike(f'%{query}%'))
+             .order_by(Team.name)
+             .limit(10)
+             .all())
+    return jsonify([{
+        'id': team.id,
+        'name': team.name,
+        'short_name': team.short_name
+    } for team in teams])
+
+@api_bp.route('/compare', methods=['GET'])
+def compare():
+    """Compare players (``?players=1,2,3``) or teams (``?teams=4,5``), with
+    each metric as a vector aligned with ``entities`` for radar charts."""
+    kind = 'teams' if 'teams' in request.args else 'players'
+    try:
+        ids = parse_ids(request.args.getlist(kind))
+    except ValueError:
+        return jsonify({'message': f'{kind} must be a comma separated list of ids'}), 400
+    
+    limit = current_app.config['COMPARE_MAX_ENTITIES']
+    if not ids:
+        return jsonify({'message': 'Pass players=<ids> or teams=<ids> to compare'}), 400
+    if len(ids) > limit:
+        return jsonify({'message': f'Compare at most {limit} {kind} at a time'}), 400
+    
+    season = request.args.get('season') or None
+    comparison = compare_teams(ids, season) if kind == 'teams' else compare_players(ids, season)
+    if kind == 'teams' and len(comparison['entities']) == 2:
+        first, second = comparison['entities']
+        comparison['head_to_head'] = head_to_head(first['id'], second['id'], season)
+    return jsonify(comparison)
+
+@api_bp.route('/players/<int:player_id>/similar', methods=['GET'])
+def get_similar_players(player_id):
+    # numpy is only loaded once someone asks for similar players
+    from app.services.player_similarity import METRICS, find_similar
+    
+    player = Player.query.get(player_id)
+    if not player:
+        return jsonify({'message': 'Player not found'}), 404
+    
+    k = request.args.get('k', 10, type=int)
+    metric = request.args.get('metric', 'cosine')
+    role = request.args.get('role') or None
+    season = request.args.get('season') or None
+    min_matches = request.args.get('min_matches', type=int)
+    if not 1 <= k <= 100:
+        return jsonify({'message': 'k must be between 1 and 100'}), 400
+    if metric not in METRICS:
+        return jsonify({'message': f'metric must be one of {", ".join(METRICS)}'}), 400
+    
+    try:
+        stats, similar = find_similar(player_id, k=k, metric=metric, role=role, season=season,
+                                      min_matches=min_matches)
+    except LookupError:
+        message = f'No performances for this player in season {season}' if season else 'No performances for this player'
+        return jsonify({'message': message}), 404
+    
+    return jsonify({
+        'player': dict(stats, id=player.id, name=player.name, role=player.role),
+        'metric': metric,
+        'season': season,
+        'role': role,
+        'similar': similar
+    })
+
+def _date_range_args():
+    """(start, end) datetimes from the ``from`` and ``to`` YYYY-MM-DD query
+    args; ``to`` is inclusive so ``end`` is the following midnight."""
+    start, end = request.args.get('from'), request.args.get('to')
+    start = datetime.strptime(start, '%Y-%m-%d') if start else None
+    end = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else None
+    return start, end
+
+@api_bp.route('/players/<int:player_id>/stats', methods=['GET'])
+def get_player_range_stats(player_id):
+    if not Player.query.get(player_id):
+        return jsonify({'message': 'Player not found'}), 404
+    
+    try:
+        start, end = _date_range_args()
+    except ValueError:
+        return jsonify({'message': 'Dates must be YYYY-MM-DD'}), 400
+    last = request.args.get('last', type=int)
+    if last is not None and last < 1:
+        return jsonify({'message': 'last must be a positive number of matches'}), 400
+    
+    timeline = get_timeline(player_id)
+    i, j = timeline.span(start, end)
+    if last is not None:
+        i = max(i, j - last)
+    
+    return jsonify({
+        'player_id': player_id,
+        'first_match': timeline.date(i).isoformat() if j > i else None,
+        'last_match': timeline.date(j - 1).isoformat() if j > i else None,
+        'stats': summarize(timeline.totals(i, j))
+    })
+
+@api_bp.route('/players/<int:player_id>/form', methods=['GET'])
+def get_player_form(player_id):
+    if not Player.query.get(player_id):
+        return jsonify({'message': 'Player not found'}), 404
+    
+    try:
+        start, end = _date_range_args()
+    except ValueError:
+        return jsonify({'message': 'Dates must be YYYY-MM-DD'}), 400
+    window = request.args.get('window', 5, type=int)
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= window <= 100:
+        return jsonify({'message': 'window must be between 1 and 100'}), 400
+    if not 1 <= limit <= 500:
+        return jsonify({'message': 'limit must be between 1 and 500'}), 400
+    
+    # Windows ending at the most recent ``limit`` matches within the range;
+    # a window may reach back before ``from``
+    timeline = get_timeline(player_id)
+    i, j = timeline.span(start, end)
+    points = [dict(summarize(totals),
+                   match_id=timeline.match_ids[index],
+                   match_date=timeline.date(index).isoformat())
+              for index, totals in timeline.rolling(window, max(i, j - limit), j)]
+    
+    return jsonify({
+        'player_id': player_id,
+        'window': window,
+        'form': points
+    })
+
+# Season Routes
+@api_bp.route('/seasons/<season>/table', methods=['GET'])
+def get_season_table(season):
+    """League table with net run rate; cached, and answered with 304 Not
+    Modified when the client's ETag still matches."""
+    entry = get_points_table(season)
+    if entry is None:
+        return jsonify({'message': 'Season not found'}), 404
+    
+    table, etag = entry
+    response = jsonify(table)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['POINTS_TABLE_MAX_AGE']
+    return response.make_conditional(request)
+
 # Match Routes
 @api_bp.route('/matches', methods=['GET'])
 def get_matches():
@@ -201,6 +402,65 @@ def get_match(match_id):
         'performances': performances
     })
 
+@api_bp.route('/matches/<int:match_id>/scorecard', methods=['GET'])
+def get_match_scorecard(match_id):
+    # numpy is only loaded once someone asks for a ball-by-ball scorecard
+    from app.services.ball_by_ball import get_scorecard
+    
+    match = Match.get_by_id(match_id)
+    if not match:
+        return jsonify({'message': 'Match not found'}), 404
+    scorecard = get_scorecard(match)
+    if scorecard is None:
+        return jsonify({'message': 'No ball-by-ball data for this match'}), 404
+    return jsonify(scorecard)
+
+@api_bp.route('/matches/<int:match_id>/live', methods=['GET'])
+def stream_live_match(match_id):
+    """Server-sent events with each delivery of a match in play."""
+    from app.services.live_scoring import live_events
+    
+    if not Match.get_by_id(match_id):
+        return jsonify({'message': 'Match not found'}), 404
+    return Response(live_events(match_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Fantasy Routes
+@api_bp.route('/fantasy/contests/<int:contest_id>/leaderboard', methods=['GET'])
+def get_fantasy_leaderboard(contest_id):
+    from app.services.fantasy import get_leaderboard, team_names
+    
+    contest = FantasyContest.get_by_id(contest_id)
+    if not contest:
+        return jsonify({'message': 'Contest not found'}), 404
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', 50, type=int)
+    if offset < 0 or not 1 <= limit <= 500:
+        return jsonify({'message': 'offset must be 0 or more and limit between 1 and 500'}), 400
+    
+    board = get_leaderboard(contest)
+    user_team_ids, points, ranks = board.page(offset, limit)
+    names = team_names(user_team_ids)
+    return jsonify({
+        'contest': {'id': contest.id, 'name': contest.name, 'season': contest.season},
+        'entries': len(board),
+        'leaderboard': [{'rank': rank, 'user_team_id': user_team_id, 'name': names.get(user_team_id),
+                         'points': team_points}
+                        for user_team_id, team_points, rank in zip(user_team_ids, points, ranks)]
+    })
+
+@api_bp.route('/fantasy/contests/<int:contest_id>/rank/<int:user_team_id>', methods=['GET'])
+def get_fantasy_rank(contest_id, user_team_id):
+    from app.services.fantasy import contest_standing
+    
+    contest = FantasyContest.get_by_id(contest_id)
+    if not contest:
+        return jsonify({'message': 'Contest not found'}), 404
+    standing = contest_standing(contest, user_team_id)
+    if standing is None:
+        return jsonify({'message': 'This team is not in the contest'}), 404
+    return jsonify(dict(standing, contest_id=contest.id, user_team_id=user_team_id))
+
 # Auction Routes
 @api_bp.route('/auctions', methods=['GET'])
 @token_required
@@ -281,20 +541,11 @@ def place_bid(current_user, auction_id):
     if lot.auction_id != auction_id:
         return jsonify({'message': 'Lot does not belong to this auction'}), 400
     
-    if lot.status != 'unsold':
-        return jsonify({'message': 'Lot is already sold'}), 400
-    
-    if bid_amount <= lot.current_highest_bid:
-        return jsonify({'message': 'Bid must be higher than current highest bid'}), 400
-    
-    bid = AuctionBid(
-        lot_id=lot_id,
-        team_id=team.id,
-        bid_amount=bid_amount
-    )
-    
-    db.session.add(bid)
-    db.session.commit()
+    try:
+        bid = record_bid(lot, team, bid_amount)
+    except BidError as e:
+        db.session.rollback()
+        return jsonify({'message': e.message}), e.status_code
     
     return jsonify({
         'message': 'Bid placed successfully',
@@ -307,6 +558,46 @@ def place_bid(current_user, auction_id):
         }
     })
 
+@api_bp.route('/auctions/<int:auction_id>/purses', methods=['GET'])
+@token_required
+def get_auction_purses(current_user, auction_id):
+    auction = Auction.get_by_id(auction_id)
+    if not auction:
+        return jsonify({'message': 'Auction not found'}), 404
+    
+    # Teams that have not bid yet have no ledger row and still hold the full purse
+    squad_counts = (db.session.query(Player.team_id, db.func.count(Player.id).label('players'))
+                    .group_by(Player.team_id)
+                    .subquery())
+    rows = (db.session.query(Team, TeamPurse, squad_counts.c.players)
+            .outerjoin(TeamPurse, (TeamPurse.team_id == Team.id) & (TeamPurse.auction_id == auction_id))
+            .outerjoin(squad_counts, squad_counts.c.team_id == Team.id)
+            .order_by(Team.name)
+            .all())
+    
+    initial_purse = current_app.config['AUCTION_INITIAL_PURSE']
+    max_squad_size = current_app.config['AUCTION_MAX_SQUAD_SIZE']
+    
+    purses = []
+    for team, purse, squad_players in rows:
+        purses.append({
+            'team': {
+                'id': team.id,
+                'name': team.name,
+                'short_name': team.short_name
+            },
+            'initial_purse': purse.initial_purse if purse else initial_purse,
+            'committed_amount': purse.committed_amount if purse else 0.0,
+            'spent_amount': purse.spent_amount if purse else 0.0,
+            'remaining_purse': purse.remaining_purse if purse else initial_purse,
+            'players_bought': purse.players_bought if purse else 0,
+            'leading_lots': purse.leading_lots if purse else 0,
+            'squad_size': purse.squad_size if purse else (squad_players or 0),
+            'max_squad_size': max_squad_size
+        })
+    
+    return jsonify(purses)
+
 @api_bp.route('/dashboard-data')
 def get_dashboard_data():
     year = request.args.get('year', 'all')
@@ -1,25 +1,49 @@
-from flask import Blueprint, request, jsonify, flash, redirect, url_for, render_template
+from flask import Blueprint, request, jsonify, flash, redirect, url_for, render_template, current_app, g
 from flask_login import login_user, logout_user, login_required, current_user
+from jose import jwt
 from app.extensions import db
 from app.models.user import User
+from app.utils.ttl_cache import TTLCache
 from datetime import datetime, timedelta
+import time
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__)
 
+# Verified bearer tokens -> user id, so repeat requests skip the signature check
+token_cache = TTLCache(maxsize=4096, ttl=300)
+
+def get_token_user_id():
+    """Return the user id carried by a valid bearer token, or None.
+    
+    The result is kept on ``g`` so the token is only verified once per
+    request, whether the rate limiter or token_required asks first.
+    """
+    if 'token_user_id' not in g:
+        g.token_user_id = None
+        token = request.headers.get('Authorization')
+        if token:
+            g.token_user_id = token_cache.get(token)
+            if g.token_user_id is None:
+                try:
+                    data = jwt.decode(token.split(' ')[1],  # Remove 'Bearer ' prefix
+                                      current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+                    g.token_user_id = data['user_id']
+                    # Never cache a token past its own expiry
+                    ttl = data['exp'] - time.time() if 'exp' in data else None
+                    token_cache.set(token, g.token_user_id, ttl=min(ttl, token_cache.ttl) if ttl else None)
+                except Exception:
+                    pass
+    return g.token_user_id
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
+        if not request.headers.get('Authorization'):
             return jsonify({'message': 'Token is missing'}), 401
-        try:
-            token = token.split(' ')[1]  # Remove 'Bearer ' prefix
-            data = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-            current_user = User.get_by_id(data['user_id'])
-            if not current_user:
-                return jsonify({'message': 'Invalid token'}), 401
-        except:
+        user_id = get_token_user_id()
+        current_user = User.get_cached(user_id) if user_id else None
+        if not current_user:
             return jsonify({'message': 'Invalid token'}), 401
         return f(current_user, *args, **kwargs)
     decorated.__name__ = f.__name__
@@ -107,6 +131,7 @@ def change_password():
     
     current_user.set_password(data.get('new_password'))
     db.session.commit()
+    User.invalidate_cache(current_user.id)
     
     return jsonify({'message': 'Password changed successfully'})
 
@@ -126,5 +151,6 @@ def update_profile():
         current_user.username = data['username']
     
     db.session.commit()
+    User.invalidate_cache(current_user.id)
     
     return jsonify({'message': 'Profile updated successfully'}) 
\ No newline at end of file
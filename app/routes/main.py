@@ -1,87 +1,28 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, abort, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
 from app.extensions import db
 from app.models.team import Team, Player
 from app.models.match import Match, PlayerPerformance
 from app.models.auction import Auction, AuctionLot
 from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.fantasy import FantasyContest
+from app.services.comparison import parse_ids
+from app.services.homepage import get_homepage_snapshot
+from app.services.player_picker import (available_players, filter_options, parse_filters, parse_page,
+                                        picker_item)
+from app.services.player_profile import get_player_profile
+from app.services.team_profile import get_team_profile
+from app.services.venues import list_venues
 
 main_bp = Blueprint('main_bp', __name__)
 
 @main_bp.route('/')
 def index():
-    try:
-        # Get top batsmen with their statistics
-        top_batsmen = (db.session.query(players)
-                      .join(PlayerPerformance)
-                      .group_by(Player.id)
-                      .order_by(db.func.sum(PlayerPerformance.runs_scored).desc())
-                      .limit(5)
-                      .all())
-        
-        # Calculate batting statistics for each player
-        for player in top_batsmen:
-            performances = PlayerPerformance.query.filter_by(player_id=player.id).all()
-            total_runs = sum(p.runs_scored or 0 for p in performances)
-            total_balls = sum(p.balls_faced or 0 for p in performances)
-            dismissals = sum(1 for p in performances if p.runs_scored is not None and p.runs_scored > 0)
-            
-            player.total_runs = total_runs
-            player.batting_average = total_runs / dismissals if dismissals > 0 else 0
-            player.strike_rate = (total_runs / total_balls * 100) if total_balls > 0 else 0
-        
-        # Get top bowlers with their statistics
-        top_bowlers = (db.session.query(Player)
-                      .join(PlayerPerformance)
-                      .group_by(Player.id)
-                      .order_by(db.func.sum(PlayerPerformance.wickets_taken).desc())
-                      .limit(5)
-                      .all())
-        
-        # Calculate bowling statistics for each player
-        for player in top_bowlers:
-            performances = PlayerPerformance.query.filter_by(player_id=player.id).all()
-            total_wickets = sum(p.wickets_taken or 0 for p in performances)
-            total_runs = sum(p.runs_conceded or 0 for p in performances)
-            total_overs = sum(p.overs_bowled or 0 for p in performances)
-            
-            player.total_wickets = total_wickets
-            player.bowling_average = total_runs / total_wickets if total_wickets > 0 else 0
-            player.economy_rate = total_runs / total_overs if total_overs > 0 else 0
-        
-        # Get top teams with their statistics
-        top_teams = (db.session.query(Team)
-                    .order_by(Team.wins.desc())
-                    .limit(5)
-                    .all())
-        
-        # Calculate team statistics
-        for team in top_teams:
-            matches = Match.query.filter(
-                (Match.team1_id == team.id) | (Match.team2_id == team.id)
-            ).all()
-            
-            team.total_matches = len(matches)
-            team.wins = sum(1 for m in matches if m.winner and m.winner.id == team.id)
-            team.win_percentage = (team.wins / team.total_matches * 100) if team.total_matches > 0 else 0
-        
-        # Get recent matches
-        recent_matches = Match.query.order_by(Match.match_date.desc()).limit(5).all()
-        
-        return render_template('index.html',
-                             top_batsmen=top_batsmen,
-                             top_bowlers=top_bowlers,
-                             top_teams=top_teams,
-                             recent_matches=recent_matches)
-    except Exception as e:
-        # Log the error
-        print(f"Error in index route: {str(e)}")
-        # Return a simplified version of the page without data
-        return render_template('index.html',
-                             top_batsmen=[],
-                             top_bowlers=[],
-                             top_teams=[],
-                             recent_matches=[])
+    # Served from the precomputed snapshot; None only until the first
+    # background build finishes
+    snapshot = get_homepage_snapshot()
+    return render_template('index.html', snapshot=snapshot)
 
 @main_bp.route('/test')
 def test():
@@ -195,17 +136,13 @@ def dashboard():
         ).join(PlayerPerformance).join(AuctionLot).group_by(Player.id).order_by(db.desc('(runs + wickets * 20) / value')).limit(5).all()
     }
 
-    # Venue statistics
+    # Venue statistics, read from the maintained rollups
+    venues = list_venues()
     venue_stats = {
-        'highest_scores': db.session.query(
-            Match.venue,
-            db.func.max(Match.team1_score + Match.team2_score).label('total_runs')
-        ).group_by(Match.venue).order_by(db.desc('total_runs')).limit(5).all(),
-        
-        'most_matches': db.session.query(
-            Match.venue,
-            db.func.count(Match.id).label('matches')
-        ).group_by(Match.venue).order_by(db.desc('matches')).limit(5).all()
+        'highest_scores': [(venue['name'], venue['highest_match_runs'])
+                           for venue in sorted((venue for venue in venues if venue['highest_match_runs'] is not None),
+                                               key=lambda venue: -venue['highest_match_runs'])[:5]],
+        'most_matches': [(venue['name'], venue['matches']) for venue in venues[:5]]
     }
 
     # Match type statistics
@@ -238,63 +175,11 @@ def teams():
 
 @main_bp.route('/teams/<int:team_id>')
 def team_detail(team_id):
-    team = Team.query.get_or_404(team_id)
-    
-    # Get team's matches
-    matches = Match.query.filter(
-        (Match.team1_id == team_id) | (Match.team2_id == team_id)
-    ).order_by(Match.match_date.desc()).all()
-    
-    # Get team's players
-    players = Player.query.filter_by(team_id=team_id).all()
+    profile = get_team_profile(team_id)
+    if profile is None:
+        abort(404)
     
-    # Calculate team statistics
-    total_matches = len(matches)
-    wins = sum(1 for match in matches if match.winner and match.winner.id == team_id)
-    losses = total_matches - wins
-    
-    # Calculate player role statistics
-    role_stats = {
-        'Batsman': 0,
-        'Bowler': 0,
-        'All-Rounder': 0,
-        'Wicket-Keeper': 0
-    }
-    
-    # Calculate nationality statistics
-    nationality_stats = {
-        'Indian': 0,
-        'Overseas': 0
-    }
-    
-    # Count players by role and nationality
-    for player in players:
-        role_stats[player.role] = role_stats.get(player.role, 0) + 1
-        if player.nationality == 'Indian':
-            nationality_stats['Indian'] += 1
-        else:
-            nationality_stats['Overseas'] += 1
-    
-    # Calculate player statistics
-    for player in players:
-        performances = PlayerPerformance.query.filter_by(player_id=player.id).all()
-        if performances:
-            total_runs = sum(p.runs_scored or 0 for p in performances)
-            total_wickets = sum(p.wickets_taken or 0 for p in performances)
-            total_matches = len(performances)
-            
-            player.batting_average = round(total_runs / total_matches, 2) if total_matches > 0 else 0
-            player.bowling_average = round(total_wickets / total_matches, 2) if total_matches > 0 else 0
-    
-    return render_template('team_detail.html',
-                         team=team,
-                         matches=matches[:5],  # Get last 5 matches
-                         players=players,
-                         total_matches=total_matches,
-                         wins=wins,
-                         losses=losses,
-                         role_stats=role_stats,
-                         nationality_stats=nationality_stats)
+    return render_template('team_detail.html', **profile)
 
 @main_bp.route('/players')
 def players():
@@ -312,67 +197,9 @@ def players():
 
 @main_bp.route('/players/<int:player_id>')
 def player_detail(player_id):
-    player = Player.query.get_or_404(player_id)
-    
-    # Get player performances
-    performances = PlayerPerformance.query.filter_by(player_id=player_id).all()
-    
-    # Calculate statistics
-    total_runs = sum(p.runs_scored or 0 for p in performances)
-    total_wickets = sum(p.wickets_taken or 0 for p in performances)
-    total_matches = len(performances)
-    
-    # Calculate averages
-    batting_avg = total_runs / total_matches if total_matches > 0 else 0
-    bowling_avg = total_wickets / total_matches if total_matches > 0 else 0
-    
-    # Get recent performances
-    recent_performances = performances[-5:] if performances else []
-    
-    # Get similar players based on role
-    similar_players = Player.query.filter(
-        Player.role == player.role,
-        Player.id != player_id
-    ).limit(5).all()
-    
-    # Convert similar players to dictionary format
-    similar_players_data = [{
-        'id': p.id,
-        'name': p.name,
-        'role': p.role,
-        'team': p.team.name if p.team else 'Free Agent',
-        'batting_avg': round(sum(pp.runs_scored or 0 for pp in PlayerPerformance.query.filter_by(player_id=p.id).all()) / 
-                           len(PlayerPerformance.query.filter_by(player_id=p.id).all()), 2) if PlayerPerformance.query.filter_by(player_id=p.id).all() else 0,
-        'bowling_avg': round(sum(pp.wickets_taken or 0 for pp in PlayerPerformance.query.filter_by(player_id=p.id).all()) / 
-                           len(PlayerPerformance.query.filter_by(player_id=p.id).all()), 2) if PlayerPerformance.query.filter_by(player_id=p.id).all() else 0
-    } for p in similar_players]
-    
-    # Get market value if available
-    market_value = None
-    auction_lot = AuctionLot.query.filter_by(player_id=player_id).order_by(AuctionLot.sold_price.desc()).first()
-    if auction_lot:
-        market_value = auction_lot.sold_price
-    
-    # Get performance trends
-    trend_data = {
-        'months': [],
-        'avg_runs': [],
-        'avg_wickets': []
-    }
-    
-    if performances:
-        # Group performances by month
-        from collections import defaultdict
-        monthly_performances = defaultdict(list)
-        for perf in performances:
-            month = perf.match.match_date.strftime('%b %Y')
-            monthly_performances[month].append(perf)
-        
-        # Calculate monthly averages
-        for month, perfs in monthly_performances.items():
-            trend_data['months'].append(month)
-            trend_data['avg_runs'].append(sum(p.runs_scored or 0 for p in perfs) / len(perfs))
-            trend_data['avg_wickets'].append(sum(p.wickets_taken or 0 for p in perfs) / len(perfs))
+    profile = get_player_profile(player_id)
+    if profile is None:
+        abort(404)
     
     # Get user's teams if logged in
     user_teams = []
@@ -380,21 +207,23 @@ def player_detail(player_id):
         user_teams = UserTeam.query.filter_by(user_id=current_user.id).all()
     
     return render_template('player_detail.html',
-                         player=player,
-                         batting_avg=round(batting_avg, 2),
-                         bowling_avg=round(bowling_avg, 2),
-                         match_dates=[p.match.match_date for p in performances],
-                         recent_performances=recent_performances,
-                         market_value=market_value,
-                         trend_data=trend_data,
+                         player=profile['player'],
+                         batting_avg=profile['batting_avg'],
+                         bowling_avg=profile['bowling_avg'],
+                         matches_played=profile['matches'],
+                         recent_performances=profile['recent_performances'],
+                         market_value=profile['market_value'],
+                         trend_data=profile['trend_data'],
                          comparison_data={
-                             'similar_players': similar_players_data
+                             'similar_players': profile['similar_players']
                          },
                          user_teams=user_teams)
 
 @main_bp.route('/players/<int:player_id>/add_to_team', methods=['POST'])
 @login_required
 def add_player_to_team(player_id):
+    # SQLite does not enforce the foreign key, so check before inserting
+    Player.query.get_or_404(player_id)
     team_id = request.form.get('team_id')
     if not team_id:
         flash('Please select a team', 'error')
@@ -407,16 +236,15 @@ def add_player_to_team(player_id):
         flash('You do not have permission to modify this team', 'error')
         return redirect(url_for('main_bp.player_detail', player_id=player_id))
     
-    # Check if player is already in team
-    if player_id in [p.id for p in team.players]:
+    # unique_team_player rejects a player already in the team
+    try:
+        db.session.add(UserTeamPlayer(user_team_id=team.id, player_id=player_id))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
         flash('Player is already in the team', 'warning')
         return redirect(url_for('main_bp.player_detail', player_id=player_id))
     
-    # Add player to team
-    team_player = UserTeamPlayer(user_team_id=team_id, player_id=player_id)
-    db.session.add(team_player)
-    db.session.commit()
-    
     flash('Player added to team successfully', 'success')
     return redirect(url_for('main_bp.player_detail', player_id=player_id))
 
@@ -460,17 +288,12 @@ def user_team_detail(team_id):
         flash('You do not have permission to view this team.', 'danger')
         return redirect(url_for('main_bp.myteam'))
     
-    # Get team statistics
-    total_matches = Match.query.filter(
-        (Match.team1_id == team.id) | (Match.team2_id == team.id)
-    ).count()
-    
-    wins = Match.query.filter(
-        ((Match.team1_id == team.id) & (Match.team1_score > Match.team2_score)) |
-        ((Match.team2_id == team.id) & (Match.team2_score > Match.team1_score))
-    ).count()
-    
-    losses = total_matches - wins
+    # Fantasy points credited to the team; numpy is only loaded for fantasy pages
+    from app.services.fantasy import team_fantasy_summary
+    fantasy = team_fantasy_summary(team)
+    joined = {standing['contest'].id for standing in fantasy['contests']}
+    open_contests = [contest for contest in FantasyContest.query.order_by(FantasyContest.created_at.desc())
+                     if contest.id not in joined]
     
     # Get role statistics
     role_stats = {
@@ -491,20 +314,34 @@ def user_team_detail(team_id):
         role_stats[player.role] = role_stats.get(player.role, 0) + 1
         nationality_stats[player.nationality] = nationality_stats.get(player.nationality, 0) + 1
     
-    # Get recent matches
-    recent_matches = Match.query.filter(
-        (Match.team1_id == team.id) | (Match.team2_id == team.id)
-    ).order_by(Match.match_date.desc()).limit(5).all()
-    
     return render_template('team_detail.html',
                          team=team,
                          players=team.players,
-                         total_matches=total_matches,
-                         wins=wins,
-                         losses=losses,
+                         fantasy=fantasy,
+                         open_contests=open_contests,
                          role_stats=role_stats,
                          nationality_stats=nationality_stats,
-                         matches=recent_matches)
+                         matches=fantasy['recent_matches'])
+
+@main_bp.route('/myteam/<int:team_id>/contests/<int:contest_id>/join', methods=['POST'])
+@login_required
+def join_fantasy_contest(team_id, contest_id):
+    from app.services.fantasy import FantasyError, join_contest
+    
+    team = UserTeam.query.get_or_404(team_id)
+    if team.user_id != current_user.id:
+        flash('You do not have permission to modify this team.', 'danger')
+        return redirect(url_for('main_bp.myteam'))
+    contest = FantasyContest.query.get_or_404(contest_id)
+    
+    try:
+        join_contest(contest, team)
+        db.session.commit()
+        flash(f'Entered {contest.name}.', 'success')
+    except FantasyError as e:
+        db.session.rollback()
+        flash(e.message, 'warning')
+    return redirect(url_for('main_bp.user_team_detail', team_id=team_id))
 
 @main_bp.route('/myteam/<int:team_id>/add_player', methods=['GET', 'POST'])
 @login_required
@@ -515,41 +352,59 @@ def add_player(team_id):
         return redirect(url_for('main_bp.myteam'))
     
     if request.method == 'POST':
-        player_id = request.form.get('player_id')
-        if not player_id:
+        player_id = request.form.get('player_id', type=int)
+        if not player_id or not Player.get_by_id(player_id):
             flash('Please select a player.', 'danger')
             return redirect(url_for('main_bp.add_player', team_id=team_id))
         
-        # Check if player is already in team
-        existing_player = UserTeamPlayer.query.filter_by(
-            user_team_id=team_id,
-            player_id=player_id
-        ).first()
-        
-        if existing_player:
-            flash('Player is already in the team.', 'warning')
-            return redirect(url_for('main_bp.add_player', team_id=team_id))
-        
-        # Add player to team
+        # unique_team_player rejects a player already in the team
         try:
             team_player = UserTeamPlayer(user_team_id=team_id, player_id=player_id)
             db.session.add(team_player)
             db.session.commit()
             flash('Player added to team successfully.', 'success')
             return redirect(url_for('main_bp.user_team_detail', team_id=team_id))
+        except IntegrityError:
+            db.session.rollback()
+            flash('Player is already in the team.', 'warning')
+            return redirect(url_for('main_bp.add_player', team_id=team_id))
         except Exception as e:
             db.session.rollback()
             flash('Error adding player to team. Please try again.', 'danger')
             current_app.logger.error(f"Error adding player to team: {str(e)}")
             return redirect(url_for('main_bp.add_player', team_id=team_id))
     
-    # Get all available players (not in the team)
-    team_player_ids = [p.player_id for p in team.team_players]
-    available_players = Player.query.filter(~Player.id.in_(team_player_ids)).all()
+    # The first page of the picker; the rest load from player_picker
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        filters = {}
+    players, next_after = available_players(team.id, filters)
     
     return render_template('add_player.html',
                          team=team,
-                         available_players=available_players)
+                         available_players=players,
+                         next_after=next_after,
+                         filters=filters,
+                         options=filter_options())
+
+@main_bp.route('/myteam/<int:team_id>/players/available')
+@login_required
+def player_picker(team_id):
+    """A page of the players that can still join the team, filtered by
+    role, nationality, team_id, min_price/max_price and a name prefix q;
+    pass the returned ``next`` as ``after`` for the following page."""
+    team = UserTeam.query.get_or_404(team_id)
+    if team.user_id != current_user.id:
+        return jsonify({'message': 'You do not have permission to view this team'}), 403
+    try:
+        filters = parse_filters(request.args)
+        after, limit = parse_page(request.args)
+        players, next_after = available_players(team.id, filters, after, limit)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'players': [picker_item(player) for player in players], 'next': next_after})
 
 @main_bp.route('/myteam/<int:team_id>/remove_player/<int:player_id>', methods=['POST'])
 @login_required
@@ -603,9 +458,12 @@ def delete_team(team_id):
         flash('You do not have permission to delete this team.', 'danger')
         return redirect(url_for('main_bp.myteam'))
     
+    from app.services.fantasy import remove_team
+    
     try:
-        # First delete all team players
+        # First delete all team players and fantasy rows
         UserTeamPlayer.query.filter_by(user_team_id=team.id).delete()
+        remove_team(team)
         # Then delete the team
         db.session.delete(team)
         db.session.commit()
@@ -688,157 +546,26 @@ def auction_detail(auction_id):
 @main_bp.route('/compare')
 @login_required
 def compare():
-    # Get all players and teams for dropdowns
-    players = Player.query.all()
-    teams = Team.query.all()
-    
-    # Get selected players and teams from query parameters
-    player1_id = request.args.get('player1')
-    player2_id = request.args.get('player2')
-    team1_id = request.args.get('team1')
-    team2_id = request.args.get('team2')
-    
-    print(f"Selected IDs - Player1: {player1_id}, Player2: {player2_id}")
-    
-    player1 = None
-    player2 = None
-    team1 = None
-    team2 = None
-    
-    if player1_id:
-        player1 = Player.get_by_id(player1_id)
-        print(f"Player1 found: {player1.name if player1 else 'None'}")
-    if player2_id:
-        player2 = Player.get_by_id(player2_id)
-        print(f"Player2 found: {player2.name if player2 else 'None'}")
-    
-    # Calculate player statistics from PlayerPerformance
-    def get_player_stats(player):
-        if not player:
-            print("No player provided for stats")
-            return {
-                'runs': 0,
-                'wickets': 0,
-                'matches': 0,
-                'batting_avg': 0,
-                'strike_rate': 0,
-                'bowling_avg': 0,
-                'economy': 0
-            }
-            
-        print(f"Getting stats for player: {player.name}")
-        
-        # Get all performances for the player with proper joins
-        performances = (db.session.query(PlayerPerformance)
-                      .filter(PlayerPerformance.player_id == player.id)
-                      .all())
-        
-        print(f"Found {len(performances)} performances for player {player.name}")
-        
-        if not performances:
-            print(f"No performances found for player {player.name}")
-            return {
-                'runs': 0,
-                'wickets': 0,
-                'matches': 0,
-                'batting_avg': 0,
-                'strike_rate': 0,
-                'bowling_avg': 0,
-                'economy': 0
-            }
-        
-        # Calculate batting statistics
-        total_runs = sum(p.runs_scored or 0 for p in performances)
-        total_balls = sum(p.balls_faced or 0 for p in performances)
-        dismissals = sum(1 for p in performances if p.runs_scored is not None and p.runs_scored > 0)
-        batting_avg = total_runs / dismissals if dismissals > 0 else 0
-        strike_rate = (total_runs / total_balls * 100) if total_balls > 0 else 0
-        
-        # Calculate bowling statistics
-        total_wickets = sum(p.wickets_taken or 0 for p in performances)
-        total_runs_conceded = sum(p.runs_conceded or 0 for p in performances)
-        total_overs = sum(p.overs_bowled or 0 for p in performances)
-        bowling_avg = total_runs_conceded / total_wickets if total_wickets > 0 else 0
-        economy = total_runs_conceded / total_overs if total_overs > 0 else 0
-        
-        stats = {
-            'runs': total_runs,
-            'wickets': total_wickets,
-            'matches': len(performances),
-            'batting_avg': round(batting_avg, 2),
-            'strike_rate': round(strike_rate, 2),
-            'bowling_avg': round(bowling_avg, 2),
-            'economy': round(economy, 2)
-        }
-        
-        print(f"Calculated stats for {player.name}: {stats}")
-        return stats
-    
-    # Calculate team statistics
-    def get_team_stats(team):
-        if not team:
-            return {
-                'matches': 0,
-                'wins': 0,
-                'losses': 0,
-                'win_percentage': 0,
-                'total_runs': 0,
-                'total_wickets': 0
-            }
-            
-        # Get all matches for the team with proper joins
-        matches = (db.session.query(Match)
-                 .filter((Match.team1_id == team.id) | (Match.team2_id == team.id))
-                 .all())
-        
-        if not matches:
-            return {
-                'matches': 0,
-                'wins': 0,
-                'losses': 0,
-                'win_percentage': 0,
-                'total_runs': 0,
-                'total_wickets': 0
-            }
-        
-        # Calculate win/loss statistics
-        wins = sum(1 for m in matches if m.winner and m.winner.id == team.id)
-        losses = sum(1 for m in matches if m.winner and m.winner.id != team.id)
-        win_percentage = (wins / len(matches) * 100) if matches else 0
-        
-        # Calculate runs and wickets
-        total_runs = sum(m.team1_score + m.team2_score for m in matches)
-        total_wickets = sum(m.team1_wickets + m.team2_wickets for m in matches)
-        
-        return {
-            'matches': len(matches),
-            'wins': wins,
-            'losses': losses,
-            'win_percentage': round(win_percentage, 2),
-            'total_runs': total_runs,
-            'total_wickets': total_wickets
-        }
-    
-    # Prepare comparison data
-    player1_stats = get_player_stats(player1)
-    player2_stats = get_player_stats(player2)
-    
-    print(f"Final stats - Player1: {player1_stats}, Player2: {player2_stats}")
-    
-    comparison_data = {
-        'player1': player1,
-        'player2': player2,
-        'team1': team1,
-        'team2': team2,
-        'players': players,
-        'teams': teams,
-        'player1_stats': player1_stats,
-        'player2_stats': player2_stats,
-        'team1_stats': get_team_stats(team1),
-        'team2_stats': get_team_stats(team2)
-    }
-    
-    return render_template('compare.html', **comparison_data)
+    # The page only resolves the names of the current selection; the numbers
+    # come from /api/compare and the pickers from the search endpoints.
+    # player1/player2 and team1/team2 links from before still work.
+    kind = 'teams' if 'teams' in request.args or request.args.get('team1') or request.args.get('team2') else 'players'
+    singular = kind[:-1]
+    try:
+        ids = parse_ids(request.args.getlist(kind) +
+                        [request.args.get(f'{singular}{n}', '') for n in (1, 2)])
+    except ValueError:
+        ids = []
+    ids = ids[:current_app.config['COMPARE_MAX_ENTITIES']]
+    
+    model = Team if kind == 'teams' else Player
+    names = dict(db.session.query(model.id, model.name).filter(model.id.in_(ids))) if ids else {}
+    selected = [{'id': entity_id, 'name': names[entity_id]} for entity_id in ids if entity_id in names]
+    
+    return render_template('compare.html',
+                         kind=kind,
+                         selected=selected,
+                         max_entities=current_app.config['COMPARE_MAX_ENTITIES'])
 
 @main_bp.route('/search')
 def search():
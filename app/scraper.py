@@ -1,10 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime, timedelta
 from app.models.team import Team, Player
-from app.models.match import Match, PlayerPerformance
+from app.models.match import Match, PlayerPerformance, TeamHeadToHead, SeasonStanding
+from app.models.venue import VenueSeasonStats
 from app import db
+from app.utils.metrics import track_scraper_job
+from app.services.head_to_head import rebuild_head_to_head
+from app.services.venues import rebuild_venues
+from app.services.points_table import rebuild_standings
+from app.services.team_profile import mark_team_profiles_changed
 import random
 
 class IPLScraper:
@@ -87,8 +90,12 @@ class IPLScraper:
         
         return teams_data, players_data, matches_data
 
+    @track_scraper_job('scrape_teams')
     def scrape_teams(self):
         """Scrape team information"""
+        # Imported here so web workers never load the scraping stack
+        import requests
+        from bs4 import BeautifulSoup
         try:
             response = requests.get(f"{self.base_url}/cricket-series/ipl-2024/teams", headers=self.headers)
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -115,8 +122,11 @@ class IPLScraper:
             print(f"Error scraping teams: {str(e)}")
             return self.get_sample_data()[0]
 
+    @track_scraper_job('scrape_matches')
     def scrape_matches(self, season=2024):
         """Scrape match information"""
+        import requests
+        from bs4 import BeautifulSoup
         try:
             response = requests.get(f"{self.base_url}/cricket-series/ipl-2024/matches", headers=self.headers)
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -152,8 +162,11 @@ class IPLScraper:
             print(f"Error scraping matches: {str(e)}")
             return self.get_sample_data()[2]
 
+    @track_scraper_job('scrape_players')
     def scrape_players(self):
         """Scrape player information"""
+        import requests
+        from bs4 import BeautifulSoup
         try:
             response = requests.get(f"{self.base_url}/cricket-series/ipl-2024/players", headers=self.headers)
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -373,13 +386,19 @@ class IPLDataGenerator:
         
         return performances
 
+@track_scraper_job('populate_database')
 def populate_database():
     """Populate the database with generated sample data"""
     generator = IPLDataGenerator()
     
     try:
-        # Clear existing data
+        # Clear existing data; the bulk deletes skip the ORM hooks, and new
+        # teams can reuse the old ids
+        mark_team_profiles_changed(team_id for team_id, in db.session.query(Team.id))
         db.session.query(PlayerPerformance).delete()
+        db.session.query(TeamHeadToHead).delete()
+        db.session.query(VenueSeasonStats).delete()
+        db.session.query(SeasonStanding).delete()
         db.session.query(Match).delete()
         db.session.query(Player).delete()
         db.session.query(Team).delete()
@@ -439,6 +458,9 @@ def populate_database():
                         )
                         db.session.add(performance)
         
+        rebuild_head_to_head()
+        rebuild_venues()
+        rebuild_standings()
         db.session.commit()
         print("Database populated successfully with 100 instances of sample data!")
     except Exception as e:
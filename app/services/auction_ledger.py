@@ -0,0 +1,110 @@
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.team import Player
+from app.models.auction import AuctionLot, AuctionBid, TeamPurse
+
+lots_table = AuctionLot.__table__
+purses_table = TeamPurse.__table__
+
+class BidError(Exception):
+    """Raised when a bid is rejected by the ledger."""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def get_or_create_purse(auction_id, team_id):
+    """Return the team's purse for an auction, opening it on the first bid."""
+    purse = TeamPurse.get_for_team(auction_id, team_id)
+    if purse:
+        return purse
+    
+    purse = TeamPurse(
+        auction_id=auction_id,
+        team_id=team_id,
+        initial_purse=current_app.config['AUCTION_INITIAL_PURSE'],
+        committed_amount=0.0,
+        spent_amount=0.0,
+        retained_players=Player.query.filter_by(team_id=team_id).count(),
+        players_bought=0,
+        leading_lots=0
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(purse)
+    except IntegrityError:
+        # Another request opened the purse first
+        purse = TeamPurse.get_for_team(auction_id, team_id)
+    return purse
+
+def _leading_bid_unchanged(amount):
+    if amount is None:
+        return lots_table.c.leading_bid_amount.is_(None)
+    return lots_table.c.leading_bid_amount == amount
+
+def place_bid(lot, team, bid_amount):
+    """Record a bid and move purse commitments in the same transaction.
+    
+    Every check reads counters stored on the lot and the purse rows, so the
+    cost does not grow with the number of bids. The lot and purse updates are
+    conditional on the values we validated against, which keeps the ledger
+    consistent when two owners bid on the same lot at once.
+    """
+    if lot.status != 'unsold':
+        raise BidError('Lot is already sold')
+    
+    if bid_amount <= lot.current_highest_bid:
+        raise BidError('Bid must be higher than current highest bid')
+    
+    purse = get_or_create_purse(lot.auction_id, team.id)
+    previous_team_id = lot.leading_team_id
+    previous_amount = lot.leading_bid_amount
+    already_leading = previous_team_id == team.id
+    
+    # Raising your own leading bid only commits the difference
+    increase = bid_amount - previous_amount if already_leading else bid_amount
+    if increase > purse.remaining_purse:
+        raise BidError('Insufficient purse for this bid')
+    
+    if not already_leading and purse.squad_size >= current_app.config['AUCTION_MAX_SQUAD_SIZE']:
+        raise BidError('Squad is already full')
+    
+    claimed = db.session.execute(
+        lots_table.update()
+        .where(lots_table.c.id == lot.id)
+        .where(lots_table.c.status == 'unsold')
+        .where(_leading_bid_unchanged(previous_amount))
+        .values(leading_bid_amount=bid_amount, leading_team_id=team.id)
+    )
+    if claimed.rowcount != 1:
+        raise BidError('Lot was updated by another bid, please retry', 409)
+    
+    reserved = db.session.execute(
+        purses_table.update()
+        .where(purses_table.c.id == purse.id)
+        .where(purses_table.c.initial_purse - purses_table.c.spent_amount - purses_table.c.committed_amount >= increase)
+        .values(
+            committed_amount=purses_table.c.committed_amount + increase,
+            leading_lots=purses_table.c.leading_lots + (0 if already_leading else 1)
+        )
+    )
+    if reserved.rowcount != 1:
+        raise BidError('Insufficient purse for this bid')
+    
+    if previous_team_id is not None and not already_leading:
+        db.session.execute(
+            purses_table.update()
+            .where(purses_table.c.auction_id == lot.auction_id)
+            .where(purses_table.c.team_id == previous_team_id)
+            .values(
+                committed_amount=purses_table.c.committed_amount - previous_amount,
+                leading_lots=purses_table.c.leading_lots - 1
+            )
+        )
+    
+    bid = AuctionBid(lot_id=lot.id, team_id=team.id, bid_amount=bid_amount)
+    db.session.add(bid)
+    db.session.commit()
+    return bid
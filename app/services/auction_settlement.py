@@ -0,0 +1,148 @@
+import time
+from collections import defaultdict
+from sqlalchemy import bindparam
+from app.extensions import db
+from app.models.team import Player
+from app.models.auction import Auction, AuctionLot, TeamPurse
+from app.services.homepage import mark_homepage_stale
+from app.services.player_profile import invalidate_player_profiles
+from app.services.team_profile import invalidate_team_profiles
+
+lots_table = AuctionLot.__table__
+purses_table = TeamPurse.__table__
+players_table = Player.__table__
+# Settlements retried after a bid lands between reading and selling a lot
+SETTLE_ATTEMPTS = 3
+
+class SettlementError(Exception):
+    """Raised when a settlement cannot be applied consistently."""
+
+class _LotsChanged(Exception):
+    """A lot's leading bid moved after it was read; the settlement is retried."""
+
+def settle_lot(auction_id, lot_id):
+    """Sell a single lot to its leading bidder."""
+    return _settle(auction_id, lot_ids=[lot_id])
+
+def settle_auction(auction_id):
+    """Sell every open lot with a leading bid and mark the auction completed."""
+    return _settle(auction_id, close_auction=True)
+
+def _settle(auction_id, lot_ids=None, close_auction=False):
+    started = time.perf_counter()
+    for _ in range(SETTLE_ATTEMPTS):
+        try:
+            rows, winners, team_totals, moved_from = _apply(auction_id, lot_ids, close_auction)
+            break
+        except _LotsChanged:
+            continue
+    else:
+        raise SettlementError('Lots kept receiving bids during settlement, please retry')
+    
+    # Sold players changed team and value through core updates, which the
+    # cache hooks on ORM flushes do not see
+    invalidate_player_profiles(row.player_id for row in winners)
+    invalidate_team_profiles(list(team_totals) + list(moved_from))
+    if winners:
+        mark_homepage_stale()
+    
+    already_sold = sum(1 for row in rows if row.status == 'sold')
+    no_bids = sum(1 for row in rows if row.status == 'unsold' and row.leading_team_id is None)
+    return {
+        'auction_id': auction_id,
+        'lots_considered': len(rows),
+        'lots_sold': len(winners),
+        'lots_already_sold': already_sold,
+        'lots_without_bids': no_bids,
+        'total_value': sum(row.leading_bid_amount for row in winners),
+        'teams': [{
+            'team_id': team_id,
+            'players_bought': totals['players'],
+            'amount_spent': totals['amount']
+        } for team_id, totals in team_totals.items()],
+        'sales': [{
+            'lot_id': row.id,
+            'player_id': row.player_id,
+            'team_id': row.leading_team_id,
+            'sold_price': row.leading_bid_amount
+        } for row in winners],
+        'auction_closed': close_auction,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def _apply(auction_id, lot_ids, close_auction):
+    """Sell the lots and commit. Returns (lot rows, winning rows, totals per
+    buying team, teams the sold players left); raises _LotsChanged after
+    rolling back when a bid moved a lot's leader in the meantime."""
+    query = (db.select([
+                lots_table.c.id,
+                lots_table.c.player_id,
+                lots_table.c.status,
+                lots_table.c.leading_bid_amount,
+                lots_table.c.leading_team_id
+             ])
+             .where(lots_table.c.auction_id == auction_id)
+             .with_for_update())
+    if lot_ids is not None:
+        query = query.where(lots_table.c.id.in_(lot_ids))
+    rows = db.session.execute(query).fetchall()
+    
+    winners = [row for row in rows if row.status == 'unsold' and row.leading_team_id is not None]
+    moved_from = set()
+    if winners:
+        moved_from = {team_id for team_id, in db.session.query(Player.team_id)
+                      .filter(Player.id.in_([row.player_id for row in winners]), Player.team_id.isnot(None))}
+    
+    # Purse debits are applied once per team rather than once per lot
+    team_totals = defaultdict(lambda: {'players': 0, 'amount': 0.0})
+    for row in winners:
+        team_totals[row.leading_team_id]['players'] += 1
+        team_totals[row.leading_team_id]['amount'] += row.leading_bid_amount
+    
+    try:
+        if winners:
+            sold = db.session.execute(
+                lots_table.update()
+                .where(lots_table.c.id == bindparam('lot_id'))
+                .where(lots_table.c.status == 'unsold')
+                # The bid that was read must still lead: FOR UPDATE is a no-op on
+                # SQLite, so a bid in between would otherwise sell at the old price
+                .where(lots_table.c.leading_bid_amount == bindparam('price'))
+                .where(lots_table.c.leading_team_id == bindparam('team_id'))
+                .values(status='sold', sold_price=bindparam('price'), sold_to_team_id=bindparam('team_id')),
+                [{'lot_id': row.id, 'price': row.leading_bid_amount, 'team_id': row.leading_team_id}
+                 for row in winners]
+            )
+            if sold.rowcount != len(winners):
+                raise _LotsChanged()
+            
+            db.session.execute(
+                purses_table.update()
+                .where(purses_table.c.auction_id == auction_id)
+                .where(purses_table.c.team_id == bindparam('purse_team_id'))
+                .values(
+                    committed_amount=purses_table.c.committed_amount - bindparam('amount'),
+                    spent_amount=purses_table.c.spent_amount + bindparam('amount'),
+                    leading_lots=purses_table.c.leading_lots - bindparam('players'),
+                    players_bought=purses_table.c.players_bought + bindparam('players')
+                ),
+                [{'purse_team_id': team_id, 'amount': totals['amount'], 'players': totals['players']}
+                 for team_id, totals in team_totals.items()]
+            )
+            
+            db.session.execute(
+                players_table.update()
+                .where(players_table.c.id == bindparam('player_key'))
+                .values(team_id=bindparam('new_team_id'), current_value=bindparam('value')),
+                [{'player_key': row.player_id, 'new_team_id': row.leading_team_id, 'value': row.leading_bid_amount}
+                 for row in winners]
+            )
+        
+        if close_auction:
+            Auction.query.filter_by(id=auction_id).update({'status': 'completed'}, synchronize_session=False)
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return rows, winners, team_totals, moved_from
@@ -0,0 +1,438 @@
+from itertools import chain
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.extensions import db, cache
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.models.delivery import (Delivery, EXTRA_KINDS, WICKET_KINDS, WIDE, NOBALL, BYE, LEGBYE, PENALTY,
+                                 BOWLED, CAUGHT, LBW, RUN_OUT, STUMPED, HIT_WICKET, CAUGHT_AND_BOWLED,
+                                 RETIRED_HURT, BOWLER_WICKETS)
+from app.services.head_to_head import rebuild_head_to_head
+from app.services.match_results import record_match_result
+from app.services.player_profile import mark_player_stats_changed
+from app.services.points_table import rebuild_standings
+from app.services.team_profile import mark_team_profiles_changed
+from app.services.venues import rebuild_venue_stats
+
+# A delivery as a list, in this order, or as a dict with these keys
+FIELDS = ('innings', 'over', 'ball', 'batter_id', 'bowler_id', 'runs', 'extras',
+          'extra_kind', 'wicket_kind', 'player_out_id', 'fielder_id')
+REQUIRED = ('innings', 'over', 'ball', 'batter_id', 'bowler_id')
+# Columns of the int64 arrays the derivation reads; a missing player is 0
+(MATCH, INNINGS, OVER, BALL, BATTER, BOWLER, RUNS, EXTRAS,
+ EXTRA_KIND, WICKET_KIND, PLAYER_OUT, FIELDER) = range(12)
+INSERT_CHUNK = 5000
+# Deliveries per block of whole matches during a rebuild (about 25MB as int64)
+REBUILD_CHUNK = 250000
+PERFORMANCE_COLUMNS = ('match_id', 'player_id', 'team_id', 'runs_scored', 'balls_faced', 'fours', 'sixes',
+                       'strike_rate', 'overs_bowled', 'runs_conceded', 'wickets_taken', 'economy_rate',
+                       'catches', 'stumpings', 'run_outs')
+
+def _cache_key(match_id):
+    return f'scorecard:{match_id}'
+
+def _normalize(match_id, index, delivery):
+    """One insert row from a delivery list or dict; ValueError names the
+    offending delivery."""
+    if isinstance(delivery, dict):
+        values = [delivery.get(field) for field in FIELDS]
+    else:
+        values = list(delivery)[:len(FIELDS)]
+        values += [None] * (len(FIELDS) - len(values))
+    row = dict(zip(FIELDS, values))
+    
+    problem = None
+    try:
+        for field in FIELDS:
+            if row[field] is not None:
+                row[field] = int(row[field])
+    except (TypeError, ValueError):
+        problem = f'{field} must be a whole number'
+    else:
+        for field in ('runs', 'extras', 'extra_kind', 'wicket_kind'):
+            row[field] = row[field] or 0
+        if any(row[field] is None for field in REQUIRED):
+            problem = f'{", ".join(REQUIRED)} are required'
+        elif not 1 <= row['innings'] <= 4:
+            problem = 'innings must be between 1 and 4'
+        elif row['over'] < 0 or row['ball'] < 1:
+            problem = 'over starts at 0 and ball at 1'
+        elif not (0 <= row['runs'] <= 7 and 0 <= row['extras'] <= 7):
+            problem = 'runs and extras must be between 0 and 7'
+        elif not 0 <= row['extra_kind'] < len(EXTRA_KINDS):
+            problem = f'extra_kind must be below {len(EXTRA_KINDS)}'
+        elif not 0 <= row['wicket_kind'] < len(WICKET_KINDS):
+            problem = f'wicket_kind must be below {len(WICKET_KINDS)}'
+        elif bool(row['extras']) != bool(row['extra_kind']):
+            problem = 'extras and extra_kind go together'
+    if problem:
+        raise ValueError(f'delivery {index}: {problem}')
+    
+    if row['wicket_kind'] and row['player_out_id'] is None:
+        row['player_out_id'] = row['batter_id']
+    row['match_id'] = match_id
+    return row
+
+def append_deliveries(match, deliveries):
+    """Bulk insert a match's deliveries in one statement per few thousand
+    rows. The caller commits and usually calls derive_match afterwards.
+    
+    Returns the inserted rows as dicts. Raises ValueError for a malformed
+    delivery before anything is written; a ball that is already stored
+    fails with an IntegrityError.
+    """
+    rows = [_normalize(match.id, index, delivery) for index, delivery in enumerate(deliveries)]
+    table = Delivery.__table__
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(table.insert(), rows[start:start + INSERT_CHUNK])
+    db.session.info.setdefault('changed_scorecards', set()).add(match.id)
+    return rows
+
+def _load(*criteria):
+    """The deliveries meeting ``criteria`` as an int64 array, in match order."""
+    query = (db.select(Delivery.match_id, Delivery.innings, Delivery.over, Delivery.ball,
+                       Delivery.batter_id, Delivery.bowler_id, Delivery.runs, Delivery.extras,
+                       Delivery.extra_kind, Delivery.wicket_kind,
+                       db.func.coalesce(Delivery.player_out_id, 0),
+                       db.func.coalesce(Delivery.fielder_id, 0))
+             .where(*criteria)
+             .order_by(Delivery.match_id, Delivery.innings, Delivery.over, Delivery.ball))
+    result = db.session.connection().execute(query)
+    # Plain DBAPI tuples: wrapping each delivery in a Row costs as much as fetching it
+    rows = result.cursor.fetchall()
+    result.close()
+    return np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 12).reshape(-1, 12)
+
+def _teams(*criteria):
+    """(match ids, team1 ids, team2 ids) as sorted arrays, for looking up the sides."""
+    rows = db.session.query(Match.id, Match.team1_id, Match.team2_id).filter(*criteria).order_by(Match.id)
+    return np.array(rows.all(), dtype=np.int64).reshape(-1, 3).T
+
+# Group keys pack (match, innings, player) into one int64, so grouping is a
+# single np.unique; match ids must stay below 2**28.
+def _key(match, innings, player):
+    return (match << 35) | (innings << 32) | player
+
+def _unkey(keys):
+    return keys >> 35, (keys >> 32) & 7, keys & 0xFFFFFFFF
+
+def _sums(inverse, size, **values):
+    return {name: np.bincount(inverse, weights=value, minlength=size).astype(np.int64)
+            for name, value in values.items()}
+
+def _first(inverse, size, positions):
+    first = np.full(size, np.iinfo(np.int64).max)
+    np.minimum.at(first, inverse, positions)
+    return first
+
+def derive(block):
+    """Batting, bowling, fielding and innings aggregates of every match in
+    ``block`` (whole matches, as loaded by _load), in one vectorized pass.
+    
+    Super overs (innings 3 and 4) are stored but do not count towards the
+    match figures, as in the official records.
+    """
+    block = block[block[:, INNINGS] <= 2]
+    match, innings = block[:, MATCH], block[:, INNINGS]
+    runs, extras = block[:, RUNS], block[:, EXTRAS]
+    extra_kind, wicket_kind = block[:, EXTRA_KIND], block[:, WICKET_KIND]
+    bowler, fielder = block[:, BOWLER], block[:, FIELDER]
+    positions = np.arange(len(block))
+    wide = extra_kind == WIDE
+    legal = ~wide & (extra_kind != NOBALL)
+    out = wicket_kind > 0
+    
+    keys, inverse = np.unique(_key(match, innings, 0), return_inverse=True)
+    size = len(keys)
+    by_kind = np.bincount(inverse * len(EXTRA_KINDS) + extra_kind, weights=extras,
+                          minlength=size * len(EXTRA_KINDS)).astype(np.int64)
+    totals = dict(_sums(inverse, size, runs=runs + extras, balls=legal,
+                        wickets=out & (wicket_kind != RETIRED_HURT)),
+                  key=keys, extras=by_kind.reshape(size, len(EXTRA_KINDS)))
+    
+    # A batter appears on the balls they faced and on the ball they were out,
+    # which for a run out non-striker may be one they never faced
+    keys, inverse = np.unique(np.concatenate([_key(match, innings, block[:, BATTER]),
+                                              _key(match[out], innings[out], block[out, PLAYER_OUT])]),
+                              return_inverse=True)
+    size = len(keys)
+    faced, dismissed = inverse[:len(block)], inverse[len(block):]
+    batting = dict(_sums(faced, size, runs=runs, balls=~wide, fours=runs == 4, sixes=runs == 6),
+                   key=keys, order=_first(inverse, size, np.concatenate([positions, positions[out]])),
+                   how=np.zeros(size, dtype=np.int64), how_bowler=np.zeros(size, dtype=np.int64),
+                   how_fielder=np.zeros(size, dtype=np.int64))
+    batting['how'][dismissed] = wicket_kind[out]
+    batting['how_bowler'][dismissed] = bowler[out]
+    batting['how_fielder'][dismissed] = fielder[out]
+    
+    keys, inverse = np.unique(_key(match, innings, bowler), return_inverse=True)
+    size = len(keys)
+    bowling = dict(_sums(inverse, size, balls=legal, wickets=np.isin(wicket_kind, BOWLER_WICKETS),
+                         # Byes and leg byes are not charged to the bowler
+                         runs=runs + np.where(wide | (extra_kind == NOBALL), extras, 0)),
+                   key=keys, order=_first(inverse, size, positions))
+    
+    catcher = np.where(wicket_kind == CAUGHT_AND_BOWLED, bowler, fielder)
+    credited = np.isin(wicket_kind, (CAUGHT, CAUGHT_AND_BOWLED, STUMPED, RUN_OUT)) & (catcher > 0)
+    keys, inverse = np.unique(_key(match[credited], innings[credited], catcher[credited]), return_inverse=True)
+    kinds = wicket_kind[credited]
+    fielding = dict(_sums(inverse, len(keys), catches=(kinds == CAUGHT) | (kinds == CAUGHT_AND_BOWLED),
+                          stumpings=kinds == STUMPED, run_outs=kinds == RUN_OUT),
+                    key=keys)
+    
+    return {'totals': totals, 'batting': batting, 'bowling': bowling, 'fielding': fielding}
+
+def _overs(balls):
+    """Cricket notation: 19.2 is 19 overs and 2 balls."""
+    return balls // 6 + balls % 6 / 10
+
+def performances(derived, teams):
+    """Columns (PERFORMANCE_COLUMNS) of one PlayerPerformance row per player
+    per match; ``teams`` is the output of _teams."""
+    parts = []
+    for name, columns in (('batting', ('runs', 'balls', 'fours', 'sixes')),
+                          ('bowling', ('balls', 'runs', 'wickets')),
+                          ('fielding', ('catches', 'stumpings', 'run_outs'))):
+        group = derived[name]
+        match, innings, player = _unkey(group['key'])
+        values = {f'{name}_{column}': group[column] for column in columns}
+        # Batters play for the side batting in that innings, the others for the side in the field
+        parts.append((match, player, innings if name == 'batting' else 3 - innings, values))
+    
+    match = np.concatenate([part[0] for part in parts])
+    player = np.concatenate([part[1] for part in parts])
+    keys, inverse = np.unique((match << 32) | player, return_inverse=True)
+    size = len(keys)
+    count = np.bincount(inverse, minlength=size)
+    side = np.bincount(inverse, weights=np.concatenate([part[2] for part in parts]), minlength=size) // count
+    
+    columns = {}
+    for offset, part in enumerate(parts):
+        start = sum(len(previous[0]) for previous in parts[:offset])
+        for name, value in part[3].items():
+            columns[name] = np.bincount(inverse[start:start + len(value)], weights=value,
+                                        minlength=size).astype(np.int64)
+    
+    match, player = keys >> 32, keys & 0xFFFFFFFF
+    match_ids, team1_ids, team2_ids = teams
+    row = np.searchsorted(match_ids, match)
+    balls_bowled = columns['bowling_balls']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strike_rate = np.where(columns['batting_balls'] > 0,
+                               np.round(columns['batting_runs'] * 100 / columns['batting_balls'], 2), 0.0)
+        economy_rate = np.where(balls_bowled > 0, np.round(columns['bowling_runs'] * 6 / balls_bowled, 2), 0.0)
+    return dict(zip(PERFORMANCE_COLUMNS, (
+        match, player, np.where(side == 1, team1_ids[row], team2_ids[row]),
+        columns['batting_runs'], columns['batting_balls'], columns['batting_fours'], columns['batting_sixes'],
+        strike_rate, _overs(balls_bowled), columns['bowling_runs'], columns['bowling_wickets'], economy_rate,
+        columns['fielding_catches'], columns['fielding_stumpings'], columns['fielding_run_outs'])))
+
+def match_totals(derived):
+    """{match_id: {'team1_score': ..., 'team1_overs': ..., ...}} for the
+    innings each match has deliveries for."""
+    totals = derived['totals']
+    match, innings, _ = _unkey(totals['key'])
+    by_match = {}
+    for match_id, side, runs, balls, wickets in zip(match.tolist(), innings.tolist(), totals['runs'].tolist(),
+                                                    totals['balls'].tolist(), totals['wickets'].tolist()):
+        by_match.setdefault(match_id, {}).update({f'team{side}_score': runs, f'team{side}_overs': _overs(balls),
+                                                  f'team{side}_wickets': wickets})
+    return by_match
+
+def _performance_rows(columns):
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(column.tolist() for column in columns.values()))]
+
+def derive_match(match):
+    """Rewrite one match's PlayerPerformance rows and totals from its
+    deliveries, through the ORM so cache hooks and rollups follow. Rows are
+    updated in place, keeping their ids, and only players no longer in the
+    match lose theirs. Returns False when the match has no deliveries."""
+    block = _load(Delivery.match_id == match.id)
+    if not len(block):
+        return False
+    derived = derive(block)
+    
+    existing = {performance.player_id: performance
+                for performance in PlayerPerformance.query.filter_by(match_id=match.id)}
+    for row in _performance_rows(performances(derived, _teams(Match.id == match.id))):
+        performance = existing.pop(row['player_id'], None)
+        if performance is None:
+            db.session.add(PlayerPerformance(**row))
+        else:
+            for column, value in row.items():
+                setattr(performance, column, value)
+    for performance in existing.values():
+        db.session.delete(performance)
+    record_match_result(match, **match_totals(derived).get(match.id, {}))
+    db.session.info.setdefault('changed_scorecards', set()).add(match.id)
+    return True
+
+def _blocks(chunk_size):
+    """Deliveries in blocks of whole matches, about ``chunk_size`` rows each."""
+    counts = (db.session.query(Delivery.match_id, db.func.count(Delivery.id))
+              .group_by(Delivery.match_id)
+              .order_by(Delivery.match_id)
+              .all())
+    start = 0
+    while start < len(counts):
+        end, rows = start, 0
+        while end < len(counts) and (rows < chunk_size or end == start):
+            rows += counts[end][1]
+            end += 1
+        yield _load(Delivery.match_id.between(counts[start][0], counts[end - 1][0]))
+        start = end
+
+def rebuild_from_deliveries(chunk_size=REBUILD_CHUNK):
+    """Rederive the PlayerPerformance rows and totals of every match with
+    deliveries, then recount the rollups that read the totals. Works through
+    blocks of whole matches so memory stays flat; rows are written in bulk,
+    and the affected players and teams are invalidated when the caller
+    commits. Returns (matches, deliveries)."""
+    teams = _teams()
+    performance_table, match_table = PlayerPerformance.__table__, Match.__table__
+    with_deliveries = db.select(Delivery.match_id).distinct()
+    mark_team_profiles_changed(chain.from_iterable(
+        db.session.query(Match.team1_id, Match.team2_id).filter(Match.id.in_(with_deliveries))))
+    mark_player_stats_changed(player_id for player_id, in
+                              db.session.query(PlayerPerformance.player_id)
+                              .filter(PlayerPerformance.match_id.in_(with_deliveries))
+                              .distinct())
+    db.session.execute(performance_table.delete().where(performance_table.c.match_id.in_(with_deliveries)))
+    
+    updates = {side: match_table.update()
+               .where(match_table.c.id == db.bindparam('match_id'))
+               .values({f'team{side}_{column}': db.bindparam(column) for column in ('score', 'overs', 'wickets')})
+               for side in (1, 2)}
+    matches = deliveries = 0
+    for block in _blocks(chunk_size):
+        derived = derive(block)
+        rows = _performance_rows(performances(derived, teams))
+        if rows:
+            db.session.execute(performance_table.insert(), rows)
+            mark_player_stats_changed(row['player_id'] for row in rows)
+        
+        by_side = {1: [], 2: []}
+        for match_id, totals in match_totals(derived).items():
+            for side in (1, 2):
+                if f'team{side}_score' in totals:
+                    by_side[side].append({'match_id': match_id,
+                                          **{column: totals[f'team{side}_{column}']
+                                             for column in ('score', 'overs', 'wickets')}})
+        for side, values in by_side.items():
+            if values:
+                db.session.execute(updates[side], values)
+        matches += len(np.unique(block[:, MATCH]))
+        deliveries += len(block)
+    
+    rebuild_head_to_head()
+    rebuild_venue_stats()
+    rebuild_standings()
+    db.session.flush()
+    return matches, deliveries
+
+def _dismissal(kind, bowler, fielder):
+    if kind == 0:
+        return 'not out'
+    if kind == BOWLED:
+        return f'b {bowler}'
+    if kind == CAUGHT:
+        return f'c {fielder} b {bowler}'
+    if kind == LBW:
+        return f'lbw b {bowler}'
+    if kind == RUN_OUT:
+        return f'run out ({fielder})' if fielder else 'run out'
+    if kind == STUMPED:
+        return f'st {fielder} b {bowler}'
+    if kind == HIT_WICKET:
+        return f'hit wicket b {bowler}'
+    if kind == CAUGHT_AND_BOWLED:
+        return f'c & b {bowler}'
+    return WICKET_KINDS[kind]
+
+def build_scorecard(match):
+    """Batting and bowling cards, extras and totals for each innings of a
+    match, or None when it has no deliveries."""
+    block = _load(Delivery.match_id == match.id)
+    if not len(block):
+        return None
+    derived = derive(block)
+    batting, bowling, totals = derived['batting'], derived['bowling'], derived['totals']
+    
+    player_ids = set(np.unique(block[:, [BATTER, BOWLER, PLAYER_OUT, FIELDER]]).tolist()) - {0}
+    names = dict(db.session.query(Player.id, Player.name).filter(Player.id.in_(player_ids)))
+    teams = {team.id: team for team in Team.query.filter(Team.id.in_((match.team1_id, match.team2_id)))}
+    
+    def player(player_id):
+        return {'id': player_id, 'name': names.get(player_id)}
+    
+    innings_cards = []
+    for index, (_, innings, _) in enumerate(zip(*_unkey(totals['key']))):
+        innings = int(innings)
+        team = teams.get(match.team1_id if innings == 1 else match.team2_id)
+        by_kind = totals['extras'][index].tolist()
+        
+        _, batting_innings, batters = _unkey(batting['key'])
+        card = []
+        for row in sorted(np.flatnonzero(batting_innings == innings), key=lambda row: batting['order'][row]):
+            runs, balls = int(batting['runs'][row]), int(batting['balls'][row])
+            card.append({
+                'player': player(int(batters[row])),
+                'runs': runs,
+                'balls': balls,
+                'fours': int(batting['fours'][row]),
+                'sixes': int(batting['sixes'][row]),
+                'strike_rate': round(runs * 100 / balls, 2) if balls else None,
+                'dismissal': _dismissal(int(batting['how'][row]), names.get(int(batting['how_bowler'][row])),
+                                        names.get(int(batting['how_fielder'][row])))
+            })
+        
+        _, bowling_innings, bowlers = _unkey(bowling['key'])
+        figures = []
+        for row in sorted(np.flatnonzero(bowling_innings == innings), key=lambda row: bowling['order'][row]):
+            runs, balls = int(bowling['runs'][row]), int(bowling['balls'][row])
+            figures.append({
+                'player': player(int(bowlers[row])),
+                'overs': _overs(balls),
+                'runs': runs,
+                'wickets': int(bowling['wickets'][row]),
+                'economy': round(runs * 6 / balls, 2) if balls else None
+            })
+        
+        innings_cards.append({
+            'innings': innings,
+            'team': {'id': team.id, 'name': team.name, 'short_name': team.short_name} if team else None,
+            'runs': int(totals['runs'][index]),
+            'wickets': int(totals['wickets'][index]),
+            'overs': _overs(int(totals['balls'][index])),
+            'extras': {
+                'wides': by_kind[WIDE],
+                'no_balls': by_kind[NOBALL],
+                'byes': by_kind[BYE],
+                'leg_byes': by_kind[LEGBYE],
+                'penalties': by_kind[PENALTY],
+                'total': sum(by_kind)
+            },
+            'batting': card,
+            'bowling': figures
+        })
+    return {'match_id': match.id, 'innings': innings_cards}
+
+def get_scorecard(match):
+    """The match's scorecard, cached until its deliveries change."""
+    key = _cache_key(match.id)
+    card = cache.get(key)
+    if card is None:
+        card = build_scorecard(match)
+        if card is None:
+            return None
+        cache.set(key, card, timeout=current_app.config['SCORECARD_CACHE_TIMEOUT'])
+    return card
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_scorecards(session):
+    changed = session.info.pop('changed_scorecards', None)
+    if changed and has_app_context():
+        cache.delete_many(*[_cache_key(match_id) for match_id in changed])
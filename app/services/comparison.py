@@ -0,0 +1,129 @@
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.services.player_timeline import balls_expression
+
+PLAYER_METRICS = ('matches', 'runs', 'batting_avg', 'strike_rate', 'wickets', 'bowling_avg', 'economy')
+TEAM_METRICS = ('matches', 'wins', 'losses', 'win_percentage', 'avg_score', 'avg_conceded', 'avg_wickets_taken')
+LOWER_IS_BETTER = frozenset(('bowling_avg', 'economy', 'losses', 'avg_conceded'))
+
+def parse_ids(values):
+    """Ids from query args given as repeated values and/or comma separated,
+    in order and without duplicates. Raises ValueError on anything else."""
+    ids = []
+    for value in values:
+        for part in value.split(','):
+            part = part.strip()
+            if part:
+                entity_id = int(part)
+                if entity_id not in ids:
+                    ids.append(entity_id)
+    return ids
+
+def _ratio(numerator, denominator, scale=1):
+    return round(numerator * scale / denominator, 2) if denominator else 0
+
+def _normalize(metric, values):
+    """Scale a metric to 0-1 across the compared entities, 1 being the best,
+    so metrics with different units share one radar chart."""
+    if metric in LOWER_IS_BETTER:
+        # Zero means "did not bowl" or "no matches" here, not a perfect figure
+        best = min((value for value in values if value > 0), default=0)
+        return [round(best / value, 3) if value > 0 else 0 for value in values]
+    best = max(values, default=0)
+    return [round(value / best, 3) if best > 0 else 0 for value in values]
+
+def _aligned(kind, ids, entities, stats, metrics, season):
+    found = [entity_id for entity_id in ids if entity_id in entities]
+    values = {metric: [stats[entity_id][metric] for entity_id in found] for metric in metrics}
+    return {
+        'kind': kind,
+        'season': season,
+        'metrics': list(metrics),
+        'lower_is_better': [metric for metric in metrics if metric in LOWER_IS_BETTER],
+        'entities': [entities[entity_id] for entity_id in found],
+        'labels': [entities[entity_id]['name'] for entity_id in found],
+        'values': values,
+        'normalized': {metric: _normalize(metric, values[metric]) for metric in metrics},
+        'missing': [entity_id for entity_id in ids if entity_id not in entities]
+    }
+
+def compare_players(ids, season=None):
+    """Career (or ``season``) figures for every player in ``ids``, as one
+    vector per metric aligned with ``entities``; one grouped query."""
+    pp = PlayerPerformance
+    totals = (db.session.query(pp.player_id.label('player_id'),
+                               db.func.count(pp.id).label('matches'),
+                               db.func.sum(pp.runs_scored).label('runs'),
+                               db.func.sum(pp.balls_faced).label('balls'),
+                               db.func.sum(db.case((pp.balls_faced > 0, 1), else_=0)).label('innings'),
+                               db.func.sum(pp.wickets_taken).label('wickets'),
+                               db.func.sum(pp.runs_conceded).label('conceded'),
+                               db.func.sum(balls_expression(pp.overs_bowled)).label('balls_bowled'))
+              .filter(pp.player_id.in_(ids))
+              .group_by(pp.player_id))
+    if season:
+        totals = totals.join(Match, pp.match_id == Match.id).filter(Match.season == season)
+    totals = totals.subquery()
+    
+    rows = (db.session.query(Player.id, Player.name, Player.role, Team.name,
+                             totals.c.matches, totals.c.runs, totals.c.balls, totals.c.innings,
+                             totals.c.wickets, totals.c.conceded, totals.c.balls_bowled)
+            .outerjoin(Team, Player.team_id == Team.id)
+            .outerjoin(totals, totals.c.player_id == Player.id)
+            .filter(Player.id.in_(ids))
+            .all())
+    
+    entities, stats = {}, {}
+    for player_id, name, role, team_name, matches, runs, balls, innings, wickets, conceded, balls_bowled in rows:
+        runs, wickets, conceded = int(runs or 0), int(wickets or 0), int(conceded or 0)
+        entities[player_id] = {'id': player_id, 'name': name, 'role': role, 'team': team_name or 'Free Agent'}
+        stats[player_id] = {
+            'matches': matches or 0,
+            'runs': runs,
+            'batting_avg': _ratio(runs, innings),
+            'strike_rate': _ratio(runs, balls, 100),
+            'wickets': wickets,
+            'bowling_avg': _ratio(conceded, wickets),
+            'economy': _ratio(conceded, balls_bowled, 6)
+        }
+    return _aligned('players', ids, entities, stats, PLAYER_METRICS, season)
+
+def compare_teams(ids, season=None):
+    """Record and scoring figures for every team in ``ids``, aligned like
+    compare_players; one grouped query over the teams' fixtures."""
+    is_team1 = Match.team1_id == Team.id
+    opponent = aliased(Team)
+    fixtures = (Match.team1_id == Team.id) | (Match.team2_id == Team.id)
+    if season:
+        fixtures = db.and_(fixtures, Match.season == season)
+    
+    # Winners are read from results like "<team name> won by 5 wickets", as Match.winner does
+    rows = (db.session.query(Team.id, Team.name, Team.short_name,
+                             db.func.count(Match.id),
+                             db.func.sum(db.case((Match.result.like(Team.name + ' won%'), 1), else_=0)),
+                             db.func.sum(db.case((Match.result.like(opponent.name + ' won%'), 1), else_=0)),
+                             db.func.sum(db.case((is_team1, Match.team1_score), else_=Match.team2_score)),
+                             db.func.sum(db.case((is_team1, Match.team2_score), else_=Match.team1_score)),
+                             db.func.sum(db.case((is_team1, Match.team2_wickets), else_=Match.team1_wickets)))
+            .outerjoin(Match, fixtures)
+            .outerjoin(opponent, opponent.id == db.case((is_team1, Match.team2_id), else_=Match.team1_id))
+            .filter(Team.id.in_(ids))
+            .group_by(Team.id, Team.name, Team.short_name)
+            .all())
+    
+    entities, stats = {}, {}
+    for team_id, name, short_name, matches, wins, losses, scored, conceded, wickets in rows:
+        wins, losses = int(wins or 0), int(losses or 0)
+        entities[team_id] = {'id': team_id, 'name': name, 'short_name': short_name}
+        stats[team_id] = {
+            'matches': matches,
+            'wins': wins,
+            'losses': losses,
+            'win_percentage': _ratio(wins, matches, 100),
+            'avg_score': _ratio(scored or 0, matches),
+            'avg_conceded': _ratio(conceded or 0, matches),
+            'avg_wickets_taken': _ratio(wickets or 0, matches)
+        }
+    return _aligned('teams', ids, entities, stats, TEAM_METRICS, season)
@@ -0,0 +1,273 @@
+import threading
+from datetime import datetime
+from itertools import chain, repeat
+import numpy as np
+from flask import current_app
+from app.extensions import db
+from app.models.match import Match, PlayerPerformance
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.fantasy import FantasyContest, FantasyEntry, FantasyPlayerPoints, FantasyTeamPoints
+
+# Entries updated per executemany while applying a match
+UPDATE_CHUNK = 50000
+
+class FantasyError(Exception):
+    """Raised when a match cannot be scored or a contest entry is rejected."""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def player_points(performance, rules):
+    """Fantasy points for one PlayerPerformance under ``rules`` (FANTASY_POINTS)."""
+    runs = performance.runs_scored or 0
+    wickets = performance.wickets_taken or 0
+    points = (rules['played'] + runs * rules['run'] + (performance.fours or 0) * rules['four'] +
+              (performance.sixes or 0) * rules['six'] + wickets * rules['wicket'] +
+              (performance.catches or 0) * rules['catch'] + (performance.stumpings or 0) * rules['stumping'] +
+              (performance.run_outs or 0) * rules['run_out'])
+    if runs >= 100:
+        points += rules['century']
+    elif runs >= 50:
+        points += rules['half_century']
+    if wickets >= 5:
+        points += rules['five_wickets']
+    elif wickets >= 3:
+        points += rules['three_wickets']
+    return points
+
+def _team_changes(changes, added_before=None):
+    """(user team ids, points change of each) for every squad holding a
+    player in ``changes`` ({player_id: change}), counting only players
+    added before ``added_before`` when it is given.
+    
+    This is the squad membership matrix times the per-player change: the
+    (team, player) pairs of those players are read through the player_id
+    index and summed per team with one bincount, so the cost follows the
+    squads involved rather than a query per team.
+    """
+    players = np.array(sorted(changes), dtype=np.int64)
+    weights = np.array([changes[player_id] for player_id in players.tolist()], dtype=np.int64)
+    query = (db.select(UserTeamPlayer.user_team_id, UserTeamPlayer.player_id)
+             .where(UserTeamPlayer.player_id.in_(players.tolist())))
+    if added_before is not None:
+        query = query.where(UserTeamPlayer.added_at <= added_before)
+    result = db.session.connection().execute(query)
+    rows = result.cursor.fetchall()
+    result.close()
+    pairs = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 2).reshape(-1, 2)
+    
+    teams, column = np.unique(pairs[:, 0], return_inverse=True)
+    totals = np.bincount(column, weights=weights[np.searchsorted(players, pairs[:, 1])],
+                         minlength=len(teams)).astype(np.int64)
+    changed = totals != 0
+    return teams[changed], totals[changed]
+
+def _record_team_points(connection, mark, match_id, teams, totals):
+    """Add each team's change to its points for the match."""
+    table = FantasyTeamPoints.__tablename__
+    existing = {team_id for team_id, in connection.execute(
+        db.select(FantasyTeamPoints.user_team_id).where(FantasyTeamPoints.match_id == match_id))}
+    updates, inserts = [], []
+    for team_id, change in zip(teams.tolist(), totals.tolist()):
+        if team_id in existing:
+            updates.append((change, match_id, team_id))
+        else:
+            inserts.append((team_id, match_id, change))
+    for statement, rows in ((f'UPDATE {table} SET points = points + {mark} '
+                             f'WHERE match_id = {mark} AND user_team_id = {mark}', updates),
+                            (f'INSERT INTO {table} (user_team_id, match_id, points) '
+                             f'VALUES ({mark}, {mark}, {mark})', inserts)):
+        for start in range(0, len(rows), UPDATE_CHUNK):
+            connection.exec_driver_sql(statement, rows[start:start + UPDATE_CHUNK])
+
+def score_match(match):
+    """Work out every player's points for ``match`` once, from their
+    performances, then add each user team's share to its entries in the
+    contests the match counts for.
+    
+    Rescoring a match applies only the difference from the stored points,
+    so it can be run again after a correction. Squads are not recorded:
+    the difference goes to the squads that held each player when the match
+    was first scored and still hold them. Each team's share is also added
+    to its FantasyTeamPoints row for the match, which team summaries read,
+    so they agree with the entries. The caller commits. Returns (players
+    scored, user teams whose points changed).
+    """
+    if match.match_type == 'replay':
+        raise FantasyError('Replayed matches are not scored')
+    rules = current_app.config['FANTASY_POINTS']
+    scored = {performance.player_id: player_points(performance, rules)
+              for performance in PlayerPerformance.query.filter_by(match_id=match.id)}
+    if not scored:
+        raise FantasyError('No performances recorded for this match')
+    
+    stored = {row.player_id: row for row in FantasyPlayerPoints.query.filter_by(match_id=match.id)}
+    scored_at = min((row.scored_at for row in stored.values()), default=datetime.utcnow())
+    changes = {}
+    for player_id in set(scored) | set(stored):
+        row = stored.get(player_id)
+        change = scored.get(player_id, 0) - (row.points if row else 0)
+        if change:
+            changes[player_id] = change
+        if player_id not in scored:
+            db.session.delete(row)
+        elif row is None:
+            db.session.add(FantasyPlayerPoints(match_id=match.id, player_id=player_id,
+                                               points=scored[player_id], scored_at=scored_at))
+        else:
+            row.points = scored[player_id]
+    db.session.flush()
+    
+    if not changes:
+        return len(scored), 0
+    
+    # Players added to a squad since the match was first scored never earned it points
+    teams, totals = _team_changes(changes, scored_at if stored else None)
+    connection = db.session.connection()
+    # A plain DBAPI executemany: per-row parameter processing would cost
+    # more than the updates themselves. sqlite3 takes ?, MySQL drivers %s.
+    mark = '?' if connection.dialect.paramstyle == 'qmark' else '%s'
+    _record_team_points(connection, mark, match.id, teams, totals)
+    
+    contest_ids = [contest_id for contest_id, in db.session.query(FantasyContest.id).filter(
+        db.or_(FantasyContest.season.is_(None), FantasyContest.season == match.season))]
+    if not contest_ids:
+        return len(scored), len(teams)
+    
+    update = (f'UPDATE {FantasyEntry.__tablename__} SET points = points + {mark} '
+              f'WHERE contest_id = {mark} AND user_team_id = {mark}')
+    for contest_id in contest_ids:
+        contest_teams, contest_totals = teams, totals
+        if stored:
+            # Entries that joined after the match was first scored never had its points
+            late = [team_id for team_id, in db.session.query(FantasyEntry.user_team_id)
+                    .filter(FantasyEntry.contest_id == contest_id, FantasyEntry.joined_at > scored_at)]
+            if late:
+                keep = ~np.isin(teams, late)
+                contest_teams, contest_totals = teams[keep], totals[keep]
+        rows = list(zip(contest_totals.tolist(), repeat(contest_id), contest_teams.tolist()))
+        for start in range(0, len(rows), UPDATE_CHUNK):
+            connection.exec_driver_sql(update, rows[start:start + UPDATE_CHUNK])
+    db.session.query(FantasyContest).filter(FantasyContest.id.in_(contest_ids)).update(
+        {FantasyContest.version: FantasyContest.version + 1}, synchronize_session=False)
+    return len(scored), len(teams)
+
+def remove_team(team):
+    """Drop ``team``'s contest entries and match points before it is
+    deleted; its contests' leaderboards reload without it."""
+    contest_ids = [contest_id for contest_id, in
+                   db.session.query(FantasyEntry.contest_id).filter(FantasyEntry.user_team_id == team.id)]
+    FantasyEntry.query.filter_by(user_team_id=team.id).delete(synchronize_session=False)
+    FantasyTeamPoints.query.filter_by(user_team_id=team.id).delete(synchronize_session=False)
+    if contest_ids:
+        db.session.query(FantasyContest).filter(FantasyContest.id.in_(contest_ids)).update(
+            {FantasyContest.version: FantasyContest.version + 1}, synchronize_session=False)
+
+def join_contest(contest, team):
+    """Enter ``team`` into ``contest``; it scores the matches scored from now on."""
+    if FantasyEntry.query.filter_by(contest_id=contest.id, user_team_id=team.id).first():
+        raise FantasyError('This team is already in the contest', 409)
+    entry = FantasyEntry(contest_id=contest.id, user_team_id=team.id, points=0, joined_at=datetime.utcnow())
+    db.session.add(entry)
+    return entry
+
+class Leaderboard:
+    """A contest's entries sorted best first, as arrays. A rank is one binary
+    search: 1 + the number of entries with more points, so ties share it."""
+    
+    __slots__ = ('version', 'user_team_ids', 'points', 'negated')
+    
+    def __init__(self, version, user_team_ids, points):
+        self.version = version
+        self.user_team_ids = user_team_ids
+        self.points = points
+        self.negated = -points
+    
+    def __len__(self):
+        return len(self.points)
+    
+    def rank(self, points):
+        return int(np.searchsorted(self.negated, -points, side='left')) + 1
+    
+    def page(self, offset, limit):
+        """(user team ids, points, ranks) of the entries in [offset, offset + limit)."""
+        points = self.points[offset:offset + limit]
+        ranks = np.searchsorted(self.negated, -points, side='left') + 1
+        return self.user_team_ids[offset:offset + limit].tolist(), points.tolist(), ranks.tolist()
+
+def _load_leaderboard(contest):
+    query = (db.select(FantasyEntry.user_team_id, FantasyEntry.points)
+             .where(FantasyEntry.contest_id == contest.id))
+    result = db.session.connection().execute(query)
+    rows = result.cursor.fetchall()
+    result.close()
+    entries = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 2).reshape(-1, 2)
+    # Most points first, then the lower team id
+    order = np.lexsort((entries[:, 0], -entries[:, 1]))
+    return Leaderboard(contest.version, entries[order, 0], entries[order, 1])
+
+class LeaderboardStore:
+    """Per-process leaderboards, reloaded when a scored match bumps the
+    contest's version.
+    
+    Entries that joined since then are not listed yet. Their ranks are still
+    exact, because an entry joins with no points and so outranks nobody.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boards = {}
+    
+    def get(self, contest):
+        board = self.boards.get(contest.id)
+        if board is None or board.version != contest.version:
+            with self.lock:
+                board = self.boards.get(contest.id)
+                if board is None or board.version != contest.version:
+                    board = self.boards[contest.id] = _load_leaderboard(contest)
+        return board
+
+def get_leaderboard(contest):
+    store = current_app.extensions.get('fantasy_leaderboards')
+    if store is None:
+        store = current_app.extensions.setdefault('fantasy_leaderboards', LeaderboardStore())
+    return store.get(contest)
+
+def contest_standing(contest, user_team_id):
+    """{'points', 'rank', 'entries'} of a team in a contest, or None if it has not joined."""
+    points = (db.session.query(FantasyEntry.points)
+              .filter_by(contest_id=contest.id, user_team_id=user_team_id)
+              .scalar())
+    if points is None:
+        return None
+    board = get_leaderboard(contest)
+    return {'points': points, 'rank': board.rank(points), 'entries': len(board)}
+
+def team_fantasy_summary(team, recent=5):
+    """A user team's points per scored match, as credited to it by
+    score_match, and its standing in each contest it has joined."""
+    match_points = dict(db.session.query(FantasyTeamPoints.match_id, FantasyTeamPoints.points)
+                        .filter(FantasyTeamPoints.user_team_id == team.id))
+    recent_matches = (Match.query.filter(Match.id.in_(match_points))
+                      .order_by(Match.match_date.desc())
+                      .limit(recent)
+                      .all()) if match_points else []
+    
+    contests = []
+    for entry in FantasyEntry.query.filter_by(user_team_id=team.id).all():
+        board = get_leaderboard(entry.contest)
+        contests.append({'contest': entry.contest, 'points': entry.points,
+                         'rank': board.rank(entry.points), 'entries': len(board)})
+    return {
+        'total_points': sum(match_points.values()),
+        'scored_matches': len(match_points),
+        'best_match': max(match_points.values(), default=0),
+        'match_points': match_points,
+        'recent_matches': recent_matches,
+        'contests': contests
+    }
+
+def team_names(user_team_ids):
+    return dict(db.session.query(UserTeam.id, UserTeam.name).filter(UserTeam.id.in_(user_team_ids)))
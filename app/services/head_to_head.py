@@ -0,0 +1,188 @@
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.team import Team
+from app.models.match import Match, TeamHeadToHead
+
+ALL_SEASONS = TeamHeadToHead.ALL_SEASONS
+RECENT_RESULTS = 5
+
+def _pair(team1_id, team2_id):
+    return min(team1_id, team2_id), max(team1_id, team2_id)
+
+def _new_row(season, team_a_id, team_b_id):
+    return TeamHeadToHead(season=season, team_a_id=team_a_id, team_b_id=team_b_id,
+                          played=0, team_a_wins=0, team_b_wins=0, no_results=0,
+                          scored_matches=0, team_a_runs=0, team_b_runs=0, recent_results='')
+
+def _outcome(result, team_a_name, team_b_name):
+    # Match.winner reads the winner from a result like "<team name> won by 5 wickets"
+    if result and result.startswith(f'{team_a_name} won'):
+        return 'A'
+    if result and result.startswith(f'{team_b_name} won'):
+        return 'B'
+    return 'N'
+
+def _apply(row, outcome, team_a_score, team_b_score, match_date):
+    """Fold one completed match into a head-to-head row."""
+    row.played += 1
+    if outcome == 'A':
+        row.team_a_wins += 1
+    elif outcome == 'B':
+        row.team_b_wins += 1
+    else:
+        row.no_results += 1
+    if team_a_score is not None and team_b_score is not None:
+        row.scored_matches += 1
+        row.team_a_runs += team_a_score
+        row.team_b_runs += team_b_score
+    row.recent_results = (row.recent_results + outcome)[-RECENT_RESULTS:]
+    if row.last_match_date is None or match_date > row.last_match_date:
+        row.last_match_date = match_date
+
+def _fold(matches, names, rows):
+    """Fold completed matches, oldest first, into ``rows`` keyed by
+    (season, team_a_id, team_b_id), creating the missing ones."""
+    folded = 0
+    for season, match_date, team1_id, team2_id, team1_score, team2_score, result in matches:
+        team_a_id, team_b_id = _pair(team1_id, team2_id)
+        if team1_id == team_a_id:
+            team_a_score, team_b_score = team1_score, team2_score
+        else:
+            team_a_score, team_b_score = team2_score, team1_score
+        outcome = _outcome(result, names.get(team_a_id), names.get(team_b_id))
+        for key in ((season, team_a_id, team_b_id), (ALL_SEASONS, team_a_id, team_b_id)):
+            if key not in rows:
+                rows[key] = _new_row(*key)
+            _apply(rows[key], outcome, team_a_score, team_b_score, match_date)
+        folded += 1
+    return folded
+
+def _completed_matches():
+    return (db.session.query(Match.season, Match.match_date, Match.team1_id, Match.team2_id,
+                             Match.team1_score, Match.team2_score, Match.result)
+            .filter(Match.result.isnot(None))
+            .order_by(Match.match_date, Match.id))
+
+def rebuild_head_to_head():
+    """Recount every pair from the completed matches, in one pass over them.
+    Used to backfill the table and after bulk imports."""
+    names = dict(db.session.query(Team.id, Team.name))
+    rows = {}
+    folded = _fold(_completed_matches().yield_per(1000), names, rows)
+    TeamHeadToHead.query.delete()
+    db.session.add_all(rows.values())
+    db.session.flush()
+    return folded
+
+def _rebuild_pair(team_a_id, team_b_id):
+    names = dict(db.session.query(Team.id, Team.name).filter(Team.id.in_((team_a_id, team_b_id))))
+    matches = _completed_matches().filter(((Match.team1_id == team_a_id) & (Match.team2_id == team_b_id)) |
+                                          ((Match.team1_id == team_b_id) & (Match.team2_id == team_a_id)))
+    rows = {}
+    _fold(matches, names, rows)
+    TeamHeadToHead.query.filter_by(team_a_id=team_a_id, team_b_id=team_b_id).delete()
+    db.session.add_all(rows.values())
+
+def _locked_rows(seasons, team_a_id, team_b_id):
+    """The pair's rows for ``seasons``, locked for update and created if missing."""
+    query = (TeamHeadToHead.query
+             .filter(TeamHeadToHead.season.in_(seasons),
+                     TeamHeadToHead.team_a_id == team_a_id,
+                     TeamHeadToHead.team_b_id == team_b_id)
+             .with_for_update())
+    rows = {row.season: row for row in query}
+    for season in seasons:
+        if season in rows:
+            continue
+        try:
+            with db.session.begin_nested():
+                rows[season] = _new_row(season, team_a_id, team_b_id)
+                db.session.add(rows[season])
+        except IntegrityError:
+            # Another request recorded this pair's first result at the same time
+            rows[season] = query.filter(TeamHeadToHead.season == season).one()
+    return list(rows.values())
+
+def update_head_to_head(match, already_counted):
+    """Bring the head-to-head rows of the match's season and of all seasons
+    up to date with its (flushed) result.
+    
+    A first result recorded in date order only updates the two stored rows;
+    corrections and back-dated results recount the pair's own matches.
+    """
+    team_a_id, team_b_id = _pair(match.team1_id, match.team2_id)
+    rows = _locked_rows((match.season, ALL_SEASONS), team_a_id, team_b_id)
+    in_order = all(row.last_match_date is None or match.match_date >= row.last_match_date for row in rows)
+    if match.result is None or already_counted or not in_order:
+        _rebuild_pair(team_a_id, team_b_id)
+        return
+    
+    names = dict(db.session.query(Team.id, Team.name).filter(Team.id.in_((team_a_id, team_b_id))))
+    matches = [(match.season, match.match_date, match.team1_id, match.team2_id,
+                match.team1_score, match.team2_score, match.result)]
+    _fold(matches, names, {(row.season, row.team_a_id, row.team_b_id): row for row in rows})
+
+def _average(runs, matches):
+    return round(runs / matches, 2) if matches else None
+
+def head_to_head(team_id, other_team_id, season=None):
+    """The record between two teams from ``team_id``'s side, for one season
+    or all of them; a single indexed row lookup."""
+    team_a_id, team_b_id = _pair(team_id, other_team_id)
+    row = (TeamHeadToHead.query
+           .filter_by(season=season or ALL_SEASONS, team_a_id=team_a_id, team_b_id=team_b_id)
+           .first())
+    if row is None:
+        row = _new_row(season or ALL_SEASONS, team_a_id, team_b_id)
+    
+    flipped = team_id != team_a_id
+    wins, losses = (row.team_b_wins, row.team_a_wins) if flipped else (row.team_a_wins, row.team_b_wins)
+    scored, conceded = (row.team_b_runs, row.team_a_runs) if flipped else (row.team_a_runs, row.team_b_runs)
+    mine, theirs = ('B', 'A') if flipped else ('A', 'B')
+    form = {mine: 'W', theirs: 'L', 'N': '-'}
+    return {
+        'season': season,
+        'played': row.played,
+        'wins': wins,
+        'losses': losses,
+        'no_results': row.no_results,
+        'win_percentage': round(wins * 100 / row.played, 1) if row.played else 0,
+        'average_score': _average(scored, row.scored_matches),
+        'average_conceded': _average(conceded, row.scored_matches),
+        # Newest first, like the team page form guide
+        'last_results': [form[outcome] for outcome in reversed(row.recent_results)],
+        'last_match_date': row.last_match_date.isoformat() if row.last_match_date else None
+    }
+
+def head_to_head_matrix(season=None):
+    """Every team against every other for a heatmap: ``played``, ``wins`` and
+    ``win_percentage`` are square matrices aligned with ``teams``, where
+    ``wins[i][j]`` counts the wins of team i over team j. Reads the stored
+    rows only, so the cost is one query whatever the number of matches."""
+    teams = db.session.query(Team.id, Team.name, Team.short_name).order_by(Team.name).all()
+    index = {team_id: i for i, (team_id, _, _) in enumerate(teams)}
+    size = len(teams)
+    played = [[0] * size for _ in range(size)]
+    wins = [[0] * size for _ in range(size)]
+    no_results = [[0] * size for _ in range(size)]
+    
+    rows = (db.session.query(TeamHeadToHead.team_a_id, TeamHeadToHead.team_b_id, TeamHeadToHead.played,
+                             TeamHeadToHead.team_a_wins, TeamHeadToHead.team_b_wins, TeamHeadToHead.no_results)
+            .filter(TeamHeadToHead.season == (season or ALL_SEASONS)))
+    for team_a_id, team_b_id, pair_played, team_a_wins, team_b_wins, pair_no_results in rows:
+        if team_a_id not in index or team_b_id not in index:
+            continue
+        i, j = index[team_a_id], index[team_b_id]
+        played[i][j] = played[j][i] = pair_played
+        no_results[i][j] = no_results[j][i] = pair_no_results
+        wins[i][j], wins[j][i] = team_a_wins, team_b_wins
+    
+    return {
+        'season': season,
+        'teams': [{'id': team_id, 'name': name, 'short_name': short_name} for team_id, name, short_name in teams],
+        'played': played,
+        'wins': wins,
+        'no_results': no_results,
+        'win_percentage': [[round(wins[i][j] * 100 / played[i][j], 1) if played[i][j] else None
+                            for j in range(size)] for i in range(size)]
+    }
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, aliased
+from app.extensions import db, cache
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.services.player_timeline import balls_expression
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'homepage_snapshot'
+# Time of the last commit that touched homepage data
+CHANGED_KEY = 'homepage_snapshot:changed'
+REFRESH_LOCK_KEY = 'homepage_snapshot:refreshing'
+LEADERS = 5
+
+def get_homepage_snapshot():
+    """The last built homepage data, or None before the first build.
+    
+    Never aggregates inline: a missing or stale snapshot schedules a
+    background refresh and callers keep getting the copy already cached.
+    """
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None or _is_stale(snapshot):
+        schedule_refresh()
+    return snapshot
+
+def _is_stale(snapshot):
+    if time.time() - snapshot['built_at'] >= current_app.config['HOMEPAGE_REFRESH_SECONDS']:
+        return True
+    changed_at = cache.get(CHANGED_KEY)
+    return changed_at is not None and changed_at > snapshot['built_at']
+
+def schedule_refresh():
+    """Start a background rebuild unless one is already running. The lock is
+    taken with cache.add, so with a shared cache only one worker rebuilds;
+    it expires after HOMEPAGE_REFRESH_TIMEOUT in case that worker dies."""
+    app = current_app._get_current_object()
+    if not cache.add(REFRESH_LOCK_KEY, True, timeout=app.config['HOMEPAGE_REFRESH_TIMEOUT']):
+        return False
+    threading.Thread(target=_refresh, args=(app,), name='homepage-refresh', daemon=True).start()
+    return True
+
+def _refresh(app):
+    with app.app_context():
+        try:
+            # Never expires: it is replaced, not evicted, so there is no
+            # moment when every request finds the cache empty
+            cache.set(SNAPSHOT_KEY, build_homepage_snapshot(), timeout=0)
+        except Exception:
+            logger.exception('Homepage snapshot refresh failed; serving the previous one')
+        finally:
+            cache.delete(REFRESH_LOCK_KEY)
+
+def build_homepage_snapshot():
+    # Taken before reading so a commit made during the build marks it stale
+    built_at = time.time()
+    pp = PlayerPerformance
+    
+    batsmen = (db.session.query(Player.id, Player.name, Team.name,
+                                db.func.sum(pp.runs_scored).label('runs'),
+                                db.func.sum(pp.balls_faced),
+                                db.func.sum(db.case((pp.balls_faced > 0, 1), else_=0)))
+               .join(pp, pp.player_id == Player.id)
+               .outerjoin(Team, Player.team_id == Team.id)
+               .group_by(Player.id, Player.name, Team.name)
+               .order_by(db.desc('runs'), Player.id)
+               .limit(LEADERS)
+               .all())
+    
+    bowlers = (db.session.query(Player.id, Player.name, Team.name,
+                                db.func.sum(pp.wickets_taken).label('wickets'),
+                                db.func.sum(pp.runs_conceded),
+                                db.func.sum(balls_expression(pp.overs_bowled)))
+               .join(pp, pp.player_id == Player.id)
+               .outerjoin(Team, Player.team_id == Team.id)
+               .group_by(Player.id, Player.name, Team.name)
+               .order_by(db.desc('wickets'), Player.id)
+               .limit(LEADERS)
+               .all())
+    
+    # Wins are read from results like "<team name> won by 5 wickets", as Match.winner does
+    teams = (db.session.query(Team.id, Team.name, Team.short_name,
+                              db.func.count(Match.id),
+                              db.func.sum(db.case((Match.result.like(Team.name + ' won%'), 1), else_=0)).label('wins'))
+             .outerjoin(Match, (Match.team1_id == Team.id) | (Match.team2_id == Team.id))
+             .group_by(Team.id, Team.name, Team.short_name)
+             .order_by(db.desc('wins'), Team.name)
+             .limit(LEADERS)
+             .all())
+    
+    team1, team2 = aliased(Team), aliased(Team)
+    recent = (db.session.query(Match.id, Match.match_date, Match.venue, Match.result, team1.name, team2.name)
+              .join(team1, Match.team1_id == team1.id)
+              .join(team2, Match.team2_id == team2.id)
+              .order_by(Match.match_date.desc())
+              .limit(LEADERS)
+              .all())
+    
+    return {
+        'built_at': built_at,
+        'top_batsmen': [{
+            'id': player_id,
+            'name': name,
+            'team': team_name,
+            'total_runs': int(runs or 0),
+            'batting_average': round(runs / innings, 2) if innings else 0,
+            'strike_rate': round(runs * 100 / balls, 2) if balls else 0
+        } for player_id, name, team_name, runs, balls, innings in batsmen],
+        'top_bowlers': [{
+            'id': player_id,
+            'name': name,
+            'team': team_name,
+            'total_wickets': int(wickets or 0),
+            'bowling_average': round(conceded / wickets, 2) if wickets else 0,
+            'economy_rate': round(conceded * 6 / balls, 2) if balls else 0
+        } for player_id, name, team_name, wickets, conceded, balls in bowlers],
+        'top_teams': [{
+            'id': team_id,
+            'name': name,
+            'short_name': short_name,
+            'total_matches': matches,
+            'wins': int(wins or 0),
+            'win_percentage': round(wins * 100 / matches, 1) if matches else 0
+        } for team_id, name, short_name, matches, wins in teams],
+        # Shaped like Match so templates read match.team1.name
+        'recent_matches': [{
+            'id': match_id,
+            'match_date': match_date,
+            'venue': venue,
+            'result': result,
+            'team1': {'name': team1_name},
+            'team2': {'name': team2_name}
+        } for match_id, match_date, venue, result, team1_name, team2_name in recent]
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _collect_homepage_changes(session, flush_context):
+    if not session.info.get('homepage_changed'):
+        session.info['homepage_changed'] = any(
+            isinstance(instance, (Match, PlayerPerformance, Player, Team))
+            for instance in list(session.new) + list(session.dirty) + list(session.deleted))
+
+def mark_homepage_stale():
+    """Have the next request rebuild the snapshot. Called after commits that
+    change homepage data, including bulk writes the ORM hooks do not see."""
+    cache.set(CHANGED_KEY, time.time(), timeout=0)
+
+@event.listens_for(Session, 'after_commit')
+def _mark_homepage_stale(session):
+    if session.info.pop('homepage_changed', False) and has_app_context():
+        mark_homepage_stale()
@@ -0,0 +1,371 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.match import Match, PlayerPerformance
+from app.models.delivery import (Delivery, WIDE, NOBALL, CAUGHT, STUMPED, RUN_OUT, CAUGHT_AND_BOWLED,
+                                 RETIRED_HURT, BOWLER_WICKETS)
+from app.services.ball_by_ball import FIELDS, append_deliveries
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('runs_scored', 'balls_faced', 'fours', 'sixes', 'overs_bowled', 'runs_conceded',
+            'wickets_taken', 'catches', 'stumpings', 'run_outs')
+
+class LiveScoringError(Exception):
+    """Raised when live deliveries are rejected."""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def _balls(overs):
+    """Balls in a cricket overs figure, where 3.4 means three overs and four balls."""
+    overs = overs or 0
+    whole = int(overs)
+    return whole * 6 + round((overs - whole) * 10)
+
+def _overs(balls):
+    return balls // 6 + balls % 6 / 10
+
+def _new_performance(match_id, player_id, team_id):
+    performance = PlayerPerformance(match_id=match_id, player_id=player_id, team_id=team_id,
+                                    strike_rate=0.0, economy_rate=0.0)
+    for counter in COUNTERS:
+        setattr(performance, counter, 0)
+    db.session.add(performance)
+    return performance
+
+def _fold(match, row, performance):
+    """Add one delivery to the match score and the players' rows, by the
+    same rules as ball_by_ball.derive, so a later rebuild agrees."""
+    innings = row['innings']
+    if innings > 2:
+        # Super overs do not count towards the match figures
+        return
+    batting, fielding = (match.team1_id, match.team2_id) if innings == 1 else (match.team2_id, match.team1_id)
+    runs, extras, extra_kind, wicket_kind = row['runs'], row['extras'], row['extra_kind'], row['wicket_kind']
+    legal = extra_kind not in (WIDE, NOBALL)
+    
+    side = f'team{innings}'
+    setattr(match, f'{side}_score', (getattr(match, f'{side}_score') or 0) + runs + extras)
+    setattr(match, f'{side}_wickets', (getattr(match, f'{side}_wickets') or 0) +
+            (wicket_kind not in (0, RETIRED_HURT)))
+    setattr(match, f'{side}_overs', _overs(_balls(getattr(match, f'{side}_overs')) + legal))
+    
+    batter = performance(row['batter_id'], batting)
+    batter.runs_scored += runs
+    batter.balls_faced += extra_kind != WIDE
+    batter.fours += runs == 4
+    batter.sixes += runs == 6
+    batter.strike_rate = round(batter.runs_scored * 100 / batter.balls_faced, 2) if batter.balls_faced else 0.0
+    
+    bowler = performance(row['bowler_id'], fielding)
+    balls = _balls(bowler.overs_bowled) + legal
+    bowler.overs_bowled = _overs(balls)
+    # Byes and leg byes are not charged to the bowler
+    bowler.runs_conceded += runs + (extras if extra_kind in (WIDE, NOBALL) else 0)
+    bowler.wickets_taken += wicket_kind in BOWLER_WICKETS
+    bowler.economy_rate = round(bowler.runs_conceded * 6 / balls, 2) if balls else 0.0
+    
+    if wicket_kind:
+        # A non-striker run out before facing still gets a row
+        performance(row['player_out_id'], batting)
+    catcher = row['bowler_id'] if wicket_kind == CAUGHT_AND_BOWLED else row['fielder_id']
+    if catcher:
+        if wicket_kind in (CAUGHT, CAUGHT_AND_BOWLED):
+            performance(catcher, fielding).catches += 1
+        elif wicket_kind == STUMPED:
+            performance(catcher, fielding).stumpings += 1
+        elif wicket_kind == RUN_OUT:
+            performance(catcher, fielding).run_outs += 1
+
+def ingest_deliveries(match_id, deliveries):
+    """Append the next ball or over of a match in play and fold each
+    delivery into the match score and the players' rows for the match.
+    
+    The match row is locked for the whole ingest, so one feed's updates
+    apply in order. The cost is one indexed read of the players' rows per
+    call, then constant work per delivery. The caller commits, after which
+    this worker's live streams are woken; the rows' ``updated_at`` carries
+    the new figures to every worker's timelines and similarity indexes at
+    their next poll, and the player_profile hooks drop the players'
+    profiles. Raises LiveScoringError.
+    """
+    match = Match.query.filter_by(id=match_id).with_for_update().first()
+    if match is None:
+        raise LiveScoringError('Match not found', 404)
+    if match.result is not None:
+        raise LiveScoringError('Match already has a result', 409)
+    try:
+        rows = append_deliveries(match, deliveries)
+    except ValueError as e:
+        raise LiveScoringError(str(e))
+    
+    players = {row[key] for row in rows for key in ('batter_id', 'bowler_id', 'player_out_id', 'fielder_id')}
+    players.discard(None)
+    performances = {performance.player_id: performance for performance in
+                    PlayerPerformance.query.filter(PlayerPerformance.match_id == match.id,
+                                                   PlayerPerformance.player_id.in_(players))}
+    
+    def performance(player_id, team_id):
+        if player_id not in performances:
+            performances[player_id] = _new_performance(match.id, player_id, team_id)
+        return performances[player_id]
+    
+    for row in rows:
+        _fold(match, row, performance)
+    db.session.info.setdefault('live_matches', set()).add(match.id)
+    return match, len(rows)
+
+def live_score(match):
+    """[runs, wickets, overs] of each side, None before they bat."""
+    return {f'team{side}': ([getattr(match, f'team{side}_score'), getattr(match, f'team{side}_wickets'),
+                             getattr(match, f'team{side}_overs')]
+                            if getattr(match, f'team{side}_score') is not None else None)
+            for side in (1, 2)}
+
+class LiveMatch:
+    """A followed match: its running score per innings and the recent
+    deliveries as ready-to-send events."""
+    
+    def __init__(self, match_id, last_id, innings, result, buffer):
+        self.match_id = match_id
+        self.last_id = last_id
+        self.innings = innings
+        self.result = result
+        self.events = deque(maxlen=buffer)
+        # Id of the newest event that fell out of the buffer
+        self.dropped_id = 0
+        self.subscribers = 0
+    
+    def apply(self, delivery_id, values):
+        """Fold one delivery (in FIELDS order) into the score and queue its event."""
+        innings, runs, extras, extra_kind, wicket_kind = values[0], values[5], values[6], values[7], values[8]
+        score = self.innings.setdefault(innings, [0, 0, 0])
+        score[0] += runs + extras
+        score[1] += wicket_kind not in (0, RETIRED_HURT)
+        score[2] += extra_kind not in (WIDE, NOBALL)
+        
+        # Compact: the delivery as posted, then the innings score after it
+        payload = json.dumps({'d': list(values), 's': [score[0], score[1], _overs(score[2])]},
+                             separators=(',', ':'))
+        if len(self.events) == self.events.maxlen:
+            self.dropped_id = self.events[0][0]
+        self.events.append((delivery_id, payload))
+        self.last_id = delivery_id
+    
+    def snapshot(self):
+        return json.dumps({'match_id': self.match_id, 'result': self.result,
+                           'innings': {innings: [runs, wickets, _overs(balls)]
+                                       for innings, (runs, wickets, balls) in sorted(self.innings.items())}},
+                          separators=(',', ':'))
+
+class LiveHub:
+    """Per-process fan-out of live deliveries to streaming clients.
+    
+    While anyone is subscribed, a poller thread reads the deliveries past
+    each followed match's last seen id, so balls ingested by any worker
+    reach this worker's clients within ``poll_seconds``; an ingest in this
+    worker wakes it at once. Each delivery is folded once per process,
+    however many clients follow the match.
+    """
+    
+    def __init__(self, app, poll_seconds=1, buffer=300):
+        self.app = app
+        self.poll_seconds = poll_seconds
+        self.buffer = buffer
+        self.condition = threading.Condition()
+        self.wake = threading.Event()
+        self.matches = {}
+        self.thread = None
+    
+    def _load(self, match_id):
+        """A LiveMatch with the score so far, from one grouped query."""
+        counted = Delivery.innings <= 2
+        rows = (db.session.query(Delivery.innings,
+                                 db.func.sum(Delivery.runs + Delivery.extras),
+                                 db.func.sum(db.case(((Delivery.wicket_kind > 0) &
+                                                      (Delivery.wicket_kind != RETIRED_HURT), 1), else_=0)),
+                                 db.func.sum(db.case((Delivery.extra_kind.in_((WIDE, NOBALL)), 0), else_=1)),
+                                 db.func.max(Delivery.id))
+                .filter(Delivery.match_id == match_id, counted)
+                .group_by(Delivery.innings))
+        innings, last_id = {}, 0
+        for number, runs, wickets, balls, max_id in rows:
+            innings[number] = [int(runs), int(wickets), int(balls)]
+            last_id = max(last_id, max_id)
+        # Super over deliveries are not in the score but must not be replayed either
+        last_id = max(last_id, db.session.query(db.func.max(Delivery.id))
+                      .filter(Delivery.match_id == match_id).scalar() or 0)
+        result = db.session.query(Match.result).filter(Match.id == match_id).scalar()
+        return LiveMatch(match_id, last_id, innings, result, self.buffer)
+    
+    def subscribe(self, match_id):
+        live = self.matches.get(match_id)
+        loaded = self._load(match_id) if live is None else None
+        with self.condition:
+            live = self.matches.setdefault(match_id, loaded) if loaded else self.matches[match_id]
+            live.subscribers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='live-hub', daemon=True)
+                self.thread.start()
+        return live
+    
+    def unsubscribe(self, live):
+        with self.condition:
+            live.subscribers -= 1
+            if live.subscribers <= 0 and self.matches.get(live.match_id) is live:
+                del self.matches[live.match_id]
+    
+    def notify(self):
+        self.wake.set()
+    
+    def wait(self, live, after_id, timeout):
+        """(events past ``after_id``, whether the client missed some and
+        needs a fresh snapshot), waiting up to ``timeout`` for one."""
+        with self.condition:
+            if not live.result and not (live.events and live.events[-1][0] > after_id):
+                self.condition.wait(timeout)
+            if after_id < live.dropped_id:
+                return [], True
+            return [(delivery_id, payload) for delivery_id, payload in live.events if delivery_id > after_id], False
+    
+    def snapshot(self, live):
+        with self.condition:
+            return live.last_id, live.snapshot()
+    
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                self.wake.wait(self.poll_seconds)
+                self.wake.clear()
+                with self.condition:
+                    followed = {match_id: live.last_id for match_id, live in self.matches.items()}
+                    if not followed:
+                        self.thread = None
+                        return
+                try:
+                    self.poll(followed)
+                except Exception:
+                    logger.exception('Live poll failed; retrying')
+                finally:
+                    db.session.remove()
+    
+    def poll(self, followed):
+        """Fold the deliveries stored since ``followed`` ({match_id: last
+        id}) into their matches and wake the waiting streams."""
+        rows = (db.session.query(Delivery.id, Delivery.match_id,
+                                 *[getattr(Delivery, field) for field in FIELDS])
+                .filter(db.or_(*[(Delivery.match_id == match_id) & (Delivery.id > last_id)
+                                 for match_id, last_id in followed.items()]))
+                .order_by(Delivery.id)
+                .all())
+        results = dict(db.session.query(Match.id, Match.result).filter(Match.id.in_(followed)))
+        with self.condition:
+            for delivery_id, match_id, *values in rows:
+                live = self.matches.get(match_id)
+                if live is not None and delivery_id > live.last_id:
+                    live.apply(delivery_id, values)
+            for match_id, result in results.items():
+                if match_id in self.matches:
+                    self.matches[match_id].result = result
+            self.condition.notify_all()
+
+def get_hub():
+    hub = current_app.extensions.get('live_hub')
+    if hub is None:
+        config = current_app.config
+        hub = current_app.extensions.setdefault('live_hub', LiveHub(
+            current_app._get_current_object(),
+            poll_seconds=config['LIVE_POLL_SECONDS'],
+            buffer=config['LIVE_EVENT_BUFFER']))
+    return hub
+
+def _event(name, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    return '\n'.join(lines + [f'event: {name}', f'data: {data}']) + '\n\n'
+
+def live_events(match_id):
+    """Server-sent events for one match: a ``score`` snapshot, then a
+    ``ball`` event per delivery and a closing ``result`` event. Subscribes
+    now, so the snapshot is read inside the request."""
+    hub = get_hub()
+    live = hub.subscribe(match_id)
+    heartbeat = current_app.config['LIVE_HEARTBEAT_SECONDS']
+    
+    def generate():
+        try:
+            last_id, snapshot = hub.snapshot(live)
+            yield _event('score', snapshot, last_id)
+            while True:
+                events, missed = hub.wait(live, last_id, heartbeat)
+                if missed:
+                    last_id, snapshot = hub.snapshot(live)
+                    yield _event('score', snapshot, last_id)
+                    continue
+                for delivery_id, payload in events:
+                    yield _event('ball', payload, delivery_id)
+                    last_id = delivery_id
+                if live.result and not events:
+                    yield _event('result', json.dumps({'result': live.result}))
+                    return
+                if not events and not missed:
+                    yield ': keepalive\n\n'
+        finally:
+            hub.unsubscribe(live)
+    return generate()
+
+def replay_match(source_id, speed=60.0, per_over=False, on_update=None):
+    """Replay a recorded match's deliveries into a new match with the same
+    teams, ball by ball (or over by over), ``speed`` times faster than
+    LIVE_REPLAY_BALL_SECONDS a ball. For trying live pages locally; the
+    copy is a 'replay' match, so it stays out of the league tables.
+    Returns the new match."""
+    source = Match.get_by_id(source_id)
+    if source is None:
+        raise LiveScoringError('Match not found', 404)
+    deliveries = (db.session.query(*[getattr(Delivery, field) for field in FIELDS])
+                  .filter(Delivery.match_id == source.id)
+                  .order_by(Delivery.innings, Delivery.over, Delivery.ball)
+                  .all())
+    if not deliveries:
+        raise LiveScoringError('No ball-by-ball data for this match', 404)
+    
+    replay = Match(match_date=datetime.utcnow(), venue=source.venue, venue_id=source.venue_id,
+                   team1_id=source.team1_id, team2_id=source.team2_id, season=source.season,
+                   match_type='replay')
+    db.session.add(replay)
+    db.session.commit()
+    
+    batches = []
+    for delivery in deliveries:
+        key = (delivery[0], delivery[1]) if per_over else None
+        if batches and key is not None and batches[-1][0] == key:
+            batches[-1][1].append(list(delivery))
+        else:
+            batches.append((key, [list(delivery)]))
+    
+    ball_seconds = current_app.config['LIVE_REPLAY_BALL_SECONDS'] / speed
+    for _, batch in batches:
+        started = time.monotonic()
+        match, _ = ingest_deliveries(replay.id, batch)
+        db.session.commit()
+        if on_update:
+            on_update(match, batch)
+        time.sleep(max(0.0, ball_seconds * len(batch) - (time.monotonic() - started)))
+    return replay
+
+@event.listens_for(Session, 'after_commit')
+def _wake_live_streams(session):
+    if session.info.pop('live_matches', None) and has_app_context():
+        hub = current_app.extensions.get('live_hub')
+        if hub is not None:
+            hub.notify()
@@ -0,0 +1,32 @@
+from app.extensions import db
+from app.services.head_to_head import update_head_to_head
+from app.services.points_table import update_standings
+from app.services.venues import update_venue_stats
+
+RESULT_FIELDS = ('toss_winner_id', 'toss_decision',
+                 'team1_score', 'team1_overs', 'team1_wickets',
+                 'team2_score', 'team2_overs', 'team2_wickets', 'result')
+TOSS_DECISIONS = ('bat', 'field')
+
+def record_match_result(match, **fields):
+    """Set a match's toss, scores and result (``RESULT_FIELDS``) and update
+    the head-to-head, venue and standings rollups in the same transaction. The caller
+    commits.
+    
+    Raises ValueError for a toss winner who is not playing or an unknown
+    toss decision, before anything is changed.
+    """
+    toss_winner_id = fields.get('toss_winner_id', match.toss_winner_id)
+    if toss_winner_id is not None and toss_winner_id not in (match.team1_id, match.team2_id):
+        raise ValueError('toss_winner_id must be one of the two teams')
+    if fields.get('toss_decision') not in (None,) + TOSS_DECISIONS:
+        raise ValueError(f'toss_decision must be one of {", ".join(TOSS_DECISIONS)}')
+    
+    already_counted = match.result is not None
+    for key, value in fields.items():
+        setattr(match, key, value)
+    db.session.flush()
+    
+    update_head_to_head(match, already_counted)
+    update_venue_stats(match, already_counted)
+    update_standings(match, already_counted)
@@ -0,0 +1,109 @@
+import math
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.user_team import UserTeamPlayer
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+def _number(args, key, cast):
+    value = args.get(key, '').strip()
+    if not value:
+        return None
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValueError(f'{key} must be a number')
+    if not math.isfinite(number):
+        raise ValueError(f'{key} must be a number')
+    return number
+
+def parse_filters(args):
+    """Picker filters from query args: role, nationality and team_id match
+    exactly, min_price and max_price bound the current value and q is a
+    name prefix. Raises ValueError on a bad value."""
+    filters = {}
+    for key in ('role', 'nationality', 'q'):
+        value = args.get(key, '').strip()
+        if value:
+            filters[key] = value
+    for key, cast in (('team_id', int), ('min_price', float), ('max_price', float)):
+        value = _number(args, key, cast)
+        if value is not None:
+            filters[key] = value
+    if filters.get('min_price', -math.inf) > filters.get('max_price', math.inf):
+        raise ValueError('min_price must not be more than max_price')
+    return filters
+
+def parse_page(args):
+    """(after, limit) from query args; ``after`` is the id of the last player
+    of the previous page. Raises ValueError on a bad value."""
+    after = _number(args, 'after', int)
+    limit = _number(args, 'limit', int)
+    limit = PAGE_SIZE if limit is None else limit
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return after, limit
+
+def available_players(team_id, filters, after=None, limit=PAGE_SIZE):
+    """One page of the players that can still join user team ``team_id``,
+    by name, and the ``after`` of the next page (None on the last).
+    
+    Pages are keyed on (name, id) rather than an offset, so each one is a
+    range read of ix_players_name however deep it is. Squad members are
+    left out with a NOT EXISTS probe of unique_team_player per candidate
+    instead of loading the squad.
+    """
+    query = (Player.query.options(joinedload(Player.team))
+             .filter(~db.exists().where(db.and_(UserTeamPlayer.user_team_id == team_id,
+                                                UserTeamPlayer.player_id == Player.id))))
+    if 'role' in filters:
+        query = query.filter(Player.role == filters['role'])
+    if 'nationality' in filters:
+        query = query.filter(Player.nationality == filters['nationality'])
+    if 'team_id' in filters:
+        query = query.filter(Player.team_id == filters['team_id'])
+    if 'min_price' in filters:
+        query = query.filter(Player.current_value >= filters['min_price'])
+    if 'max_price' in filters:
+        query = query.filter(Player.current_value <= filters['max_price'])
+    if 'q' in filters:
+        prefix = filters['q'].replace('/', '//').replace('%', '/%').replace('_', '/_')
+        query = query.filter(Player.name.like(prefix + '%', escape='/'))
+    if after is not None:
+        name = db.session.query(Player.name).filter(Player.id == after).scalar()
+        if name is None:
+            raise ValueError('after must be the id of a player')
+        query = query.filter(db.or_(Player.name > name, db.and_(Player.name == name, Player.id > after)))
+    
+    players = query.order_by(Player.name, Player.id).limit(limit + 1).all()
+    if len(players) > limit:
+        players = players[:limit]
+        return players, players[-1].id
+    return players, None
+
+def filter_options():
+    """The roles, nationalities and teams to offer as filters."""
+    roles = (db.session.query(Player.role).filter(Player.role.isnot(None))
+             .distinct().order_by(Player.role))
+    nationalities = (db.session.query(Player.nationality).filter(Player.nationality.isnot(None))
+                     .distinct().order_by(Player.nationality))
+    return {
+        'roles': [role for role, in roles],
+        'nationalities': [nationality for nationality, in nationalities],
+        'teams': db.session.query(Team.id, Team.name).order_by(Team.name).all()
+    }
+
+def picker_item(player):
+    return {
+        'id': player.id,
+        'name': player.name,
+        'role': player.role,
+        'nationality': player.nationality,
+        'team': player.team.name if player.team else None,
+        'current_value': player.current_value,
+        'base_price': player.base_price,
+        'runs_scored': player.runs_scored or 0,
+        'wickets_taken': player.wickets_taken or 0
+    }
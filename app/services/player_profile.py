@@ -0,0 +1,191 @@
+from collections import OrderedDict
+from datetime import timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, aliased, joinedload
+from app.extensions import db, cache
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.models.auction import AuctionLot
+from app.services.player_timeline import get_timeline
+
+SIMILAR_PLAYERS = 5
+RECENT_PERFORMANCES = 5
+
+def _cache_key(player_id):
+    return f'player_profile:{player_id}'
+
+def get_player_profile(player_id):
+    """Everything the player page shows, or None for an unknown player.
+    
+    Profiles are plain dicts so any cache backend can hold them; they are
+    dropped when the player or one of their performances changes.
+    """
+    key = _cache_key(player_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_player_profile(player_id)
+        if profile is not None:
+            cache.set(key, profile, timeout=current_app.config['PLAYER_PROFILE_CACHE_TIMEOUT'])
+    return profile
+
+def invalidate_player_profiles(player_ids):
+    keys = [_cache_key(player_id) for player_id in set(player_ids) if player_id is not None]
+    if keys:
+        cache.delete_many(*keys)
+
+def invalidate_player_stats(player_ids):
+    """Drop what this worker derived from the performances of
+    ``player_ids``: timelines, similarity rows and profiles, for rows that
+    polling cannot see (deleted or moved). ORM writes are picked up by the
+    session hooks below; Core writers that commit themselves call this
+    afterwards."""
+    player_ids = {player_id for player_id in player_ids if player_id is not None}
+    timelines = current_app.extensions.get('player_timelines')
+    if timelines is not None:
+        timelines.invalidate(player_ids)
+    for index in list(current_app.extensions.get('player_similarity', {}).values()):
+        index.invalidate(player_ids)
+    invalidate_player_profiles(player_ids)
+
+def refresh_player_stats(player_ids):
+    """Drop the profiles of ``player_ids`` and have this worker's timelines
+    and similarity indexes poll on their next access, for rows added or
+    updated in place. The rows are folded into what is cached rather than
+    reloaded; other workers pick them up at their next poll."""
+    timelines = current_app.extensions.get('player_timelines')
+    if timelines is not None:
+        timelines.expire_poll()
+    for index in list(current_app.extensions.get('player_similarity', {}).values()):
+        index.expire_poll()
+    invalidate_player_profiles(player_ids)
+
+def mark_player_stats_changed(player_ids):
+    """Run invalidate_player_stats when the current session commits, for
+    Core writers that leave the commit to their caller."""
+    db.session.info.setdefault('changed_player_stats', set()).update(player_ids)
+
+def _average(total, count):
+    return round(total / count, 2) if count else 0
+
+def build_player_profile(player_id):
+    player = Player.query.options(joinedload(Player.team)).get(player_id)
+    if player is None:
+        return None
+    
+    timeline = get_timeline(player_id, fresh=True)
+    career = timeline.totals(0, len(timeline))
+    
+    # Monthly trend: two lookups per calendar month in the player's timeline
+    months = OrderedDict()
+    if len(timeline):
+        month = timeline.date(0).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        while month <= timeline.date(len(timeline) - 1):
+            following = (month + timedelta(days=32)).replace(day=1)
+            totals = timeline.totals(*timeline.span(month, following))
+            if totals['matches']:
+                months[month.strftime('%b %Y')] = totals
+            month = following
+    
+    team1, team2 = aliased(Team), aliased(Team)
+    recent = (db.session.query(Match.match_date, Match.venue, team1.name, team2.name,
+                               PlayerPerformance.runs_scored, PlayerPerformance.wickets_taken)
+              .join(Match, PlayerPerformance.match_id == Match.id)
+              .join(team1, Match.team1_id == team1.id)
+              .join(team2, Match.team2_id == team2.id)
+              .filter(PlayerPerformance.player_id == player_id)
+              .order_by(Match.match_date.desc())
+              .limit(RECENT_PERFORMANCES)
+              .all())
+    
+    market_value = (db.session.query(db.func.max(AuctionLot.sold_price))
+                    .filter(AuctionLot.player_id == player_id)
+                    .scalar())
+    
+    return {
+        'player': {
+            'id': player.id,
+            'name': player.name,
+            'role': player.role,
+            'nationality': player.nationality,
+            'team': {'id': player.team.id, 'name': player.team.name} if player.team else None
+        },
+        'matches': career['matches'],
+        'total_runs': career['runs'],
+        'total_wickets': career['wickets'],
+        'batting_avg': _average(career['runs'], career['matches']),
+        'bowling_avg': _average(career['wickets'], career['matches']),
+        # Oldest first, shaped like PlayerPerformance so templates read perf.match.team1.name
+        'recent_performances': [{
+            'match': {
+                'match_date': match_date,
+                'venue': venue,
+                'team1': {'name': team1_name},
+                'team2': {'name': team2_name}
+            },
+            'runs_scored': runs,
+            'wickets_taken': wickets
+        } for match_date, venue, team1_name, team2_name, runs, wickets in reversed(recent)],
+        'market_value': market_value,
+        'trend_data': {
+            'months': list(months),
+            'avg_runs': [totals['runs'] / totals['matches'] for totals in months.values()],
+            'avg_wickets': [totals['wickets'] / totals['matches'] for totals in months.values()]
+        },
+        'similar_players': similar_players(player)
+    }
+
+def similar_players(player):
+    """The nearest players in the same role by career stat profile."""
+    from app.services.player_similarity import find_similar
+    
+    try:
+        _, similar = find_similar(player.id, k=SIMILAR_PLAYERS, role=player.role)
+    except LookupError:
+        # No performances yet, so nothing to compare against
+        return []
+    
+    return [{
+        'id': row['id'],
+        'name': row['name'],
+        'role': row['role'],
+        'team': row['team'],
+        'matches': row['matches'],
+        'runs': row['runs'],
+        'wickets': row['wickets'],
+        'batting_avg': _average(row['runs'], row['matches']),
+        'bowling_avg': _average(row['wickets'], row['matches'])
+    } for row in similar]
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_players(session, flush_context):
+    changed = session.info.setdefault('changed_player_profiles', set())
+    stats = session.info.setdefault('changed_player_stats', set())
+    polled = session.info.setdefault('polled_player_stats', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, PlayerPerformance):
+            moved_from = db.inspect(instance).attrs.player_id.history.deleted
+            if instance in session.deleted or moved_from:
+                # Rows gone from a player are invisible to polling
+                stats.add(instance.player_id)
+                stats.update(moved_from)
+            else:
+                polled.add(instance.player_id)
+        elif isinstance(instance, Player):
+            changed.add(instance.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_players(session):
+    # Ids collected before a rollback are dropped here too; invalidating
+    # an unchanged profile only costs a rebuild
+    changed = session.info.pop('changed_player_profiles', None)
+    stats = session.info.pop('changed_player_stats', None)
+    polled = session.info.pop('polled_player_stats', None)
+    if not has_app_context():
+        return
+    if stats:
+        invalidate_player_stats(stats)
+    if polled:
+        refresh_player_stats(polled - (stats or set()))
+    if changed:
+        invalidate_player_profiles(changed)
@@ -0,0 +1,274 @@
+import threading
+import time
+import numpy as np
+from flask import current_app
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.services.player_timeline import CHANGE_OVERLAP, balls_expression
+
+FEATURES = ('batting_avg', 'strike_rate', 'economy', 'wickets_per_match', 'boundary_pct', 'fielding_per_match')
+METRICS = ('cosine', 'euclidean')
+
+# Columns of the per-player sums matrix
+MATCHES, RUNS, BALLS, FOURS, SIXES, WICKETS, BALLS_BOWLED, CONCEDED, FIELDING = range(9)
+
+class SimilarityState:
+    """One immutable snapshot of the vectors; refreshes build a new one."""
+    
+    def __init__(self, ids, roles, sums, max_performance_id, changed_at):
+        self.ids = ids
+        self.roles = roles
+        self.sums = sums
+        self.max_performance_id = max_performance_id
+        self.changed_at = changed_at
+        self.rows = {int(player_id): row for row, player_id in enumerate(ids)}
+        self.raw = feature_matrix(sums)
+        
+        mean = self.raw.mean(axis=0) if len(ids) else np.zeros(len(FEATURES))
+        std = self.raw.std(axis=0) if len(ids) else np.ones(len(FEATURES))
+        std[std == 0] = 1.0
+        self.vectors = (self.raw - mean) / std
+        norms = np.linalg.norm(self.vectors, axis=1)
+        norms[norms == 0] = 1.0
+        self.unit = self.vectors / norms[:, None]
+        self.squared_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+def feature_matrix(sums):
+    """Per-player features from summed stats. Undefined values (no balls
+    faced, no overs bowled) take the column mean so they sit at the centre
+    after normalization instead of looking extreme."""
+    matches = sums[:, MATCHES]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw = np.column_stack([
+            sums[:, RUNS] / matches,
+            sums[:, RUNS] * 100.0 / sums[:, BALLS],
+            sums[:, CONCEDED] * 6.0 / sums[:, BALLS_BOWLED],
+            sums[:, WICKETS] / matches,
+            (4 * sums[:, FOURS] + 6 * sums[:, SIXES]) * 100.0 / sums[:, RUNS],
+            sums[:, FIELDING] / matches
+        ])
+    valid = np.isfinite(raw)
+    means = np.where(valid, raw, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    return np.where(valid, raw, means)
+
+class SimilarityIndex:
+    """Player vectors for one season (or all seasons).
+    
+    Built from one grouped query. Afterwards only players with performances
+    newer than the last seen id or recently updated in place (live scoring)
+    are re-aggregated, which also picks up rows written by other workers,
+    along with players passed to ``invalidate``. A periodic full rebuild
+    catches other workers' deletions.
+    """
+    
+    def __init__(self, season=None, poll_seconds=5, rebuild_seconds=3600):
+        self.season = season
+        self.poll_seconds = poll_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.lock = threading.Lock()
+        self.state = None
+        self.built_at = 0.0
+        self.polled_at = 0.0
+        self.stale = set()
+    
+    def _sums(self, player_ids=None):
+        pp = PlayerPerformance
+        query = (db.session.query(
+                    pp.player_id,
+                    db.func.count(pp.id),
+                    db.func.sum(pp.runs_scored),
+                    db.func.sum(pp.balls_faced),
+                    db.func.sum(pp.fours),
+                    db.func.sum(pp.sixes),
+                    db.func.sum(pp.wickets_taken),
+                    db.func.sum(balls_expression(pp.overs_bowled)),
+                    db.func.sum(pp.runs_conceded),
+                    db.func.sum(db.func.coalesce(pp.catches, 0) + db.func.coalesce(pp.stumpings, 0) +
+                                db.func.coalesce(pp.run_outs, 0)))
+                 .filter(pp.player_id.isnot(None))
+                 .group_by(pp.player_id))
+        if self.season is not None:
+            query = query.join(Match, pp.match_id == Match.id).filter(Match.season == self.season)
+        if player_ids is not None:
+            query = query.filter(pp.player_id.in_(player_ids))
+        rows = query.all()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        sums = np.array([[value or 0 for value in row[1:]] for row in rows], dtype=np.float64).reshape(len(rows), 9)
+        return ids, sums
+    
+    @staticmethod
+    def _roles(player_ids):
+        roles = dict(db.session.query(Player.id, Player.role).filter(Player.id.in_(player_ids))) if player_ids else {}
+        return np.array([roles.get(int(player_id)) for player_id in player_ids], dtype=object)
+    
+    @staticmethod
+    def _watermarks():
+        max_id, changed_at, now = db.session.query(db.func.max(PlayerPerformance.id),
+                                                   db.func.max(PlayerPerformance.updated_at),
+                                                   db.func.now()).one()
+        return max_id or 0, changed_at or now
+    
+    def build(self):
+        max_id, changed_at = self._watermarks()
+        ids, sums = self._sums()
+        return SimilarityState(ids, self._roles(ids.tolist()), sums, max_id, changed_at)
+    
+    def invalidate(self, player_ids):
+        """Re-aggregate ``player_ids`` on the next lookup, for performances
+        deleted or moved to another player, which polling cannot see."""
+        self.stale.update(player_ids)
+    
+    def expire_poll(self):
+        """Poll on the next lookup instead of waiting out ``poll_seconds``."""
+        self.polled_at = 0.0
+    
+    def update(self, state):
+        # Copied then removed, so ids invalidated meanwhile wait for the next update
+        stale = set(self.stale)
+        self.stale.difference_update(stale)
+        pp = PlayerPerformance
+        rows = (db.session.query(pp.player_id, db.func.max(pp.id), db.func.max(pp.updated_at))
+                .filter(db.or_(pp.id > state.max_performance_id,
+                               pp.updated_at >= state.changed_at - CHANGE_OVERLAP),
+                        pp.player_id.isnot(None))
+                .group_by(pp.player_id)
+                .all())
+        if not rows and not stale:
+            return state
+        
+        max_id = max([state.max_performance_id] + [row[1] for row in rows])
+        changed_at = max([state.changed_at] + [row[2] for row in rows if row[2] is not None])
+        changed = stale.union(row[0] for row in rows)
+        ids, sums = self._sums(list(changed))
+        
+        all_sums = state.sums.copy()
+        # Players left without performances keep their row, with no matches
+        for player_id in changed:
+            if player_id in state.rows:
+                all_sums[state.rows[player_id]] = 0
+        new_ids, new_sums = [], []
+        for player_id, row in zip(ids.tolist(), sums):
+            if player_id in state.rows:
+                all_sums[state.rows[player_id]] = row
+            else:
+                new_ids.append(player_id)
+                new_sums.append(row)
+        if not new_ids:
+            return SimilarityState(state.ids, state.roles, all_sums, max_id, changed_at)
+        return SimilarityState(np.concatenate([state.ids, np.array(new_ids, dtype=np.int64)]),
+                               np.concatenate([state.roles, self._roles(new_ids)]),
+                               np.vstack([all_sums, np.array(new_sums)]), max_id, changed_at)
+    
+    def current(self):
+        now = time.monotonic()
+        if self.state is not None and not self.stale and now - self.polled_at < self.poll_seconds:
+            return self.state
+        
+        # While one request refreshes, the others keep answering from the
+        # previous snapshot; only the very first build makes them wait
+        if not self.lock.acquire(blocking=self.state is None):
+            return self.state
+        try:
+            if self.state is None or now - self.built_at >= self.rebuild_seconds:
+                self.stale.clear()
+                self.state = self.build()
+                self.built_at = self.polled_at = time.monotonic()
+            elif self.stale or now - self.polled_at >= self.poll_seconds:
+                self.state = self.update(self.state)
+                self.polled_at = time.monotonic()
+            return self.state
+        finally:
+            self.lock.release()
+    
+    def nearest(self, player_id, k=10, metric='cosine', role=None, min_matches=1):
+        """The ``k`` players closest to ``player_id`` as (row, score) pairs
+        plus the snapshot they index into; score is the cosine similarity or
+        the euclidean distance. Raises LookupError when the player has no
+        performances in this index."""
+        if metric not in METRICS:
+            raise ValueError(f'metric must be one of {", ".join(METRICS)}')
+        
+        state = self.current()
+        target = state.rows.get(player_id)
+        if target is None:
+            raise LookupError(player_id)
+        
+        candidates = state.sums[:, MATCHES] >= min_matches
+        if role:
+            candidates &= state.roles == role
+        candidates[target] = False
+        
+        if metric == 'cosine':
+            scores = state.unit @ state.unit[target]
+            order_scores = -scores
+        else:
+            scores = np.sqrt(np.maximum(
+                state.squared_norms - 2 * (state.vectors @ state.vectors[target]) + state.squared_norms[target], 0))
+            order_scores = scores
+        
+        rows = np.flatnonzero(candidates)
+        if len(rows) > k:
+            rows = rows[np.argpartition(order_scores[rows], k)[:k]]
+        rows = rows[np.argsort(order_scores[rows], kind='stable')]
+        return state, target, [(int(row), float(scores[row])) for row in rows]
+
+def get_index(season=None):
+    """The similarity index of the current app for ``season`` (None for all).
+    
+    Raises LookupError for a season without matches, so made-up seasons
+    from the query string never get an index of their own.
+    """
+    indexes = current_app.extensions.setdefault('player_similarity', {})
+    index = indexes.get(season)
+    if index is None:
+        if season is not None and not db.session.query(Match.id).filter(Match.season == season).first():
+            raise LookupError(season)
+        config = current_app.config
+        index = indexes.setdefault(season, SimilarityIndex(season,
+                                                           poll_seconds=config['SIMILARITY_POLL_SECONDS'],
+                                                           rebuild_seconds=config['SIMILARITY_REBUILD_SECONDS']))
+    return index
+
+def _stats(state, row):
+    sums = state.sums[row]
+    return {
+        'matches': int(sums[MATCHES]),
+        'runs': int(sums[RUNS]),
+        'wickets': int(sums[WICKETS]),
+        'features': {name: round(float(value), 2) for name, value in zip(FEATURES, state.raw[row])}
+    }
+
+def find_similar(player_id, k=10, metric='cosine', role=None, season=None, min_matches=None):
+    """Nearest players with their names, teams and stats.
+    
+    Returns (target stats, list of results); raises LookupError when the
+    player has no performances in ``season``.
+    """
+    if min_matches is None:
+        min_matches = current_app.config['SIMILARITY_MIN_MATCHES']
+    state, target, nearest = get_index(season).nearest(player_id, k=k, metric=metric, role=role,
+                                                        min_matches=min_matches)
+    
+    ids = [int(state.ids[row]) for row, _ in nearest]
+    details = {row[0]: row for row in
+               db.session.query(Player.id, Player.name, Player.role, Team.name)
+               .outerjoin(Team, Player.team_id == Team.id)
+               .filter(Player.id.in_(ids))} if ids else {}
+    
+    score_key = 'similarity' if metric == 'cosine' else 'distance'
+    results = []
+    for (row, score), similar_id in zip(nearest, ids):
+        if similar_id not in details:
+            continue
+        _, name, player_role, team_name = details[similar_id]
+        result = {
+            'id': similar_id,
+            'name': name,
+            'role': player_role,
+            'team': team_name or 'Free Agent',
+            score_key: round(score, 4)
+        }
+        result.update(_stats(state, row))
+        results.append(result)
+    return _stats(state, target), results
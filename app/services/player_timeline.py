@@ -0,0 +1,237 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from flask import current_app
+from app.extensions import db
+from app.models.match import Match, PlayerPerformance
+from app.utils.ttl_cache import TTLCache
+
+EPOCH = datetime(1970, 1, 1)
+FIELDS = ('runs', 'balls', 'innings', 'wickets', 'balls_bowled', 'runs_conceded')
+# More new rows than this in one poll (a bulk import) empties the store instead
+MAX_POLL_ROWS = 10000
+# Rows updated in place are re-read for this long after the newest update
+# seen, for second-resolution clocks and transactions that commit late
+CHANGE_OVERLAP = timedelta(seconds=30)
+
+def _seconds(moment):
+    return int((moment - EPOCH).total_seconds())
+
+def _balls(overs):
+    """Balls in a cricket overs figure, where 3.4 means three overs and four balls."""
+    overs = overs or 0
+    whole = int(overs)
+    part = round((overs - whole) * 10)
+    return whole * 6 + part if part < 6 else round(overs * 6)
+
+def balls_expression(overs):
+    """SQL for _balls, to sum balls bowled in the database."""
+    tenths = db.cast(db.func.round(db.func.coalesce(overs, 0) * 10), db.Integer)
+    return (tenths - tenths % 10) * 6 / 10 + tenths % 10
+
+class PlayerTimeline:
+    """A player's performances in match order as prefix sums.
+    
+    ``prefix[field][i]`` is the total over the first ``i`` matches, so any
+    contiguous run of matches (a date range, the last N) costs two lookups.
+    """
+    
+    __slots__ = ('dates', 'match_ids', 'prefix', 'last_id')
+    
+    def __init__(self):
+        self.dates = array('q')
+        self.match_ids = array('q')
+        self.prefix = {field: array('q', [0]) for field in FIELDS}
+        self.last_id = 0
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def append(self, performance_id, match_id, match_date, runs, balls, wickets, overs, conceded):
+        """Add a performance; returns False if it predates the last one, in
+        which case the prefix sums would need rebuilding."""
+        played_at = _seconds(match_date)
+        if self.dates and played_at < self.dates[-1]:
+            return False
+        
+        values = (runs or 0, balls or 0, 1 if balls else 0, wickets or 0, _balls(overs), conceded or 0)
+        for field, value in zip(FIELDS, values):
+            sums = self.prefix[field]
+            sums.append(sums[-1] + value)
+        self.dates.append(played_at)
+        self.match_ids.append(match_id)
+        self.last_id = max(self.last_id, performance_id)
+        return True
+    
+    def replace(self, match_id, match_date, runs, balls, wickets, overs, conceded):
+        """Swap in new figures for a match already in the timeline, shifting
+        the sums after it; constant time for the latest match, which is the
+        one live scoring updates. Returns False if the match is not found or
+        has moved, in which case the timeline needs reloading."""
+        index = len(self.match_ids) - 1
+        while index >= 0 and self.match_ids[index] != match_id:
+            index -= 1
+        if index < 0 or self.dates[index] != _seconds(match_date):
+            return False
+        
+        values = (runs or 0, balls or 0, 1 if balls else 0, wickets or 0, _balls(overs), conceded or 0)
+        for field, value in zip(FIELDS, values):
+            sums = self.prefix[field]
+            delta = value - (sums[index + 1] - sums[index])
+            if delta:
+                for position in range(index + 1, len(sums)):
+                    sums[position] += delta
+        return True
+    
+    def span(self, start=None, end=None):
+        """Index range of matches played in [start, end)."""
+        i = bisect_left(self.dates, _seconds(start)) if start else 0
+        j = bisect_left(self.dates, _seconds(end)) if end else len(self.dates)
+        return i, max(i, j)
+    
+    def totals(self, i, j):
+        totals = {field: self.prefix[field][j] - self.prefix[field][i] for field in FIELDS}
+        totals['matches'] = j - i
+        return totals
+    
+    def date(self, index):
+        return EPOCH + timedelta(seconds=self.dates[index])
+    
+    def rolling(self, window, i=0, j=None):
+        """Totals of the ``window`` matches ending at each match in [i, j),
+        skipping matches with fewer than ``window`` before them."""
+        j = len(self.dates) if j is None else j
+        for end in range(max(i, window - 1), j):
+            yield end, self.totals(end + 1 - window, end + 1)
+
+def _ratio(numerator, denominator, scale=1):
+    return round(numerator * scale / denominator, 2) if denominator else 0
+
+def summarize(totals):
+    """Career-style figures from raw totals. Dismissals are not recorded, so
+    the batting average is per innings batted."""
+    overs_whole, overs_balls = divmod(totals['balls_bowled'], 6)
+    return {
+        'matches': totals['matches'],
+        'innings': totals['innings'],
+        'runs': totals['runs'],
+        'balls_faced': totals['balls'],
+        'wickets': totals['wickets'],
+        'overs': float(f'{overs_whole}.{overs_balls}'),
+        'runs_conceded': totals['runs_conceded'],
+        'batting_avg': _ratio(totals['runs'], totals['innings']),
+        'strike_rate': _ratio(totals['runs'], totals['balls'], 100),
+        'bowling_avg': _ratio(totals['runs_conceded'], totals['wickets']),
+        'economy': _ratio(totals['runs_conceded'], totals['balls_bowled'], 6)
+    }
+
+def _rows(query):
+    return (query.join(Match, PlayerPerformance.match_id == Match.id)
+            .with_entities(PlayerPerformance.player_id, PlayerPerformance.id, PlayerPerformance.match_id,
+                           Match.match_date, PlayerPerformance.runs_scored, PlayerPerformance.balls_faced,
+                           PlayerPerformance.wickets_taken, PlayerPerformance.overs_bowled,
+                           PlayerPerformance.runs_conceded))
+
+class TimelineStore:
+    """Per-process LRU of player timelines.
+    
+    Each poll reads the rows past the highest id seen and the rows whose
+    ``updated_at`` is recent, so new performances and figures updated in
+    place (live scoring) from any worker show up within ``poll_seconds``,
+    folded into the cached sums. Deletions made here are dropped through
+    ``invalidate``; those of other workers show up when timelines expire
+    after ``max_age``.
+    """
+    
+    def __init__(self, maxsize=4096, max_age=3600, poll_seconds=5):
+        self.timelines = TTLCache(maxsize=maxsize, ttl=max_age)
+        self.poll_seconds = poll_seconds
+        self.lock = threading.Lock()
+        self.watermark = None
+        self.changed_at = None
+        self.polled_at = 0.0
+    
+    def _watermarks(self):
+        """(highest id, newest update) of the performances, read from the
+        database clock so every worker compares alike."""
+        max_id, changed_at, now = db.session.query(db.func.max(PlayerPerformance.id),
+                                                   db.func.max(PlayerPerformance.updated_at),
+                                                   db.func.now()).one()
+        return max_id or 0, changed_at or now
+    
+    def load(self, player_id):
+        timeline = PlayerTimeline()
+        rows = (_rows(PlayerPerformance.query.filter(PlayerPerformance.player_id == player_id))
+                .order_by(Match.match_date, PlayerPerformance.id))
+        for row in rows:
+            timeline.append(*row[1:])
+        return timeline
+    
+    def poll(self):
+        with self.lock:
+            if self.watermark is None:
+                self.watermark, self.changed_at = self._watermarks()
+                self.polled_at = time.monotonic()
+                return
+            
+            changed = db.or_(PlayerPerformance.id > self.watermark,
+                             PlayerPerformance.updated_at >= self.changed_at - CHANGE_OVERLAP)
+            rows = (_rows(PlayerPerformance.query.filter(changed))
+                    .add_columns(PlayerPerformance.updated_at)
+                    .order_by(PlayerPerformance.id)
+                    .limit(MAX_POLL_ROWS + 1)
+                    .all())
+            if len(rows) > MAX_POLL_ROWS:
+                self.timelines.clear()
+                self.watermark, self.changed_at = self._watermarks()
+                # Skip the bulk write's rows, which the cleared timelines will load
+                self.changed_at += CHANGE_OVERLAP
+                rows = []
+            for player_id, performance_id, *values, updated_at in rows:
+                timeline = self.timelines.get(player_id)
+                if timeline is not None:
+                    # Timelines loaded since hold a row's current figures, so
+                    # replacing them again changes nothing
+                    if performance_id > timeline.last_id:
+                        folded = timeline.append(performance_id, *values)
+                    else:
+                        folded = timeline.replace(*values)
+                    if not folded:
+                        # Back-dated or moved performance: reload on next access
+                        self.timelines.pop(player_id)
+                self.watermark = max(self.watermark, performance_id)
+                if updated_at is not None:
+                    self.changed_at = max(self.changed_at, updated_at)
+            self.polled_at = time.monotonic()
+    
+    def expire_poll(self):
+        """Poll on the next access instead of waiting out ``poll_seconds``."""
+        self.polled_at = 0.0
+    
+    def get(self, player_id, fresh=False):
+        """The timeline of ``player_id``; ``fresh`` polls for new performances
+        first instead of trusting a poll from the last ``poll_seconds``."""
+        if fresh or self.watermark is None or time.monotonic() - self.polled_at >= self.poll_seconds:
+            self.poll()
+        timeline = self.timelines.get(player_id)
+        if timeline is None:
+            timeline = self.load(player_id)
+            self.timelines.set(player_id, timeline)
+        return timeline
+
+    def invalidate(self, player_ids):
+        """Drop the timelines of ``player_ids``; they reload on next access."""
+        for player_id in player_ids:
+            self.timelines.pop(player_id)
+
+def get_timeline(player_id, fresh=False):
+    store = current_app.extensions.get('player_timelines')
+    if store is None:
+        config = current_app.config
+        store = current_app.extensions.setdefault('player_timelines', TimelineStore(
+            maxsize=config['TIMELINE_CACHE_SIZE'],
+            max_age=config['TIMELINE_MAX_AGE'],
+            poll_seconds=config['TIMELINE_POLL_SECONDS']))
+    return store.get(player_id, fresh=fresh)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from app.extensions import db, cache
+from app.models.team import Team
+from app.models.match import Match, SeasonStanding
+
+COUNTERS = ('played', 'won', 'lost', 'tied', 'no_result', 'points',
+            'runs_for', 'balls_faced', 'runs_against', 'balls_bowled')
+# Only league matches count towards the table
+LEAGUE = db.or_(Match.match_type == 'league', Match.match_type.is_(None))
+
+def _cache_key(season):
+    return f'points_table:{season}'
+
+def innings_balls(overs, wickets, quota_balls):
+    """Balls an innings counts for net run rate. Overs use cricket notation
+    (19.2 is 19 overs and 2 balls) and a side bowled out is charged its
+    full quota, however early it was dismissed."""
+    if overs is None:
+        return None
+    if wickets is not None and wickets >= 10:
+        return quota_balls
+    whole = int(overs)
+    return whole * 6 + round((overs - whole) * 10)
+
+def _balls_to_overs(balls):
+    return balls // 6 + balls % 6 / 10
+
+def _league_results(*criteria):
+    team1, team2 = aliased(Team), aliased(Team)
+    return (db.session.query(Match.season, Match.team1_id, Match.team2_id,
+                             Match.team1_score, Match.team1_overs, Match.team1_wickets,
+                             Match.team2_score, Match.team2_overs, Match.team2_wickets,
+                             Match.result, team1.name, team2.name)
+            .join(team1, Match.team1_id == team1.id)
+            .join(team2, Match.team2_id == team2.id)
+            .filter(LEAGUE, Match.result.isnot(None), *criteria))
+
+def _deltas(match, config):
+    """The two ((season, team_id), counters) a completed league match adds."""
+    (season, team1_id, team2_id, score1, overs1, wickets1,
+     score2, overs2, wickets2, result, team1_name, team2_name) = match
+    # Match.winner reads the winner from a result like "<team name> won by 5 wickets"
+    if result.startswith(f'{team1_name} won'):
+        outcomes = ('won', 'lost')
+    elif result.startswith(f'{team2_name} won'):
+        outcomes = ('lost', 'won')
+    elif 'tie' in result.lower():
+        outcomes = ('tied', 'tied')
+    else:
+        outcomes = ('no_result', 'no_result')
+    points = {'won': config['POINTS_FOR_WIN'], 'lost': 0,
+              'tied': config['POINTS_FOR_TIE'], 'no_result': config['POINTS_FOR_NO_RESULT']}
+    
+    quota = config['MATCH_OVERS'] * 6
+    balls1, balls2 = innings_balls(overs1, wickets1, quota), innings_balls(overs2, wickets2, quota)
+    # Abandoned matches and innings without a scorecard stay out of net run rate
+    counts = outcomes[0] != 'no_result' and None not in (score1, score2, balls1, balls2)
+    
+    sides = ((team1_id, outcomes[0], score1, balls1, score2, balls2),
+             (team2_id, outcomes[1], score2, balls2, score1, balls1))
+    for team_id, outcome, runs_for, balls_faced, runs_against, balls_bowled in sides:
+        delta = dict.fromkeys(COUNTERS, 0)
+        delta.update({'played': 1, outcome: 1, 'points': points[outcome]})
+        if counts:
+            delta.update(runs_for=runs_for, balls_faced=balls_faced,
+                         runs_against=runs_against, balls_bowled=balls_bowled)
+        yield (season, team_id), delta
+
+def _new_row(season, team_id):
+    row = SeasonStanding(season=season, team_id=team_id)
+    for counter in COUNTERS:
+        setattr(row, counter, 0)
+    return row
+
+def _apply(row, delta):
+    for counter in COUNTERS:
+        setattr(row, counter, getattr(row, counter) + delta[counter])
+
+def _fold(matches):
+    config = current_app.config
+    rows = {}
+    for match in matches:
+        for key, delta in _deltas(match, config):
+            if key not in rows:
+                rows[key] = _new_row(*key)
+            _apply(rows[key], delta)
+    return rows
+
+def _mark_changed(seasons):
+    db.session.info.setdefault('changed_points_tables', set()).update(seasons)
+
+def rebuild_standings(season=None):
+    """Recount the league table of ``season`` (every season by default) from
+    its completed league matches. Returns the number of standings rows."""
+    results = _league_results()
+    stale = SeasonStanding.query
+    if season is not None:
+        results = results.filter(Match.season == season)
+        stale = stale.filter(SeasonStanding.season == season)
+    rows = _fold(results)
+    
+    seasons = {standing_season for standing_season, in stale.with_entities(SeasonStanding.season).distinct()}
+    stale.delete(synchronize_session='fetch')
+    db.session.add_all(rows.values())
+    _mark_changed(seasons | {key[0] for key in rows})
+    return len(rows)
+
+def _recount(season, team_ids):
+    """Recount two teams' lines after a correction, from their season's matches."""
+    involved = Match.team1_id.in_(team_ids) | Match.team2_id.in_(team_ids)
+    rows = _fold(_league_results(Match.season == season, involved))
+    (SeasonStanding.query
+     .filter(SeasonStanding.season == season, SeasonStanding.team_id.in_(team_ids))
+     .delete(synchronize_session='fetch'))
+    db.session.add_all(row for (_, team_id), row in rows.items() if team_id in team_ids)
+    _mark_changed([season])
+
+def _locked_rows(season, team_ids):
+    """The teams' rows for ``season``, locked for update and created if missing."""
+    query = (SeasonStanding.query
+             .filter(SeasonStanding.season == season, SeasonStanding.team_id.in_(team_ids))
+             .with_for_update())
+    rows = {row.team_id: row for row in query}
+    for team_id in team_ids:
+        if team_id in rows:
+            continue
+        try:
+            with db.session.begin_nested():
+                rows[team_id] = _new_row(season, team_id)
+                db.session.add(rows[team_id])
+        except IntegrityError:
+            # Another request recorded this team's first result at the same time
+            rows[team_id] = query.filter(SeasonStanding.team_id == team_id).one()
+    return rows
+
+def update_standings(match, already_counted):
+    """Add a league match's (flushed) result to both teams' lines; a
+    corrected or cleared result recounts just those two lines."""
+    if match.match_type not in (None, 'league'):
+        return
+    team_ids = (match.team1_id, match.team2_id)
+    if already_counted or match.result is None:
+        _recount(match.season, team_ids)
+        return
+    
+    rows = _locked_rows(match.season, team_ids)
+    for result in _league_results(Match.id == match.id):
+        for (_, team_id), delta in _deltas(result, current_app.config):
+            _apply(rows[team_id], delta)
+
+def build_points_table(season):
+    """The league table, best first, or None for a season without matches."""
+    standings = (db.session.query(SeasonStanding, Team.name, Team.short_name)
+                 .join(Team, SeasonStanding.team_id == Team.id)
+                 .filter(SeasonStanding.season == season)
+                 .all())
+    if not standings and not db.session.query(Match.id).filter(Match.season == season).first():
+        return None
+    
+    standings.sort(key=lambda standing: (-standing[0].points, -standing[0].net_run_rate,
+                                         -standing[0].won, standing[1]))
+    return {
+        'season': season,
+        'standings': [{
+            'position': position,
+            'team': {'id': row.team_id, 'name': name, 'short_name': short_name},
+            'played': row.played,
+            'won': row.won,
+            'lost': row.lost,
+            'tied': row.tied,
+            'no_result': row.no_result,
+            'points': row.points,
+            'net_run_rate': row.net_run_rate,
+            'runs_for': row.runs_for,
+            'overs_faced': _balls_to_overs(row.balls_faced),
+            'runs_against': row.runs_against,
+            'overs_bowled': _balls_to_overs(row.balls_bowled)
+        } for position, (row, name, short_name) in enumerate(standings, 1)]
+    }
+
+def get_points_table(season):
+    """(table, etag) for a season, or None. Cached per season until one of
+    its standings rows changes; the ETag is a hash of the table."""
+    key = _cache_key(season)
+    entry = cache.get(key)
+    if entry is None:
+        table = build_points_table(season)
+        if table is None:
+            return None
+        etag = hashlib.md5(json.dumps(table, sort_keys=True).encode()).hexdigest()
+        entry = (table, etag)
+        cache.set(key, entry, timeout=current_app.config['POINTS_TABLE_CACHE_TIMEOUT'])
+    return entry
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_seasons(session, flush_context):
+    seasons = {instance.season
+               for instance in list(session.new) + list(session.dirty) + list(session.deleted)
+               if isinstance(instance, SeasonStanding)}
+    if seasons:
+        session.info.setdefault('changed_points_tables', set()).update(seasons)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_points_tables(session):
+    changed = session.info.pop('changed_points_tables', None)
+    if changed and has_app_context():
+        cache.delete_many(*[_cache_key(season) for season in changed])
@@ -0,0 +1,153 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, aliased
+from app.extensions import db, cache
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+
+RECENT_MATCHES = 5
+ROLES = ('Batsman', 'Bowler', 'All-Rounder', 'Wicket-Keeper')
+
+def _cache_key(team_id):
+    return f'team_profile:{team_id}'
+
+def get_team_profile(team_id):
+    """Everything the team page shows, or None for an unknown team.
+    
+    Cached per team and dropped when one of its matches, squad members or
+    their performances changes.
+    """
+    key = _cache_key(team_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_team_profile(team_id)
+        if profile is not None:
+            cache.set(key, profile, timeout=current_app.config['TEAM_PROFILE_CACHE_TIMEOUT'])
+    return profile
+
+def invalidate_team_profiles(team_ids):
+    """Drop the cached profiles of ``team_ids`` now. ORM writes are picked
+    up by the session hooks below; Core writers that commit themselves call
+    this afterwards."""
+    keys = [_cache_key(team_id) for team_id in set(team_ids) if team_id is not None]
+    if keys:
+        cache.delete_many(*keys)
+
+def mark_team_profiles_changed(team_ids):
+    """Drop the profiles of ``team_ids`` when the current session commits,
+    for Core writers that leave the commit to their caller."""
+    db.session.info.setdefault('changed_team_profiles', set()).update(team_ids)
+
+def _fixtures(team_id):
+    return (Match.team1_id == team_id) | (Match.team2_id == team_id)
+
+def team_record(team):
+    """(matches, wins, losses) in one aggregate over the team's fixtures."""
+    # Match.winner reads the winner from a result like "<team name> won by 5 wickets"
+    opponent = aliased(Team)
+    opponent_id = db.case((Match.team1_id == team.id, Match.team2_id), else_=Match.team1_id)
+    matches, wins, losses = (db.session.query(
+                                 db.func.count(Match.id),
+                                 db.func.sum(db.case((Match.result.like(team.name + ' won%'), 1), else_=0)),
+                                 db.func.sum(db.case((Match.result.like(opponent.name + ' won%'), 1), else_=0)))
+                             .join(opponent, opponent.id == opponent_id)
+                             .filter(_fixtures(team.id))
+                             .one())
+    return matches, int(wins or 0), int(losses or 0)
+
+def build_team_profile(team_id):
+    team = Team.query.get(team_id)
+    if team is None:
+        return None
+    
+    matches, wins, losses = team_record(team)
+    
+    team1, team2 = aliased(Team), aliased(Team)
+    recent = (db.session.query(Match.id, Match.match_date, Match.venue, Match.result,
+                               Match.team1_id, team1.name, team2.name)
+              .join(team1, Match.team1_id == team1.id)
+              .join(team2, Match.team2_id == team2.id)
+              .filter(_fixtures(team_id))
+              .order_by(Match.match_date.desc())
+              .limit(RECENT_MATCHES)
+              .all())
+    
+    form = []
+    for _, _, _, result, team1_id, team1_name, team2_name in recent:
+        opponent_name = team2_name if team1_id == team_id else team1_name
+        if result and result.startswith(f'{team.name} won'):
+            form.append('W')
+        elif result and result.startswith(f'{opponent_name} won'):
+            form.append('L')
+        else:
+            form.append('-')
+    
+    # The whole squad with career numbers in one grouped query
+    squad = (db.session.query(Player.id, Player.name, Player.role, Player.nationality,
+                              db.func.count(PlayerPerformance.id),
+                              db.func.coalesce(db.func.sum(PlayerPerformance.runs_scored), 0),
+                              db.func.coalesce(db.func.sum(PlayerPerformance.wickets_taken), 0))
+             .outerjoin(PlayerPerformance, PlayerPerformance.player_id == Player.id)
+             .filter(Player.team_id == team_id)
+             .group_by(Player.id, Player.name, Player.role, Player.nationality)
+             .order_by(Player.id)
+             .all())
+    
+    role_stats = dict.fromkeys(ROLES, 0)
+    nationality_stats = {'Indian': 0, 'Overseas': 0}
+    players = []
+    for player_id, name, role, nationality, played, runs, wickets in squad:
+        role_stats[role] = role_stats.get(role, 0) + 1
+        nationality_stats['Indian' if nationality == 'Indian' else 'Overseas'] += 1
+        player = {'id': player_id, 'name': name, 'role': role, 'nationality': nationality}
+        if played:
+            player['batting_average'] = round(runs / played, 2)
+            player['bowling_average'] = round(wickets / played, 2)
+        players.append(player)
+    
+    return {
+        'team': {
+            'id': team.id,
+            'name': team.name,
+            'short_name': team.short_name,
+            'home_ground': team.home_ground,
+            'logo_url': team.logo_url
+        },
+        'total_matches': matches,
+        'wins': wins,
+        'losses': losses,
+        'form': form,
+        # Newest first, shaped like Match so templates read match.team1.name
+        'matches': [{
+            'id': match_id,
+            'match_date': match_date,
+            'venue': venue,
+            'result': result,
+            'team1': {'name': team1_name},
+            'team2': {'name': team2_name}
+        } for match_id, match_date, venue, result, _, team1_name, team2_name in recent],
+        'players': players,
+        'role_stats': role_stats,
+        'nationality_stats': nationality_stats
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_teams(session, flush_context):
+    changed = session.info.setdefault('changed_team_profiles', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, Match):
+            changed.update((instance.team1_id, instance.team2_id))
+        elif isinstance(instance, PlayerPerformance):
+            changed.add(instance.team_id)
+        elif isinstance(instance, Player):
+            # A transfer changes both squads
+            changed.add(instance.team_id)
+            changed.update(inspect(instance).attrs.team_id.history.deleted or ())
+        elif isinstance(instance, Team):
+            changed.add(instance.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_teams(session):
+    changed = session.info.pop('changed_team_profiles', None)
+    if changed and has_app_context():
+        invalidate_team_profiles(changed)
@@ -0,0 +1,249 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from app.extensions import db, cache
+from app.models.team import Team
+from app.models.match import Match
+from app.models.venue import Venue, VenueSeasonStats
+
+ALL_SEASONS = VenueSeasonStats.ALL_SEASONS
+COUNTERS = ('matches', 'scored_matches', 'first_innings_runs', 'second_innings_runs',
+            'decided_matches', 'chasing_wins', 'toss_matches', 'toss_winner_wins')
+# Ground names that mean "not known yet" rather than a venue
+UNKNOWN_VENUES = frozenset(('', 'tbd', 'tba'))
+TABLE_KEY = 'venue_table'
+
+def resolve_venue(name):
+    """The Venue for a free-text ground name, created the first time it is
+    seen; None for a blank or placeholder name."""
+    if not name:
+        return None
+    key = Venue.normalize_key(name)
+    if key in UNKNOWN_VENUES:
+        return None
+    venue = Venue.query.filter_by(key=key).first()
+    if venue:
+        return venue
+    
+    ground, _, city = name.partition(',')
+    venue = Venue(name=' '.join(ground.split()), city=city.strip() or None, key=key)
+    try:
+        with db.session.begin_nested():
+            db.session.add(venue)
+    except IntegrityError:
+        # Another request saw this ground first
+        venue = Venue.query.filter_by(key=key).first()
+    return venue
+
+def _new_row(venue_id, season):
+    row = VenueSeasonStats(venue_id=venue_id, season=season)
+    for counter in COUNTERS:
+        setattr(row, counter, 0)
+    return row
+
+def _apply(row, values):
+    for counter in COUNTERS:
+        setattr(row, counter, getattr(row, counter) + values[counter])
+    if values['highest_total'] is not None:
+        row.highest_total = max(row.highest_total or 0, values['highest_total'])
+    if values['lowest_total'] is not None:
+        row.lowest_total = (values['lowest_total'] if row.lowest_total is None
+                            else min(row.lowest_total, values['lowest_total']))
+    if values['highest_match_runs'] is not None:
+        row.highest_match_runs = max(row.highest_match_runs or 0, values['highest_match_runs'])
+
+def _rollups(*criteria):
+    """Counters per (venue_id, season) over the completed matches that meet
+    ``criteria``, in one grouped query."""
+    # Winners are read from results like "<team name> won by 5 wickets", as Match.winner does
+    team1, team2 = aliased(Team), aliased(Team)
+    team1_won = Match.result.like(team1.name + ' won%')
+    team2_won = Match.result.like(team2.name + ' won%')
+    decided = team1_won | team2_won
+    scored = Match.team1_score.isnot(None) & Match.team2_score.isnot(None)
+    toss_winner_won = (((Match.toss_winner_id == Match.team1_id) & team1_won) |
+                       ((Match.toss_winner_id == Match.team2_id) & team2_won))
+    
+    def count(condition):
+        return db.func.sum(db.case((condition, 1), else_=0))
+    
+    rows = (db.session.query(Match.venue_id, Match.season,
+                             db.func.count(Match.id),
+                             count(scored),
+                             db.func.sum(db.case((scored, Match.team1_score), else_=0)),
+                             db.func.sum(db.case((scored, Match.team2_score), else_=0)),
+                             count(decided),
+                             count(team2_won),
+                             count(decided & Match.toss_winner_id.isnot(None)),
+                             count(toss_winner_won),
+                             db.func.max(Match.team1_score), db.func.max(Match.team2_score),
+                             db.func.min(Match.team1_score), db.func.min(Match.team2_score),
+                             db.func.max(Match.team1_score + Match.team2_score))
+            .join(team1, Match.team1_id == team1.id)
+            .join(team2, Match.team2_id == team2.id)
+            .filter(Match.venue_id.isnot(None), Match.result.isnot(None), *criteria)
+            .group_by(Match.venue_id, Match.season))
+    
+    rollups = {}
+    for venue_id, season, *counters, highest1, highest2, lowest1, lowest2, highest_match in rows:
+        values = dict(zip(COUNTERS, (int(value or 0) for value in counters)))
+        values['highest_total'] = max((total for total in (highest1, highest2) if total is not None), default=None)
+        values['lowest_total'] = min((total for total in (lowest1, lowest2) if total is not None), default=None)
+        values['highest_match_runs'] = highest_match
+        rollups[(venue_id, season)] = values
+    return rollups
+
+def _mark_changed():
+    db.session.info['venues_changed'] = True
+
+def rebuild_venue_stats(venue_ids=None):
+    """Recount the rollups of ``venue_ids`` (every venue by default) from
+    their completed matches."""
+    criteria = [Match.venue_id.in_(venue_ids)] if venue_ids is not None else []
+    rows = {}
+    for (venue_id, season), values in _rollups(*criteria).items():
+        for key in ((venue_id, season), (venue_id, ALL_SEASONS)):
+            if key not in rows:
+                rows[key] = _new_row(*key)
+            _apply(rows[key], values)
+    
+    stale = VenueSeasonStats.query
+    if venue_ids is not None:
+        stale = stale.filter(VenueSeasonStats.venue_id.in_(venue_ids))
+    stale.delete(synchronize_session='fetch')
+    db.session.add_all(rows.values())
+    _mark_changed()
+
+def rebuild_venues():
+    """Link every match and team to a venue, creating venues from the distinct
+    ground names, then recount every rollup. Returns the number of venues."""
+    names = {name for name, in db.session.query(Match.venue).distinct()}
+    names.update(name for name, in db.session.query(Team.home_ground).distinct() if name)
+    
+    matches, teams = Match.__table__, Team.__table__
+    for name in names:
+        venue = resolve_venue(name)
+        venue_id = venue.id if venue else None
+        db.session.execute(matches.update().where(matches.c.venue == name).values(venue_id=venue_id))
+        db.session.execute(teams.update().where(teams.c.home_ground == name).values(home_venue_id=venue_id))
+    
+    rebuild_venue_stats()
+    db.session.flush()
+    return Venue.query.count()
+
+def _locked_rows(venue_id, seasons):
+    """The venue's rows for ``seasons``, locked for update and created if missing."""
+    query = (VenueSeasonStats.query
+             .filter(VenueSeasonStats.venue_id == venue_id, VenueSeasonStats.season.in_(seasons))
+             .with_for_update())
+    rows = {row.season: row for row in query}
+    for season in seasons:
+        if season in rows:
+            continue
+        try:
+            with db.session.begin_nested():
+                rows[season] = _new_row(venue_id, season)
+                db.session.add(rows[season])
+        except IntegrityError:
+            # Another request recorded this venue's first result at the same time
+            rows[season] = query.filter(VenueSeasonStats.season == season).one()
+    return list(rows.values())
+
+def update_venue_stats(match, already_counted):
+    """Fold the match's (flushed) result into its venue's rows for the season
+    and for all seasons; a corrected or cleared result recounts the venue."""
+    if match.venue_id is None:
+        return
+    if already_counted or match.result is None:
+        rebuild_venue_stats([match.venue_id])
+        return
+    
+    values = _rollups(Match.id == match.id)[(match.venue_id, match.season)]
+    for row in _locked_rows(match.venue_id, (match.season, ALL_SEASONS)):
+        _apply(row, values)
+
+def _percentage(part, whole):
+    return round(part * 100 / whole, 1) if whole else None
+
+def _average(runs, matches):
+    return round(runs / matches, 2) if matches else None
+
+def _stats(row):
+    return {
+        'matches': row.matches,
+        'average_first_innings': _average(row.first_innings_runs, row.scored_matches),
+        'average_second_innings': _average(row.second_innings_runs, row.scored_matches),
+        'chasing_win_percentage': _percentage(row.chasing_wins, row.decided_matches),
+        'highest_total': row.highest_total,
+        'lowest_total': row.lowest_total,
+        'highest_match_runs': row.highest_match_runs,
+        # Toss impact: how often the toss winner went on to win
+        'toss_winner_win_percentage': _percentage(row.toss_winner_wins, row.toss_matches)
+    }
+
+def venue_table():
+    """Every venue with its home teams and its rollups by season.
+    
+    Cached as a single entry (the table is venues x seasons rows) and dropped
+    whenever a venue, a rollup or a team changes.
+    """
+    table = cache.get(TABLE_KEY)
+    if table is not None:
+        return table
+    
+    venues = {venue_id: {'id': venue_id, 'name': name, 'city': city, 'home_teams': []}
+              for venue_id, name, city in db.session.query(Venue.id, Venue.name, Venue.city).order_by(Venue.name)}
+    home_teams = (db.session.query(Team.home_venue_id, Team.id, Team.name, Team.short_name)
+                  .filter(Team.home_venue_id.isnot(None))
+                  .order_by(Team.name))
+    for venue_id, team_id, name, short_name in home_teams:
+        if venue_id in venues:
+            venues[venue_id]['home_teams'].append({'id': team_id, 'name': name, 'short_name': short_name})
+    stats = {}
+    for row in VenueSeasonStats.query:
+        stats.setdefault(row.season, {})[row.venue_id] = _stats(row)
+    
+    table = {'venues': venues, 'stats': stats}
+    cache.set(TABLE_KEY, table, timeout=current_app.config['VENUE_CACHE_TIMEOUT'])
+    return table
+
+def list_venues(season=None):
+    """Venues with their figures for ``season`` (or all seasons), busiest
+    first. With a season, only the venues that hosted a match in it."""
+    table = venue_table()
+    by_venue = table['stats'].get(season or ALL_SEASONS, {})
+    empty = _stats(_new_row(None, None))
+    venues = [{**venue, **by_venue.get(venue_id, empty)}
+              for venue_id, venue in table['venues'].items()
+              if venue_id in by_venue or not season]
+    return sorted(venues, key=lambda venue: -venue['matches'])
+
+def get_venue(venue_id):
+    """One venue with its overall figures and each season's, newest first;
+    None for an unknown venue."""
+    table = venue_table()
+    venue = table['venues'].get(venue_id)
+    if venue is None:
+        return None
+    
+    empty = _stats(_new_row(None, None))
+    seasons = sorted((season for season, by_venue in table['stats'].items()
+                      if season != ALL_SEASONS and venue_id in by_venue), reverse=True)
+    return {
+        **venue,
+        'overall': table['stats'].get(ALL_SEASONS, {}).get(venue_id, empty),
+        'seasons': [{'season': season, **table['stats'][season][venue_id]} for season in seasons]
+    }
+
+@event.listens_for(Session, 'after_flush')
+def _collect_venue_changes(session, flush_context):
+    if not session.info.get('venues_changed'):
+        session.info['venues_changed'] = any(
+            isinstance(instance, (Venue, VenueSeasonStats, Team))
+            for instance in list(session.new) + list(session.dirty) + list(session.deleted))
+
+@event.listens_for(Session, 'after_commit')
+def _drop_venue_table(session):
+    if session.info.pop('venues_changed', False) and has_app_context():
+        cache.delete(TABLE_KEY)
@@ -0,0 +1,161 @@
+import itertools
+import logging
+import threading
+import time
+from flask import current_app, g, request, session, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+def _writer_key():
+    # Token clients send no session cookie, so their pin lives in the shared cache
+    from app.routes.auth import get_token_user_id
+    
+    user_id = get_token_user_id() or session.get('_user_id')
+    return f'db_primary_until:{user_id}' if user_id else None
+
+def _is_plain_read(clause):
+    # Only SELECTs without FOR UPDATE may go to a replica
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+class RoutingSession(SignallingSession):
+    """Sends reads to the replica chosen for the current request.
+    
+    Flushes, writes, locking reads and anything after the first write in the
+    session stay on the primary, so a request always reads its own writes.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = g.get('db_replica') if has_request_context() else None
+        if replica and not self.info.get('wrote') and not self._flushing:
+            if _is_plain_read(clause):
+                return self.app.extensions['sqlalchemy'].db.get_engine(self.app, bind=replica)
+            if clause is not None:
+                self.info['wrote'] = True
+        return SignallingSession.get_bind(self, mapper, clause)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_written(session, flush_context):
+    session.info['wrote'] = True
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+    
+    def _primary_binds(self, bind, app):
+        # Replicas get their schema through replication, never from us
+        if bind != '__all__':
+            return bind
+        binds = self.get_app(app).config.get('SQLALCHEMY_BINDS') or {}
+        return [None] + [key for key in binds if not key.startswith('replica_')]
+    
+    def create_all(self, bind='__all__', app=None):
+        SQLAlchemy.create_all(self, self._primary_binds(bind, app), app)
+    
+    def drop_all(self, bind='__all__', app=None):
+        SQLAlchemy.drop_all(self, self._primary_binds(bind, app), app)
+
+class ReplicaRouter:
+    """Chooses a read replica for GET requests, round robin over the replicas
+    that passed their last health check.
+    
+    Replicas are registered as SQLALCHEMY_BINDS named ``replica_<n>``, so
+    Flask-SQLAlchemy owns their engines and pools.
+    """
+    
+    def __init__(self, app=None):
+        self.replicas = []
+        self.health = {}
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [])
+        app.config.setdefault('DB_REPLICA_BLUEPRINTS', ('api', 'main_bp'))
+        app.config.setdefault('DB_PRIMARY_ENDPOINTS', ())
+        app.config.setdefault('DB_READ_YOUR_WRITES_SECONDS', 5)
+        app.config.setdefault('DB_REPLICA_HEALTH_INTERVAL', 10)
+        
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        self.replicas = []
+        for index, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+            key = f'replica_{index}'
+            binds[key] = uri
+            self.replicas.append(key)
+            self.health[key] = {'healthy': True, 'checked': 0.0}
+        app.config['SQLALCHEMY_BINDS'] = binds
+        
+        if self.replicas:
+            app.before_request(self.choose_replica)
+            app.after_request(self.remember_writes)
+            if not event.contains(Engine, 'handle_error', self.replica_failed):
+                event.listen(Engine, 'handle_error', self.replica_failed)
+    
+    def choose_replica(self):
+        from app.extensions import cache
+        
+        g.db_replica = None
+        config = current_app.config
+        if request.method not in ('GET', 'HEAD'):
+            return
+        if request.blueprint not in config['DB_REPLICA_BLUEPRINTS']:
+            return
+        if request.endpoint in config['DB_PRIMARY_ENDPOINTS']:
+            return
+        # This client wrote recently, and the replicas may not have caught up
+        if session.get('db_primary_until', 0) > time.time():
+            return
+        key = _writer_key()
+        if key and (cache.get(key) or 0) > time.time():
+            return
+        
+        for _ in range(len(self.replicas)):
+            key = self.replicas[next(self.counter) % len(self.replicas)]
+            if self.is_healthy(key):
+                g.db_replica = key
+                return
+    
+    def remember_writes(self, response):
+        from app.extensions import cache
+        
+        if request.method not in ('GET', 'HEAD') and response.status_code < 400:
+            seconds = current_app.config['DB_READ_YOUR_WRITES_SECONDS']
+            session['db_primary_until'] = time.time() + seconds
+            key = _writer_key()
+            if key:
+                cache.set(key, time.time() + seconds, timeout=seconds + 1)
+        return response
+    
+    def is_healthy(self, key):
+        state = self.health[key]
+        interval = current_app.config['DB_REPLICA_HEALTH_INTERVAL']
+        now = time.monotonic()
+        if now - state['checked'] < interval:
+            return state['healthy']
+        
+        with self.lock:
+            if now - state['checked'] < interval:
+                return state['healthy']
+            try:
+                with current_app.extensions['sqlalchemy'].db.get_engine(current_app, bind=key).connect() as connection:
+                    connection.execute(text('SELECT 1'))
+                healthy = True
+            except Exception as e:
+                logger.warning('Read replica %s failed its health check: %s', key, e)
+                healthy = False
+            state['healthy'] = healthy
+            state['checked'] = now
+        return healthy
+    
+    def replica_failed(self, context):
+        # A replica that errors mid-request is skipped until its next health check
+        key = g.get('db_replica') if has_request_context() else None
+        if not key or not (context.is_disconnect or context.connection is None):
+            return
+        if context.engine is current_app.extensions['sqlalchemy'].db.get_engine(current_app, bind=key):
+            logger.warning('Read replica %s failed, routing reads to the primary', key)
+            self.health[key] = {'healthy': False, 'checked': time.monotonic()}
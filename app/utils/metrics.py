@@ -0,0 +1,139 @@
+import functools
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+# prometheus_client switches every metric to file-backed values when
+# PROMETHEUS_MULTIPROC_DIR is set before it is imported, so each worker writes
+# its own mmap files and /metrics aggregates them on read.
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+# Fine enough around 10ms-1s to alert on p99 of dashboard-data and place_bid
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'ipl_http_request_duration_seconds', 'Request latency',
+    ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+RESPONSES = Counter(
+    'ipl_http_responses_total', 'Responses by status code',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+IN_FLIGHT = Gauge(
+    'ipl_http_requests_in_flight', 'Requests currently being handled',
+    ['blueprint'], multiprocess_mode='livesum'
+)
+DB_POOL = Gauge(
+    'ipl_db_pool_connections', 'Database connection pool state',
+    ['bind', 'state'], multiprocess_mode='livesum'
+)
+CACHE_LOOKUPS = Gauge(
+    'ipl_cache_lookups', 'In-process cache lookups since worker start',
+    ['cache', 'result'], multiprocess_mode='livesum'
+)
+SCRAPER_DURATION = Histogram(
+    'ipl_scraper_job_duration_seconds', 'Scraper and data load job duration',
+    ['job', 'outcome'], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+
+def track_scraper_job(job):
+    """Decorator recording how long a scraper job took and whether it raised."""
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = f(*args, **kwargs)
+                outcome = 'success'
+                return result
+            finally:
+                SCRAPER_DURATION.labels(job, outcome).observe(time.perf_counter() - started)
+        return decorated
+    return decorator
+
+def mark_process_dead(pid):
+    """Call from the process manager's child-exit hook (gunicorn ``child_exit``)
+    so live gauges of a dead worker stop being summed."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+class Metrics:
+    def __init__(self, app=None):
+        self.caches = {}
+        self.sample_interval = 5
+        self.last_sample = 0.0
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SAMPLE_INTERVAL', 5)
+        if not app.config['METRICS_ENABLED']:
+            return
+        
+        self.app = app
+        self.sample_interval = app.config['METRICS_SAMPLE_INTERVAL']
+        app.before_request(self.start)
+        app.after_request(self.record_status)
+        app.teardown_request(self.finish)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+    
+    def register_cache(self, name, cache):
+        """Expose the hits/misses counters of a TTLCache."""
+        self.caches[name] = cache
+    
+    def start(self):
+        if request.endpoint == 'metrics':
+            return
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.labels(request.blueprint or '').inc()
+    
+    def record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+    
+    def finish(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        
+        blueprint = request.blueprint or ''
+        # Unmatched URLs share one label so 404 scans can't blow up cardinality
+        endpoint = request.endpoint or 'unmatched'
+        status = g.pop('metrics_status', 500)
+        IN_FLIGHT.labels(blueprint).dec()
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        RESPONSES.labels(blueprint, endpoint, request.method, str(status)).inc()
+        
+        # Pool and cache state are sampled, not read on every request
+        now = time.monotonic()
+        if now - self.last_sample >= self.sample_interval:
+            self.last_sample = now
+            self.sample()
+    
+    def sample(self):
+        from app.extensions import db
+        binds = [None] + list(self.app.config.get('SQLALCHEMY_BINDS') or {})
+        for bind in binds:
+            pool = db.get_engine(self.app, bind).pool
+            # Only QueuePool keeps these; NullPool/StaticPool (SQLite) do not
+            for state in ('size', 'checkedin', 'checkedout', 'overflow'):
+                if hasattr(pool, state):
+                    DB_POOL.labels(bind or 'primary', state).set(getattr(pool, state)())
+        
+        for name, cache in self.caches.items():
+            CACHE_LOOKUPS.labels(name, 'hit').set(cache.hits)
+            CACHE_LOOKUPS.labels(name, 'miss').set(cache.misses)
+    
+    def export(self):
+        self.sample()
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,154 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from datetime import datetime
+from flask import current_app, g, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+# <epoch ms>-<endpoint>-<duration>ms-<pid>.prof
+_PROFILE_NAME = re.compile(r'^(\d+)-([\w.]+)-(\d+)ms-(\d+)\.prof$')
+
+def _requested_by_admin():
+    """True when the request comes from an admin, by session or by API token."""
+    if current_user.is_authenticated:
+        return current_user.is_admin()
+    from app.routes.auth import get_token_user_id
+    from app.models.user import User
+    user_id = get_token_user_id()
+    user = User.get_cached(user_id) if user_id else None
+    return bool(user and user.is_admin())
+
+class RequestProfiler:
+    """Runs selected requests under cProfile and writes each profile as a
+    pstats file to a rotating directory.
+    
+    A request is profiled when it carries the PROFILER_HEADER and either that
+    header holds PROFILER_TOKEN or the caller is an admin, or when it is
+    picked at PROFILER_SAMPLE_RATE (optionally only for
+    PROFILER_SAMPLE_ENDPOINTS).
+    """
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_ENABLED', False)
+        app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+        app.config.setdefault('PROFILER_TOKEN', None)
+        app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILER_SAMPLE_ENDPOINTS', None)
+        app.config.setdefault('PROFILER_DIR', None)
+        app.config.setdefault('PROFILER_MAX_FILES', 200)
+        
+        if not app.config['PROFILER_ENABLED']:
+            return
+        
+        app.before_request(self.start)
+        app.after_request(self.add_header)
+        app.teardown_request(self.finish)
+    
+    @staticmethod
+    def profile_dir(app=None):
+        app = app or current_app
+        return app.config['PROFILER_DIR'] or os.path.join(app.instance_path, 'profiles')
+    
+    def should_profile(self):
+        config = current_app.config
+        requested = request.headers.get(config['PROFILER_HEADER'])
+        if requested:
+            token = config['PROFILER_TOKEN']
+            if token and hmac.compare_digest(requested, token):
+                return True
+            return _requested_by_admin()
+        
+        rate = config['PROFILER_SAMPLE_RATE']
+        if rate <= 0:
+            return False
+        endpoints = config['PROFILER_SAMPLE_ENDPOINTS']
+        if endpoints and request.endpoint not in endpoints:
+            return False
+        return random.random() < rate
+    
+    def start(self):
+        if request.endpoint in (None, 'static') or not self.should_profile():
+            return
+        
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (or a debugger's tracer) already owns this thread
+            return
+        g.profile = profile
+        g.profile_started = time.perf_counter()
+        g.profile_id = f'{int(time.time() * 1000)}-{request.endpoint}'
+    
+    def add_header(self, response):
+        if 'profile' in g:
+            response.headers['X-Profile-Id'] = g.profile_id
+        return response
+    
+    def finish(self, exc):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        profile.disable()
+        
+        duration_ms = int((time.perf_counter() - g.pop('profile_started')) * 1000)
+        name = f"{g.pop('profile_id')}-{duration_ms}ms-{os.getpid()}.prof"
+        directory = self.profile_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profile.dump_stats(os.path.join(directory, name))
+            self.rotate(directory, current_app.config['PROFILER_MAX_FILES'])
+        except OSError:
+            logger.exception('Could not write profile to %s', directory)
+    
+    @staticmethod
+    def rotate(directory, max_files):
+        names = sorted(name for name in os.listdir(directory) if _PROFILE_NAME.match(name))
+        for name in names[:max(len(names) - max_files, 0)]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+def list_profiles(directory):
+    """Profiles in ``directory``, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    
+    profiles = []
+    for name in os.listdir(directory):
+        match = _PROFILE_NAME.match(name)
+        if not match:
+            continue
+        captured_ms, endpoint, duration_ms, pid = match.groups()
+        profiles.append({
+            'name': name,
+            'captured_at': datetime.fromtimestamp(int(captured_ms) / 1000),
+            'endpoint': endpoint,
+            'duration_ms': int(duration_ms),
+            'pid': int(pid),
+            'size': os.path.getsize(os.path.join(directory, name))
+        })
+    return sorted(profiles, key=lambda p: p['captured_at'], reverse=True)
+
+def is_profile_name(name):
+    return bool(_PROFILE_NAME.match(name))
+
+def summarize_profile(path, sort='cumulative', limit=40):
+    """The top functions of a profile as pstats prints them."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,116 @@
+from sqlalchemy import text
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance, TeamHeadToHead, SeasonStanding
+from app.models.auction import AuctionLot, AuctionBid
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.venue import VenueSeasonStats
+from app.models.delivery import Delivery
+from app.models.fantasy import FantasyEntry, FantasyTeamPoints
+
+def route_queries():
+    """The query shapes the routes run, each with the indexes its plan
+    is expected to use. Keep this in step with api.py and main_bp.py."""
+    return [
+        ('main_bp.player_detail, main_bp.team_detail', 'player performances',
+         PlayerPerformance.query.filter_by(player_id=1),
+         ['ix_player_performances_player_id_match_id']),
+        ('api.get_match, main_bp.match_detail', 'match scorecard',
+         PlayerPerformance.query.filter_by(match_id=1),
+         ['ix_player_performances_match_id']),
+        ('api.get_dashboard_data', 'runs leaderboard',
+         db.session.query(Player, db.func.sum(PlayerPerformance.runs_scored))
+         .join(PlayerPerformance).group_by(Player.id),
+         ['ix_player_performances_player_id_match_id']),
+        ('main_bp.team_detail, api.get_matches', 'team fixtures',
+         Match.query.filter((Match.team1_id == 1) | (Match.team2_id == 1)).order_by(Match.match_date.desc()),
+         ['ix_matches_team1_id_match_date', 'ix_matches_team2_id_match_date']),
+        ('api.get_matches, main_bp.matches', 'season fixtures',
+         Match.query.filter_by(season='2023').order_by(Match.match_date.desc()),
+         ['ix_matches_season_match_date']),
+        ('main_bp.index', 'recent matches',
+         Match.query.order_by(Match.match_date.desc()).limit(5),
+         ['ix_matches_match_date']),
+        ('main_bp.team_detail', 'squad',
+         Player.query.filter_by(team_id=1),
+         ['ix_players_team_id']),
+        ('main_bp.player_detail', 'players with the same role',
+         Player.query.filter(Player.role == 'Batsman', Player.id != 1).limit(5),
+         ['ix_players_role']),
+        ('main_bp.player_detail', 'market value',
+         AuctionLot.query.filter_by(player_id=1).order_by(AuctionLot.sold_price.desc()).limit(1),
+         ['ix_auction_lots_player_id_sold_price']),
+        ('api.get_auction_lots, main_bp.auction_detail', 'auction lots',
+         AuctionLot.query.filter_by(auction_id=1),
+         ['ix_auction_lots_auction_id_status']),
+        ('api.place_bid', 'lot bids',
+         AuctionBid.query.filter_by(lot_id=1).order_by(AuctionBid.bid_amount.desc()),
+         ['ix_auction_bids_lot_id_bid_amount']),
+        ('AuctionBid.get_team_bids', 'team bids',
+         AuctionBid.query.filter_by(team_id=1),
+         ['ix_auction_bids_team_id']),
+        ('api.place_bid', 'team by owner',
+         Team.query.filter_by(owner_id=1),
+         ['ix_teams_owner_id']),
+        ('main_bp.myteam, main_bp.player_detail', 'user teams',
+         UserTeam.query.filter_by(user_id=1),
+         ['ix_user_teams_user_id']),
+        ('api.get_head_to_head, api.compare', 'head to head pair',
+         TeamHeadToHead.query.filter_by(season='all', team_a_id=1, team_b_id=2),
+         ['ix_team_head_to_head_season_team_a_id_team_b_id']),
+        ('api.get_head_to_head_matrix', 'head to head matrix',
+         TeamHeadToHead.query.filter_by(season='2023'),
+         ['ix_team_head_to_head_season_team_a_id_team_b_id']),
+        ('admin.record_result', 'venue rollup rows',
+         VenueSeasonStats.query.filter(VenueSeasonStats.venue_id == 1, VenueSeasonStats.season.in_(['2023', 'all'])),
+         ['ix_venue_season_stats_venue_id_season']),
+        ('admin.record_result', 'venue recount',
+         Match.query.filter(Match.venue_id == 1),
+         ['ix_matches_venue_id_season']),
+        ('api.get_season_table', 'season standings',
+         SeasonStanding.query.filter_by(season='2023'),
+         ['ix_season_standings_season_team_id']),
+        ('api.get_match_scorecard, admin.add_match_deliveries', 'match deliveries',
+         Delivery.query.filter_by(match_id=1).order_by(Delivery.innings, Delivery.over, Delivery.ball),
+         ['ix_deliveries_match_id_innings_over_ball']),
+        ('admin.score_match_fantasy', 'squads holding a player',
+         UserTeamPlayer.query.filter(UserTeamPlayer.player_id.in_([1, 2])),
+         ['ix_user_team_players_player_id']),
+        ('api.get_fantasy_rank, admin.score_match_fantasy', 'contest entry',
+         FantasyEntry.query.filter_by(contest_id=1, user_team_id=1),
+         ['ix_fantasy_entries_contest_id_user_team_id']),
+        ('admin.score_match_fantasy', 'team points for a match',
+         FantasyTeamPoints.query.filter_by(match_id=1),
+         ['ix_fantasy_team_points_match_id']),
+        ('main_bp.user_team_detail', 'team points per match',
+         FantasyTeamPoints.query.filter_by(user_team_id=1),
+         ['ix_fantasy_team_points_user_team_id_match_id']),
+        ('main_bp.add_player, main_bp.player_picker', 'player picker page',
+         Player.query.filter(Player.name > 'A').order_by(Player.name, Player.id).limit(25),
+         ['ix_players_name']),
+        ('main_bp.add_player, main_bp.player_picker', 'player picker by nationality',
+         Player.query.filter_by(nationality='India'),
+         ['ix_players_nationality']),
+        ('main_bp.add_player, main_bp.player_picker', 'player picker by price',
+         Player.query.filter(Player.current_value.between(1, 2)),
+         ['ix_players_current_value']),
+    ]
+
+def explain(query):
+    """Return the database's plan for a query as a single line of text."""
+    dialect = db.engine.dialect
+    statement = query.statement if hasattr(query, 'statement') else query
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    
+    if dialect.name == 'sqlite':
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+        return ' | '.join(row[-1] for row in rows)
+    
+    rows = db.session.execute(text(f'EXPLAIN {sql}')).mappings().fetchall()
+    return ' | '.join(f"{row.get('table')}: key={row.get('key')}" for row in rows)
+
+def verify_route_indexes():
+    """Yield (routes, description, plan, missing_indexes) for every route query."""
+    for routes, description, query, indexes in route_queries():
+        plan = explain(query)
+        yield routes, description, plan, [index for index in indexes if index not in plan]
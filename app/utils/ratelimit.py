@@ -0,0 +1,191 @@
+import threading
+import time
+from flask import current_app, request, jsonify, render_template, session, g
+
+PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+def parse_limits(spec):
+    """Parse a limit string such as "200 per day;50 per hour;1 per second"
+    into a tuple of (requests, window_seconds) pairs."""
+    limits = []
+    for part in (spec or '').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        count, _, period = part.partition(' per ')
+        amount, _, unit = period.strip().rpartition(' ')
+        unit = unit.rstrip('s')
+        if unit not in PERIODS:
+            raise ValueError(f'Unknown rate limit period in "{part}"')
+        limits.append((int(count), (int(amount) if amount else 1) * PERIODS[unit]))
+    return tuple(limits)
+
+def _estimate(previous, current, elapsed_fraction):
+    # Sliding window counter: the previous window's hits are weighted by how
+    # much of it still overlaps the trailing window.
+    return previous * (1.0 - elapsed_fraction) + current
+
+class MemoryBackend:
+    """Per-process counters, suitable for a single worker or for tests."""
+    
+    def __init__(self, sweep_every=10000):
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.sweep_every = sweep_every
+        self.hits = 0
+    
+    def hit(self, key, limits, now):
+        with self.lock:
+            states = []
+            for limit, window in limits:
+                index = int(now // window)
+                state = self.windows.get((key, window))
+                if state is None:
+                    state = self.windows[(key, window)] = [index, 0, 0]
+                elif state[0] != index:
+                    state[2] = state[1] if state[0] == index - 1 else 0
+                    state[1] = 0
+                    state[0] = index
+                elapsed_fraction = (now - index * window) / window
+                used = _estimate(state[2], state[1], elapsed_fraction)
+                if used + 1 > limit:
+                    return False, limit, 0, (index + 1) * window - now
+                states.append((state, limit, used, index, window))
+            
+            for state, _, _, _, _ in states:
+                state[1] += 1
+            
+            self.hits += 1
+            if self.hits % self.sweep_every == 0:
+                self._sweep(now)
+            
+            state, limit, used, index, window = min(states, key=lambda s: s[1] - s[2])
+            return True, limit, max(int(limit - used - 1), 0), (index + 1) * window - now
+    
+    def _sweep(self, now):
+        stale = [key for key, state in self.windows.items()
+                 if state[0] < int(now // key[1]) - 1]
+        for key in stale:
+            del self.windows[key]
+
+class CacheBackend:
+    """Counters kept in the shared Flask-Caching store, so every worker
+    pointing at the same redis/memcached cache enforces one budget."""
+    
+    def __init__(self, cache):
+        self.cache = cache
+    
+    def hit(self, key, limits, now):
+        keys = []
+        for limit, window in limits:
+            index = int(now // window)
+            keys.append(f'rl:{key}:{window}:{index}')
+            keys.append(f'rl:{key}:{window}:{index - 1}')
+        counts = self.cache.get_many(*keys)
+        
+        tightest = None
+        for position, (limit, window) in enumerate(limits):
+            index = int(now // window)
+            current = counts[position * 2] or 0
+            previous = counts[position * 2 + 1] or 0
+            used = _estimate(previous, current, (now - index * window) / window)
+            reset = (index + 1) * window - now
+            if used + 1 > limit:
+                return False, limit, 0, reset
+            if tightest is None or limit - used < tightest[0] - tightest[1]:
+                tightest = (limit, used, reset)
+        
+        backend = self.cache.cache
+        for position, (limit, window) in enumerate(limits):
+            current_key = keys[position * 2]
+            backend.add(current_key, 0, timeout=window * 2)
+            backend.inc(current_key)
+        
+        limit, used, reset = tightest
+        return True, limit, max(int(limit - used - 1), 0), reset
+
+def default_key():
+    """Rate limit by authenticated user where possible, otherwise by IP."""
+    from app.routes.auth import get_token_user_id
+    
+    user_id = get_token_user_id() or session.get('_user_id')
+    if user_id:
+        return f'user:{user_id}'
+    return f'ip:{request.remote_addr}'
+
+class RateLimiter:
+    def __init__(self, app=None, key_func=default_key):
+        self.key_func = key_func
+        self.backend = None
+        self.default_limits = ()
+        self.endpoint_limits = {}
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'memory')
+        app.config.setdefault('RATELIMIT_ENDPOINTS', {})
+        
+        self.default_limits = parse_limits(app.config.get('RATELIMIT_DEFAULT'))
+        # An endpoint mapped to None is exempt
+        self.endpoint_limits = {
+            endpoint: parse_limits(spec) if spec else ()
+            for endpoint, spec in app.config['RATELIMIT_ENDPOINTS'].items()
+        }
+        
+        if app.config['RATELIMIT_STORAGE'] == 'cache':
+            from app.extensions import cache
+            self.backend = CacheBackend(cache)
+        else:
+            self.backend = MemoryBackend()
+        
+        if app.config['RATELIMIT_ENABLED']:
+            app.before_request(self.check)
+            app.after_request(self.add_headers)
+    
+    def limits_for(self, endpoint):
+        """The limits of an endpoint: its own entry, else its blueprint's,
+        else RATELIMIT_DEFAULT."""
+        if endpoint in self.endpoint_limits:
+            return self.endpoint_limits[endpoint]
+        blueprint = endpoint.rpartition('.')[0] if endpoint else ''
+        if blueprint in self.endpoint_limits:
+            return self.endpoint_limits[blueprint]
+        return self.default_limits
+    
+    def check(self):
+        limits = self.limits_for(request.endpoint)
+        if not limits:
+            return None
+        
+        # Every endpoint counts separately, so a page and the requests its
+        # own scripts make do not use up each other's budget
+        key = f'{self.key_func()}:{request.endpoint}'
+        allowed, limit, remaining, reset = self.backend.hit(key, limits, time.time())
+        g.rate_limit = (limit, remaining, reset)
+        if allowed:
+            return None
+        
+        retry_after = max(int(reset + 0.999), 1)
+        if request.blueprint == 'api' or request.is_json or not request.accept_mimetypes.accept_html:
+            response = jsonify({'message': 'Rate limit exceeded'})
+        else:
+            response = current_app.make_response(render_template('429.html', retry_after=retry_after))
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    
+    def add_headers(self, response):
+        rate_limit = g.get('rate_limit')
+        if rate_limit:
+            limit, remaining, reset = rate_limit
+            response.headers['X-RateLimit-Limit'] = str(limit)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+            response.headers['X-RateLimit-Reset'] = str(max(int(reset + 0.999), 1))
+        return response
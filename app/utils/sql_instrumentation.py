@@ -0,0 +1,128 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_NAMED_PARAMS = re.compile(r'%\(\w+\)s|%s|:\w+')
+_WHITESPACE = re.compile(r'\s+')
+_SELECT_LIST = re.compile(r'^SELECT .+? FROM ')
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in testing when a request runs more queries than its budget."""
+
+def fingerprint(statement):
+    """Reduce a statement to its shape, so the same query with different
+    parameters or IN-list lengths counts as one."""
+    shape = _NAMED_PARAMS.sub('?', statement)
+    shape = _LITERALS.sub('?', shape)
+    shape = _PARAM_LISTS.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+def _summarize(shape, limit=200):
+    # The column list is noise in a log line; the FROM/WHERE part identifies the query
+    return _SELECT_LIST.sub('SELECT ... FROM ', shape)[:limit]
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+    
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[fingerprint(statement)] += 1
+    
+    def repeated_selects(self, threshold):
+        return [(shape, count) for shape, count in self.statements.most_common()
+                if count > threshold and shape.upper().startswith('SELECT')]
+
+def current_query_stats():
+    """The statistics gathered so far for the current request, or None."""
+    return g.get('sql_stats') if has_request_context() else None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context rather than the connection, so a statement
+    # that raises leaves nothing behind to pair with the next one
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_started)
+
+class QueryInstrumentation:
+    """Counts statements, database time and repeated statement shapes per
+    request, reports them as a Server-Timing header and a log line, and
+    flags likely N+1 patterns."""
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('SQL_INSTRUMENTATION_ENABLED', True)
+        app.config.setdefault('SQL_NPLUS1_THRESHOLD', 5)
+        app.config.setdefault('SQL_QUERY_BUDGET', None)
+        
+        if not app.config['SQL_INSTRUMENTATION_ENABLED']:
+            return
+        
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        
+        app.before_request(self.start)
+        app.after_request(self.report)
+    
+    def start(self):
+        g.sql_stats = RequestQueryStats()
+    
+    def report(self, response):
+        stats = current_query_stats()
+        if stats is None:
+            return response
+        
+        config = current_app.config
+        db_ms = round(stats.seconds * 1000, 2)
+        response.headers.add('Server-Timing', f'db;dur={db_ms};desc="{stats.count} queries"')
+        
+        repeated = stats.repeated_selects(config['SQL_NPLUS1_THRESHOLD'])
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': db_ms
+        }
+        if repeated:
+            record['n_plus_one'] = [{'count': count, 'statement': _summarize(shape)} for shape, count in repeated]
+            logger.warning('sql %s', json.dumps(record))
+        else:
+            logger.info('sql %s', json.dumps(record))
+        
+        budget = self.budget_for(request.endpoint)
+        if current_app.testing and budget is not None and stats.count > budget:
+            raise QueryBudgetExceeded(
+                f'{request.endpoint} ran {stats.count} queries, budget is {budget}'
+                + (f'; repeated: {repeated[0][1]}x {_summarize(repeated[0][0], 120)}' if repeated else '')
+            )
+        return response
+    
+    @staticmethod
+    def budget_for(endpoint):
+        """SQL_QUERY_BUDGET is either one number for every route or a dict of
+        endpoint -> number, with an optional 'default' entry."""
+        budget = current_app.config['SQL_QUERY_BUDGET']
+        if isinstance(budget, dict):
+            return budget.get(endpoint, budget.get('default'))
+        return budget
@@ -0,0 +1,397 @@
+"""Auction night load simulation.
+
+Seeds a throwaway SQLite database with teams, owners and an ongoing auction,
+then runs one client thread per team owner against ``place_bid``, the lot
+listing and the purse endpoint. Lots are auctioned one at a time; when every
+client has dropped out of a lot it is settled and the room moves on.
+
+    python -m benchmarks.auction_simulation --teams 10 --lots 600
+    python -m benchmarks.auction_simulation --wsgi --json results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.team import Team, Player
+from app.models.auction import Auction, AuctionLot, AuctionBid, TeamPurse
+from app.services.auction_settlement import settle_lot
+
+BASE_PRICES = [2000000, 5000000, 7500000, 10000000, 15000000, 20000000]
+STRATEGIES = ['value', 'aggressive', 'conservative']
+
+def make_config(database_path):
+    class SimulationConfig(Config):
+        TESTING = True
+        RATELIMIT_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database_path}'
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+    return SimulationConfig
+
+def bid_increment(price):
+    if price < 10000000:
+        return 500000
+    if price < 20000000:
+        return 1000000
+    return 2500000
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def seed(app, teams, lots):
+    with app.app_context():
+        db.create_all()
+        owners = [User(username=f'owner{i}', email=f'owner{i}@example.com', role='team_owner')
+                  for i in range(teams)]
+        db.session.add_all(owners)
+        db.session.flush()
+        
+        db.session.add_all([Team(name=f'Sim Team {i}', short_name=f'ST{i}', owner_id=owner.id)
+                            for i, owner in enumerate(owners)])
+        players = [Player(name=f'Auction Player {i}', role=random.choice(['Batsman', 'Bowler', 'All-Rounder', 'Wicket-Keeper']))
+                   for i in range(lots)]
+        db.session.add_all(players)
+        
+        auction = Auction(season=str(datetime.utcnow().year), auction_date=datetime.utcnow(),
+                          venue='Simulation', status='ongoing')
+        db.session.add(auction)
+        db.session.flush()
+        
+        db.session.add_all([AuctionLot(auction_id=auction.id, player_id=player.id,
+                                       base_price=random.choice(BASE_PRICES))
+                            for player in players])
+        db.session.commit()
+        
+        secret = app.config['JWT_SECRET_KEY']
+        expires = datetime.utcnow() + timedelta(days=1)
+        tokens = [jwt.encode({'user_id': owner.id, 'exp': expires}, secret, algorithm='HS256')
+                  for owner in owners]
+        lot_rows = [(lot.id, lot.base_price) for lot in
+                    AuctionLot.query.filter_by(auction_id=auction.id).order_by(AuctionLot.id).all()]
+        return auction.id, tokens, lot_rows
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.app = app
+    
+    def session(self):
+        client = self.app.test_client()
+        
+        def request(method, path, token, body=None):
+            response = client.open(path, method=method, json=body,
+                                   headers={'Authorization': f'Bearer {token}'})
+            return response.status_code, response.get_json(silent=True)
+        return request
+
+class WSGITransport:
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def session(self):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        
+        def request(method, path, token, body=None):
+            headers = {'Authorization': f'Bearer {token}'}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+            try:
+                return response.status, json.loads(data)
+            except ValueError:
+                return response.status, None
+        return request
+    
+    def close(self):
+        self.server.shutdown()
+
+class AuctionRoom:
+    """What every owner can see on the screen: the lot under the hammer,
+    its current price and who holds it."""
+    
+    def __init__(self, lots, clients):
+        self.lots = lots
+        self.lock = threading.Lock()
+        self.index = 0
+        self.price = None
+        self.leader = None
+        self.active = set(range(clients))
+        self.clients = clients
+    
+    def open_lot(self):
+        lot_id, base_price = self.lots[self.index]
+        self.price = base_price
+        self.leader = None
+        self.active = set(range(self.clients))
+    
+    def snapshot(self):
+        with self.lock:
+            return self.price, self.leader, len(self.active)
+    
+    def record_bid(self, client, amount):
+        with self.lock:
+            if amount > self.price:
+                self.price = amount
+                self.leader = client
+    
+    def drop_out(self, client):
+        with self.lock:
+            self.active.discard(client)
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.rejections = Counter()
+    
+    def record(self, endpoint, status, seconds, message=None):
+        with self.lock:
+            self.latencies[endpoint].append(seconds * 1000)
+            self.statuses[endpoint][status] += 1
+            if endpoint == 'place_bid' and status != 200:
+                self.rejections[message or f'HTTP {status}'] += 1
+
+def run_client(client, strategy, request, token, auction_id, room, barrier, stats, args):
+    rng = random.Random(args.seed * 1000 + client)
+    remaining_purse = None
+    open_slots = None
+    
+    def call(endpoint, method, path, body=None):
+        started = time.perf_counter()
+        status, data = request(method, path, token, body)
+        message = data.get('message') if isinstance(data, dict) else None
+        stats.record(endpoint, status, time.perf_counter() - started, message)
+        return status, data
+    
+    for index in range(len(room.lots)):
+        lot_id, base_price = room.lots[index]
+        
+        if index % args.list_every == client % args.list_every:
+            call('get_auction_lots', 'GET', f'/api/auctions/{auction_id}/lots')
+        
+        status, purses = call('get_auction_purses', 'GET', f'/api/auctions/{auction_id}/purses')
+        if status == 200:
+            mine = purses[client]
+            remaining_purse = mine['remaining_purse']
+            open_slots = max(mine['max_squad_size'] - mine['squad_size'], 0)
+        
+        valuation = base_price * rng.lognormvariate(0.6, 0.5)
+        if strategy == 'aggressive':
+            valuation *= 1.3
+        elif strategy == 'conservative' and remaining_purse is not None and open_slots:
+            # Pace spending so the purse lasts for the remaining slots
+            valuation = min(valuation, remaining_purse / open_slots * 1.5)
+        
+        if open_slots == 0:
+            # Owners know when their squad is full and sit the rest out
+            room.drop_out(client)
+        
+        bids = 0
+        while open_slots != 0:
+            price, leader, active = room.snapshot()
+            if leader == client:
+                if active <= 1:
+                    break
+                time.sleep(0.0005)
+                continue
+            
+            amount = price + bid_increment(price)
+            if strategy == 'aggressive' and rng.random() < 0.2:
+                amount += bid_increment(amount)
+            if amount > valuation or bids >= args.max_bids_per_lot:
+                room.drop_out(client)
+                if leader is None and active <= 1:
+                    break
+                if leader is not None:
+                    break
+                time.sleep(0.0005)
+                continue
+            
+            bids += 1
+            status, data = call('place_bid', 'POST', f'/api/auctions/{auction_id}/bid',
+                                {'lot_id': lot_id, 'bid_amount': amount})
+            if status == 200:
+                room.record_bid(client, amount)
+            elif data and data.get('message') in ('Insufficient purse for this bid', 'Squad is already full'):
+                room.drop_out(client)
+                break
+        
+        room.drop_out(client)
+        barrier.wait()
+
+def check_invariants(app, auction_id):
+    """Return a list of invariant violations found in the final database."""
+    violations = []
+    with app.app_context():
+        lots = {lot.id: lot for lot in AuctionLot.query.filter_by(auction_id=auction_id).all()}
+        bids_by_lot = defaultdict(list)
+        for bid in (AuctionBid.query.join(AuctionLot)
+                    .filter(AuctionLot.auction_id == auction_id)
+                    .order_by(AuctionBid.id).all()):
+            bids_by_lot[bid.lot_id].append(bid)
+        
+        for lot_id, lot in lots.items():
+            bids = bids_by_lot.get(lot_id, [])
+            highest = lot.base_price
+            for bid in bids:
+                if bid.bid_amount <= highest:
+                    violations.append(f'lot {lot_id}: bid {bid.id} of {bid.bid_amount} not above {highest}')
+                highest = max(highest, bid.bid_amount)
+            
+            if bids:
+                top = max(bid.bid_amount for bid in bids)
+                winners = {bid.team_id for bid in bids if bid.bid_amount == top}
+                if len(winners) > 1:
+                    violations.append(f'lot {lot_id}: {len(winners)} teams hold the winning bid')
+                if lot.status != 'sold':
+                    violations.append(f'lot {lot_id}: has bids but was not sold')
+                elif lot.sold_price != top or lot.sold_to_team_id not in winners:
+                    violations.append(f'lot {lot_id}: sold to {lot.sold_to_team_id} for {lot.sold_price}, top bid {top}')
+            elif lot.status == 'sold':
+                violations.append(f'lot {lot_id}: sold without bids')
+        
+        spent = defaultdict(float)
+        bought = Counter()
+        for lot in lots.values():
+            if lot.status == 'sold':
+                spent[lot.sold_to_team_id] += lot.sold_price
+                bought[lot.sold_to_team_id] += 1
+        for purse in TeamPurse.query.filter_by(auction_id=auction_id).all():
+            if abs(purse.spent_amount - spent[purse.team_id]) > 0.01:
+                violations.append(f'team {purse.team_id}: ledger spent {purse.spent_amount}, lots sum to {spent[purse.team_id]}')
+            if purse.players_bought != bought[purse.team_id]:
+                violations.append(f'team {purse.team_id}: ledger bought {purse.players_bought}, lots show {bought[purse.team_id]}')
+            if abs(purse.committed_amount) > 0.01 or purse.leading_lots != 0:
+                violations.append(f'team {purse.team_id}: {purse.committed_amount} still committed after settlement')
+            if purse.remaining_purse < -0.01:
+                violations.append(f'team {purse.team_id}: purse overdrawn by {-purse.remaining_purse}')
+    return violations
+
+def simulate(args):
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix='auction-sim-')
+    app = create_app(make_config(os.path.join(workdir, 'auction.db')))
+    auction_id, tokens, lots = seed(app, args.teams, args.lots)
+    
+    transport = WSGITransport(app) if args.wsgi else TestClientTransport(app)
+    room = AuctionRoom(lots, args.teams)
+    stats = Stats()
+    settle_failures = []
+    
+    def close_lot():
+        lot_id, _ = room.lots[room.index]
+        try:
+            with app.app_context():
+                settle_lot(auction_id, lot_id)
+        except Exception as e:
+            settle_failures.append(f'lot {lot_id}: {e}')
+        room.index += 1
+        if room.index < len(room.lots):
+            room.open_lot()
+    
+    room.open_lot()
+    barrier = threading.Barrier(args.teams, action=close_lot)
+    threads = [threading.Thread(target=run_client,
+                                args=(i, STRATEGIES[i % len(STRATEGIES)], transport.session(), tokens[i],
+                                      auction_id, room, barrier, stats, args))
+               for i in range(args.teams)]
+    
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    if args.wsgi:
+        transport.close()
+    
+    endpoints = {}
+    for endpoint, values in stats.latencies.items():
+        values.sort()
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+            'max_ms': round(values[-1], 2),
+            'statuses': dict(stats.statuses[endpoint])
+        }
+    total_requests = sum(len(values) for values in stats.latencies.values())
+    bids = endpoints.get('place_bid', {}).get('requests', 0)
+    rejected = sum(stats.rejections.values())
+    violations = check_invariants(app, auction_id) + settle_failures
+    
+    return {
+        'teams': args.teams,
+        'lots': args.lots,
+        'transport': 'wsgi' if args.wsgi else 'test_client',
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(total_requests / elapsed, 1) if elapsed else 0,
+        'bids': bids,
+        'bid_rejection_rate': round(rejected / bids, 4) if bids else 0,
+        'rejections': dict(stats.rejections),
+        'endpoints': endpoints,
+        'invariant_violations': violations
+    }
+
+def print_report(report):
+    print(f"{report['teams']} teams x {report['lots']} lots over {report['transport']} "
+          f"in {report['elapsed_s']}s ({report['throughput_rps']} req/s)")
+    print(f"{'endpoint':<22}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint, row in sorted(report['endpoints'].items()):
+        print(f"{endpoint:<22}{row['requests']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+    print(f"bids: {report['bids']}, rejected: {report['bid_rejection_rate']:.1%}")
+    for message, count in sorted(report['rejections'].items(), key=lambda item: -item[1]):
+        print(f'  {count:>6}  {message}')
+    if report['invariant_violations']:
+        print(f"INVARIANTS VIOLATED ({len(report['invariant_violations'])}):")
+        for violation in report['invariant_violations'][:20]:
+            print(f'  {violation}')
+    else:
+        print('invariants: ok')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate auction night against the bidding API.')
+    parser.add_argument('--teams', type=int, default=10)
+    parser.add_argument('--lots', type=int, default=600)
+    parser.add_argument('--list-every', type=int, default=50,
+                        help='each owner reloads the full lot listing once every N lots')
+    parser.add_argument('--max-bids-per-lot', type=int, default=40)
+    parser.add_argument('--wsgi', action='store_true', help='serve over a local threaded WSGI server')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+    
+    report = simulate(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['invariant_violations'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
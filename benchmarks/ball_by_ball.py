@@ -0,0 +1,180 @@
+"""Ball-by-ball rebuild benchmark.
+
+Seeds a SQLite database with synthetic deliveries (about 5M, twenty seasons
+of matches by default), then times ``rebuild_from_deliveries`` in a fresh
+interpreter: every PlayerPerformance row and match total rederived, plus the
+rollups that read them. Reports the time, the peak memory of the rebuilding
+process and whether the totals add up, and fails over the time budget.
+
+    python -m benchmarks.ball_by_ball
+    python -m benchmarks.ball_by_ball --deliveries 500000 --budget-s 10 --json rebuild.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import create_app
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.match import Match
+from app.models.delivery import Delivery
+from benchmarks.datasets import TEAM_NAMES, innings_deliveries, make_config, schema_fingerprint
+
+SEASONS = 20
+ROSTER = 25
+MATCHES_PER_CHUNK = 1000
+SEED = 1
+
+CHILD = '''
+import json, resource, sys, time
+from benchmarks.datasets import make_config
+from app import create_app
+from app.extensions import db
+from app.models.match import Match
+from app.models.delivery import Delivery
+from app.services.ball_by_ball import rebuild_from_deliveries
+
+app = create_app(make_config(sys.argv[1]))
+with app.app_context():
+    before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    matches, deliveries = rebuild_from_deliveries()
+    db.session.commit()
+    seconds = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scored = db.session.query(db.func.sum(Match.team1_score + Match.team2_score)).scalar()
+    bowled = (db.session.query(db.func.sum(Delivery.runs + Delivery.extras))
+              .filter(Delivery.innings <= 2).scalar())
+print(json.dumps({'matches': matches, 'deliveries': deliveries, 'seconds': seconds,
+                  'baseline_mb': before_kb / 1024, 'peak_mb': peak_kb / 1024,
+                  'totals_match': scored == bowled}))
+'''
+
+def database_path(deliveries, data_dir=None):
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), 'ipl-benchmarks')
+    app = create_app(make_config(':memory:'))
+    with app.app_context():
+        fingerprint = schema_fingerprint()
+    return os.path.join(data_dir, f'deliveries-{deliveries}-{fingerprint}.db')
+
+def seed(path, deliveries):
+    rng = np.random.default_rng(SEED)
+    app = create_app(make_config(path))
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Team.__table__.insert(), [
+            {'name': name, 'short_name': short_name, 'home_ground': ground}
+            for name, short_name, ground in TEAM_NAMES])
+        teams = [team_id for team_id, in db.session.query(Team.id).order_by(Team.id)]
+        db.session.execute(Player.__table__.insert(), [
+            {'name': f'Player {team_id}-{n}', 'team_id': team_id, 'role': 'All-Rounder'}
+            for team_id in teams for n in range(ROSTER)])
+        rosters = np.array([[player_id for player_id, in db.session.query(Player.id)
+                             .filter_by(team_id=team_id).order_by(Player.id)] for team_id in teams])
+        names = {team_id: name for team_id, (name, _, _) in zip(teams, TEAM_NAMES)}
+        grounds = {team_id: ground for team_id, (_, _, ground) in zip(teams, TEAM_NAMES)}
+        
+        # About 2 x (120 + 8) deliveries a match
+        total = max(1, deliveries // 256)
+        per_season = max(1, total // SEASONS)
+        pairs = np.array([rng.choice(len(teams), 2, replace=False) for _ in range(total)])
+        db.session.execute(Match.__table__.insert(), [{
+            'match_date': datetime(2008 + min(n // per_season, SEASONS - 1), 3, 20) + timedelta(hours=n % per_season * 12),
+            'venue': grounds[teams[first]],
+            'team1_id': teams[first],
+            'team2_id': teams[second],
+            'result': f'{names[teams[first if n % 2 else second]]} won by 10 runs',
+            'season': str(2008 + min(n // per_season, SEASONS - 1)),
+            'match_type': 'league'
+        } for n, (first, second) in enumerate(pairs.tolist())])
+        match_ids = np.array([match_id for match_id, in db.session.query(Match.id).order_by(Match.id)])
+        
+        connection = db.session.connection().connection
+        sql = (f'INSERT INTO {Delivery.__tablename__} (match_id, innings, over, ball, batter_id, bowler_id, '
+               'runs, extras, extra_kind, wicket_kind, player_out_id, fielder_id) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+        for start in range(0, total, MATCHES_PER_CHUNK):
+            chunk = match_ids[start:start + MATCHES_PER_CHUNK]
+            sides = pairs[start:start + MATCHES_PER_CHUNK]
+            # Each match fields a different eleven from the squad
+            lineups = (np.arange(11)[None, :] + rng.integers(0, ROSTER, (len(chunk), 1))) % ROSTER
+            elevens = [np.take_along_axis(rosters[sides[:, side]], lineups, axis=1) for side in (0, 1)]
+            block = np.concatenate([innings_deliveries(rng, chunk, 1, *elevens),
+                                    innings_deliveries(rng, chunk, 2, *elevens[::-1])])
+            block = block[np.lexsort((block[:, 3], block[:, 2], block[:, 1], block[:, 0]))]
+            connection.executemany(sql, block.tolist())
+        db.session.execute(Delivery.__table__.update().values(
+            player_out_id=db.func.nullif(Delivery.player_out_id, 0),
+            fielder_id=db.func.nullif(Delivery.fielder_id, 0)))
+        db.session.commit()
+        count = db.session.query(db.func.count(Delivery.id)).scalar()
+        db.session.remove()
+        db.engine.dispose()
+    return count
+
+def ensure_database(deliveries, data_dir=None, rebuild=False):
+    """Path of the seeded database for about ``deliveries`` deliveries."""
+    path = database_path(deliveries, data_dir)
+    if os.path.exists(path) and not rebuild:
+        return path
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    started = time.perf_counter()
+    count = seed(partial, deliveries)
+    os.replace(partial, path)
+    print(f'seeded {count} deliveries in {time.perf_counter() - started:.1f}s: {path}', file=sys.stderr)
+    return path
+
+def run(args):
+    path = ensure_database(args.deliveries, rebuild=args.reseed)
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    result = subprocess.run([args.python, '-W', 'ignore', '-c', CHILD, path],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'rebuild failed:\n{result.stderr[-2000:]}')
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report.update(seconds=round(report['seconds'], 2), baseline_mb=round(report['baseline_mb'], 1),
+                  peak_mb=round(report['peak_mb'], 1), budget_s=args.budget_s)
+    report['deliveries_per_second'] = round(report['deliveries'] / report['seconds']) if report['seconds'] else None
+    return report
+
+def print_report(report):
+    print(f"rebuilt {report['matches']} matches from {report['deliveries']} deliveries in "
+          f"{report['seconds']}s ({report['deliveries_per_second']}/s, budget {report['budget_s']}s)")
+    print(f"peak memory {report['peak_mb']}MB (after startup {report['baseline_mb']}MB)")
+    if not report['totals_match']:
+        print('MATCH TOTALS DO NOT ADD UP TO THE DELIVERIES')
+    if report['seconds'] > report['budget_s']:
+        print('OVER BUDGET')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time rederiving performances and totals from deliveries.')
+    parser.add_argument('--deliveries', type=int, default=5000000)
+    parser.add_argument('--budget-s', type=float, default=60,
+                        help='fail when the rebuild takes longer than this')
+    parser.add_argument('--reseed', action='store_true', help='rebuild the cached database')
+    parser.add_argument('--python', default=sys.executable)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+    
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if not report['totals_match'] or report['seconds'] > args.budget_s else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Seeded SQLite databases at fixed scales for benchmarking.
+
+Every scale has ten franchises; they differ in roster depth, fixtures and,
+above all, the number of player performances:
+
+    small   ~1k performances
+    medium  ~100k performances
+    large   ~2M performances
+
+Databases are generated deterministically and cached by scale and schema, so
+comparing two commits with the same models reuses the same file.
+
+    python -m benchmarks.datasets large     # build ahead of time
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy.schema import CreateIndex, CreateTable
+from werkzeug.security import generate_password_hash
+
+from config import Config
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.auction import Auction, AuctionLot, AuctionBid
+from app.models.fantasy import FantasyContest, FantasyEntry
+from app.models.delivery import WIDE, NOBALL, BYE, LEGBYE, BOWLED, CAUGHT, LBW, RUN_OUT, STUMPED
+from app.services.ball_by_ball import append_deliveries, derive_match
+from app.services.head_to_head import rebuild_head_to_head
+from app.services.venues import rebuild_venues
+from app.services.points_table import rebuild_standings
+
+Scale = namedtuple('Scale', 'teams players_per_team matches lots')
+
+# 22 performances per match (two playing XIs)
+SCALES = {
+    'small': Scale(teams=10, players_per_team=25, matches=46, lots=100),
+    'medium': Scale(teams=10, players_per_team=60, matches=4600, lots=400),
+    'large': Scale(teams=10, players_per_team=150, matches=91000, lots=1000)
+}
+
+# Bump when the generated data changes so cached databases are rebuilt
+SEED_VERSION = 3
+CHUNK = 20000
+# Synthetic innings: six legal balls an over plus, some of the time, a wide
+# or no-ball as a seventh
+OVERS = 20
+SLOTS = 7
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+ADMIN_PASSWORD = 'bench-password'
+
+TEAM_NAMES = [
+    ('Mumbai Indians', 'MI', 'Wankhede Stadium'),
+    ('Chennai Super Kings', 'CSK', 'MA Chidambaram Stadium'),
+    ('Royal Challengers Bangalore', 'RCB', 'M Chinnaswamy Stadium'),
+    ('Kolkata Knight Riders', 'KKR', 'Eden Gardens'),
+    ('Delhi Capitals', 'DC', 'Arun Jaitley Stadium'),
+    ('Punjab Kings', 'PBKS', 'PCA Stadium'),
+    ('Rajasthan Royals', 'RR', 'Sawai Mansingh Stadium'),
+    ('Sunrisers Hyderabad', 'SRH', 'Rajiv Gandhi Stadium'),
+    ('Gujarat Titans', 'GT', 'Narendra Modi Stadium'),
+    ('Lucknow Super Giants', 'LSG', 'Ekana Stadium')
+]
+ROLES = ['Batsman', 'Bowler', 'All-Rounder', 'Wicket-Keeper']
+NATIONALITIES = ['India'] * 6 + ['Australia', 'England', 'South Africa', 'New Zealand', 'West Indies', 'Afghanistan']
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    RATELIMIT_ENABLED = False
+    PROFILER_ENABLED = False
+    SQLALCHEMY_REPLICA_URIS = []
+
+def make_config(database_path):
+    class DatasetConfig(BenchmarkConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database_path}'
+    return DatasetConfig
+
+def schema_fingerprint():
+    # Indexes too, so a new index does not reuse a database built without it
+    ddl = '\n'.join(str(statement.compile(dialect=db.engine.dialect))
+                    for table in db.metadata.sorted_tables
+                    for statement in [CreateTable(table)] + [CreateIndex(index) for index in
+                                                              sorted(table.indexes, key=lambda index: index.name)])
+    return hashlib.sha1(f'{SEED_VERSION}\n{ddl}'.encode()).hexdigest()[:10]
+
+def database_path(scale, data_dir=None):
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), 'ipl-benchmarks')
+    app = create_app(make_config(':memory:'))
+    with app.app_context():
+        fingerprint = schema_fingerprint()
+    return os.path.join(data_dir, f'{scale}-{fingerprint}.db')
+
+def innings_deliveries(rng, match_ids, innings, batting, fielding):
+    """Synthetic deliveries of one innings of each match, as rows of
+    match_id followed by the delivery FIELDS; absent players are 0.
+    ``batting`` and ``fielding`` hold each match's two elevens."""
+    count = len(match_ids)
+    shape = (count, OVERS, SLOTS)
+    over = np.broadcast_to(np.arange(OVERS)[None, :, None], shape)
+    ball = np.broadcast_to(np.arange(1, SLOTS + 1)[None, None, :], shape)
+    extra_slot = ball == SLOTS
+    bowled = ~extra_slot | (rng.random((count, OVERS, 1)) < 0.4)
+    
+    extra_kind = np.where(extra_slot, rng.choice([WIDE, NOBALL], shape),
+                          np.where(rng.random(shape) < 0.04, rng.choice([BYE, LEGBYE], shape), 0))
+    runs = np.where(np.isin(extra_kind, (WIDE, BYE, LEGBYE)), 0,
+                    rng.choice([0, 1, 2, 3, 4, 6], shape, p=[0.38, 0.34, 0.1, 0.01, 0.11, 0.06]))
+    wicket = bowled & (extra_kind != WIDE) & (rng.random(shape) < 0.045)
+    wicket_kind = np.where(wicket, rng.choice([BOWLED, CAUGHT, CAUGHT, LBW, RUN_OUT, STUMPED], shape), 0)
+    runs = np.where(wicket, 0, runs)
+    
+    # Nothing is bowled after the tenth wicket; a new batter comes in after each one
+    fallen = (np.cumsum(wicket.reshape(count, -1), axis=1) - wicket.reshape(count, -1)).reshape(shape)
+    bowled &= fallen < 10
+    position = np.minimum(fallen + (ball % 2), 10)
+    rows = np.arange(count)[:, None, None]
+    batter = batting[rows, position]
+    bowler = fielding[rows, over % 5 + 6]
+    fielder = np.where(np.isin(wicket_kind, (CAUGHT, RUN_OUT, STUMPED)),
+                       fielding[rows, rng.integers(0, 11, shape)], 0)
+    columns = [np.broadcast_to(match_ids[:, None, None], shape), np.full(shape, innings), over, ball,
+               batter, bowler, runs, (extra_kind > 0).astype(int), extra_kind, wicket_kind,
+               np.where(wicket, batter, 0), fielder]
+    return np.stack([column[bowled] for column in columns], axis=1)
+
+def insert_rows(table, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(table.insert(), rows[start:start + CHUNK])
+
+def seed(scale, rng):
+    spec = SCALES[scale]
+    now = datetime.utcnow()
+    
+    admin = User(username='bench-admin', email=ADMIN_EMAIL, role='admin',
+                 password_hash=generate_password_hash(ADMIN_PASSWORD))
+    owners = [User(username=f'owner{i}', email=f'owner{i}@example.com', role='team_owner')
+              for i in range(spec.teams)]
+    db.session.add_all([admin] + owners)
+    db.session.flush()
+    
+    teams = []
+    for i, owner in enumerate(owners):
+        name, short_name, ground = TEAM_NAMES[i % len(TEAM_NAMES)]
+        if i >= len(TEAM_NAMES):
+            name, short_name = f'{name} {i}', f'{short_name}{i}'
+        teams.append(Team(name=name, short_name=short_name, home_ground=ground, owner_id=owner.id))
+    db.session.add_all(teams)
+    db.session.flush()
+    team_ids = [team.id for team in teams]
+    venues = {team.id: team.home_ground for team in teams}
+    
+    insert_rows(Player.__table__, [{
+        'name': f'Player {team_index}-{n}',
+        'team_id': team_id,
+        'role': rng.choice(ROLES),
+        'nationality': rng.choice(NATIONALITIES),
+        'date_of_birth': (now - timedelta(days=rng.randint(18 * 365, 38 * 365))).date(),
+        'batting_style': rng.choice(['Right-handed', 'Left-handed']),
+        'bowling_style': rng.choice(['Right-arm fast', 'Right-arm medium', 'Left-arm spin', 'Off spin', 'Leg spin']),
+        'matches_played': rng.randint(0, 200),
+        'runs_scored': rng.randint(0, 6000),
+        'wickets_taken': rng.randint(0, 180),
+        'catches': rng.randint(0, 100),
+        'stumpings': rng.randint(0, 20),
+        'current_value': rng.randint(20, 1800) * 100000,
+        'base_price': rng.choice([2000000, 5000000, 10000000, 20000000])
+    } for team_index, team_id in enumerate(team_ids) for n in range(spec.players_per_team)])
+    
+    rosters = {team_id: [] for team_id in team_ids}
+    for player_id, team_id in db.session.query(Player.id, Player.team_id):
+        rosters[team_id].append(player_id)
+    
+    # Fixtures spread evenly over the seasons, most recent last
+    seasons = list(range(2008, now.year + 1))
+    per_season = max(1, spec.matches // len(seasons))
+    matches = []
+    for n in range(spec.matches):
+        season = seasons[min(n // per_season, len(seasons) - 1)]
+        team1, team2 = rng.sample(team_ids, 2)
+        score1, score2 = rng.randint(110, 240), rng.randint(110, 240)
+        matches.append({
+            'match_date': datetime(season, 3, 20) + timedelta(minutes=(n % per_season) * 90),
+            'venue': venues[team1],
+            'team1_id': team1,
+            'team2_id': team2,
+            'team1_score': score1,
+            'team2_score': score2,
+            'team1_overs': 20.0,
+            'team2_overs': rng.choice([20.0, 19.2, 18.4, 17.5]),
+            'team1_wickets': rng.randint(2, 10),
+            'team2_wickets': rng.randint(2, 10),
+            'result': f'Team {team1 if score1 > score2 else team2} won',
+            'season': str(season),
+            'match_type': 'league'
+        })
+    insert_rows(Match.__table__, matches)
+    
+    match_ids = [row[0] for row in db.session.query(Match.id).order_by(Match.id)]
+    performances = []
+    for match_id, match in zip(match_ids, matches):
+        for team_id in (match['team1_id'], match['team2_id']):
+            for player_id in rng.sample(rosters[team_id], 11):
+                balls = rng.randint(0, 60)
+                runs = rng.randint(0, int(balls * 2))
+                overs = rng.choice([0.0, 0.0, 1.0, 2.0, 3.0, 4.0])
+                conceded = int(overs * rng.randint(5, 12))
+                performances.append({
+                    'match_id': match_id,
+                    'player_id': player_id,
+                    'team_id': team_id,
+                    'runs_scored': runs,
+                    'balls_faced': balls,
+                    'fours': runs // 10,
+                    'sixes': runs // 25,
+                    'strike_rate': round(runs * 100.0 / balls, 2) if balls else 0.0,
+                    'overs_bowled': overs,
+                    'runs_conceded': conceded,
+                    'wickets_taken': rng.randint(0, 3) if overs else 0,
+                    'economy_rate': round(conceded / overs, 2) if overs else 0.0,
+                    'catches': rng.randint(0, 1),
+                    'stumpings': 0,
+                    'run_outs': 0
+                })
+        if len(performances) >= CHUNK:
+            insert_rows(PlayerPerformance.__table__, performances)
+            performances = []
+    insert_rows(PlayerPerformance.__table__, performances)
+    rebuild_head_to_head()
+    rebuild_venues()
+    rebuild_standings()
+    
+    # The latest match is also scored ball by ball, for the scorecard route
+    latest = Match.query.get(match_ids[-1])
+    generator = np.random.default_rng(SEED_VERSION)
+    elevens = [np.array([rng.sample(rosters[team_id], 11)]) for team_id in (latest.team1_id, latest.team2_id)]
+    block = np.concatenate([innings_deliveries(generator, np.array([latest.id]), 1, *elevens),
+                            innings_deliveries(generator, np.array([latest.id]), 2, *elevens[::-1])])
+    append_deliveries(latest, [row[1:10] + [row[10] or None, row[11] or None] for row in block.tolist()])
+    derive_match(latest)
+    
+    auction = Auction(season=str(now.year), auction_date=now, venue='Benchmark', status='ongoing')
+    db.session.add(auction)
+    db.session.flush()
+    player_ids = [player_id for roster in rosters.values() for player_id in roster]
+    insert_rows(AuctionLot.__table__, [{
+        'auction_id': auction.id,
+        'player_id': player_id,
+        'base_price': 2000000,
+        'status': 'unsold'
+    } for player_id in rng.sample(player_ids, min(spec.lots, len(player_ids)))])
+    lot_ids = [row[0] for row in db.session.query(AuctionLot.id).filter_by(auction_id=auction.id)]
+    insert_rows(AuctionBid.__table__, [{
+        'lot_id': lot_id,
+        'team_id': rng.choice(team_ids),
+        'bid_amount': 2000000 + step * 500000
+    } for lot_id in lot_ids for step in range(5)])
+    
+    user_team = UserTeam(user_id=admin.id, name='Bench XI')
+    db.session.add(user_team)
+    db.session.flush()
+    db.session.add_all([UserTeamPlayer(user_team_id=user_team.id, player_id=player_id)
+                        for player_id in rng.sample(player_ids, 11)])
+    contest = FantasyContest(name='Bench contest', version=0)
+    db.session.add(contest)
+    db.session.flush()
+    db.session.add(FantasyEntry(contest_id=contest.id, user_team_id=user_team.id, points=0, joined_at=now))
+    db.session.commit()
+
+def ensure_database(scale, data_dir=None, rebuild=False):
+    """Path of the seeded database for ``scale``, building it if needed."""
+    if scale not in SCALES:
+        raise ValueError(f'Unknown scale {scale!r}; expected one of {", ".join(SCALES)}')
+    
+    path = database_path(scale, data_dir)
+    if os.path.exists(path) and not rebuild:
+        return path
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    
+    started = time.perf_counter()
+    app = create_app(make_config(partial))
+    with app.app_context():
+        db.create_all()
+        seed(scale, random.Random(SEED_VERSION))
+        db.session.remove()
+        db.engine.dispose()
+    os.replace(partial, path)
+    print(f'seeded {scale} database in {time.perf_counter() - started:.1f}s: {path}', file=sys.stderr)
+    return path
+
+def table_counts(app):
+    with app.app_context():
+        return {table.name: db.session.execute(db.select([db.func.count()]).select_from(table)).scalar()
+                for table in db.metadata.sorted_tables}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or list(SCALES):
+        ensure_database(name)
@@ -0,0 +1,377 @@
+"""Endpoint benchmark suite.
+
+Runs every GET route of the ``api``, ``main_bp`` and ``admin`` blueprints
+through the test client against a seeded database (see benchmarks.datasets),
+logged in as an admin, and records per route: latency distribution, the cold
+first request, query count and DB time (from the SQL instrumentation) and
+peak Python memory of one traced request. Routes that write are skipped so
+repeated runs see the same data.
+
+    python -m benchmarks.endpoint_suite run --scale medium --json after.json
+    python -m benchmarks.endpoint_suite run --scale medium --baseline before.json
+    python -m benchmarks.endpoint_suite compare before.json after.json --latency 0.15
+
+Comparing exits non-zero when a route regresses past the thresholds. Per-route
+thresholds can be given as JSON: {"routes": {"api.get_dashboard_data": {"latency": 0.5}}}.
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import url_for
+from jose import jwt
+
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.team import Team, Player
+from app.models.match import Match
+from app.models.user_team import UserTeam
+from app.models.auction import Auction, AuctionLot
+from app.models.venue import Venue
+from app.models.fantasy import FantasyContest
+from app.utils.sql_instrumentation import current_query_stats
+from benchmarks.auction_simulation import percentile
+from benchmarks.datasets import ADMIN_EMAIL, ADMIN_PASSWORD, SCALES, ensure_database, make_config, table_counts
+
+BLUEPRINTS = ('api', 'main_bp', 'admin')
+
+# Extra query strings per endpoint; each entry is benchmarked as its own case
+SCENARIOS = {
+    'api.search': {'q': {'q': 'Player 1'}},
+    'api.search_players': {'q': {'q': 'Player 1'}},
+    'main_bp.search': {'q': {'q': 'Player 1'}},
+    'api.get_matches': {'season': {'season': '{season}'}, 'team': {'team_id': '{team_id}'}},
+    'api.get_players': {'role': {'role': 'Bowler'}},
+    'api.get_dashboard_data': {'year': {'year': '{season}'}},
+    'main_bp.compare': {'players': {'players': '{player_id},{other_player_id}'},
+                        'teams': {'teams': '{team_id},{other_team_id}'}},
+    'api.search_teams': {'q': {'q': 'Kings'}},
+    'api.compare': {'players': {'players': '{player_id},{other_player_id}'},
+                    'teams': {'teams': '{team_id},{other_team_id}'}},
+    'api.get_head_to_head': {'season': {'season': '{season}'}},
+    'api.get_head_to_head_matrix': {'season': {'season': '{season}'}},
+    'api.get_venues': {'season': {'season': '{season}'}},
+    'main_bp.player_picker': {'role': {'role': 'Bowler'}, 'q': {'q': 'Player 1'},
+                              'after': {'after': '{player_id}'}}
+}
+
+# URL parameters that mean something other than their name suggests
+PARAMETER_OVERRIDES = {
+    'main_bp.user_team_detail': {'team_id': 'user_team_id'},
+    'main_bp.add_player': {'team_id': 'user_team_id'},
+    'main_bp.player_picker': {'team_id': 'user_team_id'}
+}
+
+DEFAULT_THRESHOLDS = {
+    'latency': 0.20,        # allowed relative slowdown of the latency metric
+    'latency_metric': 'p95_ms',
+    'min_latency_ms': 2.0,  # ignore slowdowns smaller than this
+    'queries': 0,           # allowed extra queries per request
+    'memory': 0.25,         # allowed relative growth of peak memory
+    'min_memory_kb': 256
+}
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             text=True, stderr=subprocess.DEVNULL).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def sample_ids(app):
+    with app.app_context():
+        admin = User.query.filter_by(email=ADMIN_EMAIL).first()
+        teams = [team_id for team_id, in db.session.query(Team.id).order_by(Team.id).limit(2)]
+        players = [player_id for player_id, in db.session.query(Player.id).order_by(Player.id).limit(2)]
+        auction = Auction.query.order_by(Auction.id).first()
+        lot = AuctionLot.query.filter_by(auction_id=auction.id).order_by(AuctionLot.id).first() if auction else None
+        token = jwt.encode({'user_id': admin.id, 'exp': datetime.utcnow() + timedelta(days=1)},
+                           app.config['JWT_SECRET_KEY'], algorithm='HS256')
+        return {
+            'team_id': teams[0],
+            'other_team_id': teams[-1],
+            'player_id': players[0],
+            'other_player_id': players[-1],
+            'match_id': db.session.query(db.func.max(Match.id)).scalar(),
+            'season': db.session.query(db.func.max(Match.season)).scalar(),
+            'auction_id': auction.id if auction else None,
+            'lot_id': lot.id if lot else None,
+            'user_id': admin.id,
+            'user_team_id': db.session.query(UserTeam.id).filter_by(user_id=admin.id).scalar(),
+            'venue_id': db.session.query(db.func.min(Venue.id)).scalar(),
+            'contest_id': db.session.query(db.func.min(FantasyContest.id)).scalar()
+        }, token
+
+def build_cases(app, ids):
+    """(name, endpoint, path, query) for every benchmarked request, and the
+    routes skipped with the reason."""
+    cases, skipped = [], {}
+    rules = sorted(app.url_map.iter_rules(), key=lambda rule: rule.endpoint)
+    for rule in rules:
+        endpoint = rule.endpoint
+        if endpoint.split('.')[0] not in BLUEPRINTS or '.' not in endpoint:
+            continue
+        if 'GET' not in rule.methods:
+            skipped[endpoint] = 'writes data'
+            continue
+        
+        overrides = PARAMETER_OVERRIDES.get(endpoint, {})
+        values = {}
+        for argument in rule.arguments:
+            values[argument] = ids.get(overrides.get(argument, argument))
+        missing = [argument for argument, value in values.items() if value is None]
+        if missing:
+            skipped[endpoint] = f'no value for {", ".join(missing)}'
+            continue
+        
+        with app.test_request_context():
+            path = url_for(endpoint, **values)
+        cases.append((endpoint, endpoint, path, {}))
+        for label, query in SCENARIOS.get(endpoint, {}).items():
+            cases.append((f'{endpoint}[{label}]', endpoint, path,
+                          {key: value.format(**ids) for key, value in query.items()}))
+    return cases, skipped
+
+def login(app):
+    client = app.test_client()
+    response = client.post('/login', data={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    if response.status_code >= 400:
+        raise RuntimeError(f'Could not log in as the benchmark admin ({response.status_code})')
+    return client
+
+def measure(client, headers, path, query, iterations, warmup, last):
+    def call():
+        started = time.perf_counter()
+        response = client.get(path, query_string=query, headers=headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        response.close()
+        return response.status_code, elapsed
+    
+    status, cold_ms = call()
+    for _ in range(warmup):
+        call()
+    
+    latencies = []
+    for _ in range(iterations):
+        status, elapsed = call()
+        latencies.append(elapsed)
+    queries, db_ms, repeated = last['queries'], last['db_ms'], last['repeated']
+    
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    latencies.sort()
+    return {
+        'status': status,
+        'samples': len(latencies),
+        'cold_ms': round(cold_ms, 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'queries': queries,
+        'db_ms': round(db_ms, 3),
+        'repeated_selects': repeated,
+        'peak_kb': round(peak / 1024, 1)
+    }
+
+def run(args):
+    path = ensure_database(args.scale, args.data_dir, rebuild=args.rebuild)
+    app = create_app(make_config(path))
+    # Failures and N+1s end up in the report; per-request logging would drown it
+    app.logger.setLevel(logging.CRITICAL)
+    logging.getLogger('app.utils.sql_instrumentation').setLevel(logging.ERROR)
+    
+    # Registered last, so it runs before the instrumentation's own after_request
+    last = {'queries': 0, 'db_ms': 0.0, 'repeated': []}
+    
+    @app.after_request
+    def capture_query_stats(response):
+        stats = current_query_stats()
+        if stats is not None:
+            last['queries'] = stats.count
+            last['db_ms'] = stats.seconds * 1000
+            last['repeated'] = [count for _, count in stats.repeated_selects(app.config['SQL_NPLUS1_THRESHOLD'])]
+        return response
+    
+    ids, token = sample_ids(app)
+    cases, skipped = build_cases(app, ids)
+    if args.only:
+        cases = [case for case in cases if any(pattern in case[0] for pattern in args.only)]
+    
+    client = login(app)
+    headers = {'Authorization': f'Bearer {token}'}
+    routes, errors = {}, {}
+    for name, endpoint, url, query in cases:
+        try:
+            result = measure(client, headers, url, query, args.iterations, args.warmup, last)
+        except Exception as e:
+            errors[name] = f'{type(e).__name__}: {str(e).splitlines()[0]}'
+            continue
+        result['path'] = url
+        if query:
+            result['query'] = query
+        routes[name] = result
+        if args.verbose:
+            print(f"{name:<48}{result['status']:>5}{result['p50_ms']:>10}{result['queries']:>6}", file=sys.stderr)
+    
+    commit, dirty = git_revision()
+    return {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'rows': table_counts(app),
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'only': args.only
+        },
+        'routes': routes,
+        'errors': errors,
+        'skipped': skipped
+    }
+
+def load_thresholds(path, overrides):
+    thresholds = {'default': dict(DEFAULT_THRESHOLDS), 'routes': {}}
+    if path:
+        with open(path) as f:
+            configured = json.load(f)
+        thresholds['default'].update(configured.get('default', {}))
+        thresholds['routes'] = configured.get('routes', {})
+    thresholds['default'].update({key: value for key, value in overrides.items() if value is not None})
+    return thresholds
+
+def compare(baseline, current, thresholds):
+    """Regressions of ``current`` against ``baseline`` as readable strings."""
+    regressions = []
+    if baseline['meta'].get('scale') != current['meta'].get('scale'):
+        regressions.append(f"scale differs: {baseline['meta'].get('scale')} vs {current['meta'].get('scale')}")
+    
+    for name, before in sorted(baseline['routes'].items()):
+        after = current['routes'].get(name)
+        if after is None:
+            if current['meta'].get('only') and name not in current.get('errors', {}):
+                continue
+            reason = current.get('errors', {}).get(name, 'missing from this run')
+            regressions.append(f'{name}: {reason}')
+            continue
+        limits = dict(thresholds['default'], **thresholds['routes'].get(name.split('[')[0], {}))
+        
+        if before['status'] < 400 <= after['status']:
+            regressions.append(f"{name}: status {before['status']} -> {after['status']}")
+        
+        metric = limits['latency_metric']
+        slower = after[metric] - before[metric]
+        if slower > limits['min_latency_ms'] and slower > before[metric] * limits['latency']:
+            regressions.append(f"{name}: {metric} {before[metric]} -> {after[metric]} "
+                               f"(+{slower / before[metric]:.0%} > {limits['latency']:.0%})")
+        
+        if after['queries'] - before['queries'] > limits['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {after['queries']}")
+        
+        grown = after['peak_kb'] - before['peak_kb']
+        if grown > limits['min_memory_kb'] and grown > before['peak_kb'] * limits['memory']:
+            regressions.append(f"{name}: peak memory {before['peak_kb']}KB -> {after['peak_kb']}KB")
+    return regressions
+
+def print_report(report):
+    meta = report['meta']
+    rows = meta['rows']
+    print(f"scale {meta['scale']}: {rows.get('player_performances', 0)} performances, "
+          f"{rows.get('matches', 0)} matches, {rows.get('players', 0)} players "
+          f"(commit {meta['commit']}{' dirty' if meta['dirty'] else ''})")
+    print(f"{'route':<48}{'status':>7}{'cold':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>8}{'db ms':>9}{'peak KB':>10}")
+    for name, row in sorted(report['routes'].items()):
+        flag = ' N+1' if row['repeated_selects'] else ''
+        print(f"{name:<48}{row['status']:>7}{row['cold_ms']:>9.1f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+              f"{row['p99_ms']:>9.2f}{row['queries']:>8}{row['db_ms']:>9.2f}{row['peak_kb']:>10.0f}{flag}")
+    for name, message in sorted(report['errors'].items()):
+        print(f'ERROR {name}: {message}')
+    if report['skipped']:
+        print(f"skipped {len(report['skipped'])} routes: " +
+              ', '.join(f'{name} ({reason})' for name, reason in sorted(report['skipped'].items())))
+
+def print_regressions(regressions):
+    if regressions:
+        print(f'REGRESSIONS ({len(regressions)}):')
+        for regression in regressions:
+            print(f'  {regression}')
+    else:
+        print('no regressions')
+
+def add_threshold_arguments(parser):
+    parser.add_argument('--thresholds', help='JSON file with default and per-route thresholds')
+    parser.add_argument('--latency', type=float, help='allowed relative latency increase (default 0.20)')
+    parser.add_argument('--latency-metric', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'])
+    parser.add_argument('--queries', type=int, help='allowed extra queries per request (default 0)')
+    parser.add_argument('--memory', type=float, help='allowed relative peak memory increase (default 0.25)')
+
+def threshold_overrides(args):
+    return {'latency': args.latency, 'latency_metric': args.latency_metric,
+            'queries': args.queries, 'memory': args.memory}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every read route at a given data scale.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help='benchmark the routes')
+    run_parser.add_argument('--scale', choices=list(SCALES), default='small')
+    run_parser.add_argument('--iterations', type=int, default=30)
+    run_parser.add_argument('--warmup', type=int, default=3)
+    run_parser.add_argument('--only', action='append', help='only routes whose name contains this (repeatable)')
+    run_parser.add_argument('--data-dir', help='where seeded databases are cached')
+    run_parser.add_argument('--rebuild', action='store_true', help='reseed the database')
+    run_parser.add_argument('--json', help='write the results to this file')
+    run_parser.add_argument('--baseline', help='compare against this earlier result file')
+    run_parser.add_argument('--verbose', action='store_true')
+    add_threshold_arguments(run_parser)
+    
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    add_threshold_arguments(compare_parser)
+    
+    args = parser.parse_args(argv)
+    thresholds = load_thresholds(args.thresholds, threshold_overrides(args))
+    
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, thresholds)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, thresholds)
+        print_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
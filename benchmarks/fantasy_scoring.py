@@ -0,0 +1,197 @@
+"""Fantasy scoring benchmark.
+
+Adds ``--teams`` user teams of eleven (1M by default) to a copy of the small
+seeded database and enters every one into a season contest and an
+all-seasons contest. It then times ``score_match`` for the latest match with
+performances in a fresh interpreter, spot-checks the points against a
+direct sum over the squads, and times loading the leaderboard and looking up
+ranks. It fails when scoring goes over the time budget.
+
+    python -m benchmarks.fantasy_scoring
+    python -m benchmarks.fantasy_scoring --teams 100000 --budget-s 5 --json fantasy.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app import create_app
+from app.extensions import db
+from app.models.user import User
+from app.models.team import Player
+from app.models.match import Match, PlayerPerformance
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.fantasy import FantasyContest, FantasyEntry
+from benchmarks import datasets
+from benchmarks.datasets import ADMIN_EMAIL, make_config, schema_fingerprint
+
+SQUAD = 11
+TEAMS_PER_CHUNK = 100000
+SEED = 1
+
+CHILD = '''
+import json, resource, sys, time
+import numpy as np
+from benchmarks.datasets import make_config
+from app import create_app
+from app.extensions import db
+from app.models.match import Match, PlayerPerformance
+from app.models.user_team import UserTeamPlayer
+from app.models.fantasy import FantasyContest, FantasyEntry, FantasyPlayerPoints
+from app.services.fantasy import contest_standing, get_leaderboard, score_match
+
+app = create_app(make_config(sys.argv[1]))
+with app.app_context():
+    match = (Match.query.filter(Match.id.in_(db.session.query(PlayerPerformance.match_id)))
+             .order_by(Match.match_date.desc()).first())
+    before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    players, user_teams = score_match(match)
+    db.session.commit()
+    seconds = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    # A sample of entries against the sum of their squad's points
+    points = dict(db.session.query(FantasyPlayerPoints.player_id, FantasyPlayerPoints.points)
+                  .filter_by(match_id=match.id))
+    contest = FantasyContest.query.filter_by(name='All seasons').first()
+    sample = [team_id for team_id, in db.session.query(FantasyEntry.user_team_id)
+              .filter_by(contest_id=contest.id).order_by(db.func.random()).limit(200)]
+    squads = {}
+    for team_id, player_id in (db.session.query(UserTeamPlayer.user_team_id, UserTeamPlayer.player_id)
+                               .filter(UserTeamPlayer.user_team_id.in_(sample))):
+        squads[team_id] = squads.get(team_id, 0) + points.get(player_id, 0)
+    stored = dict(db.session.query(FantasyEntry.user_team_id, FantasyEntry.points)
+                  .filter(FantasyEntry.contest_id == contest.id, FantasyEntry.user_team_id.in_(sample)))
+    correct = all(stored[team_id] == squads.get(team_id, 0) for team_id in sample)
+    
+    started = time.perf_counter()
+    board = get_leaderboard(contest)
+    load_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for team_id in sample:
+        contest_standing(contest, team_id)
+    rank_ms = (time.perf_counter() - started) * 1000 / len(sample)
+print(json.dumps({'match_id': match.id, 'players': players, 'user_teams': user_teams, 'entries': len(board),
+                  'seconds': seconds, 'baseline_mb': before_kb / 1024, 'peak_mb': peak_kb / 1024,
+                  'points_correct': correct, 'leaderboard_load_s': load_seconds, 'rank_lookup_ms': rank_ms}))
+'''
+
+def database_path(teams, data_dir=None):
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), 'ipl-benchmarks')
+    app = create_app(make_config(':memory:'))
+    with app.app_context():
+        fingerprint = schema_fingerprint()
+    return os.path.join(data_dir, f'fantasy-{teams}-{fingerprint}.db')
+
+def seed(path, teams):
+    rng = np.random.default_rng(SEED)
+    shutil.copy(datasets.ensure_database('small'), path)
+    app = create_app(make_config(path))
+    with app.app_context():
+        owner_id = db.session.query(User.id).filter_by(email=ADMIN_EMAIL).scalar()
+        season = (db.session.query(Match.season)
+                  .filter(Match.id.in_(db.session.query(PlayerPerformance.match_id)))
+                  .order_by(Match.match_date.desc()).limit(1).scalar())
+        players = np.array([player_id for player_id, in db.session.query(Player.id)], dtype=np.int64)
+        contests = [FantasyContest(name='Season contest', season=season, version=0),
+                    FantasyContest(name='All seasons', season=None, version=0)]
+        db.session.add_all(contests)
+        db.session.commit()
+        first = (db.session.query(db.func.max(UserTeam.id)).scalar() or 0) + 1
+        
+        connection = db.session.connection().connection
+        joined = datetime(2000, 1, 1)
+        for start in range(0, teams, TEAMS_PER_CHUNK):
+            ids = np.arange(first + start, first + min(teams, start + TEAMS_PER_CHUNK))
+            connection.executemany(f'INSERT INTO {UserTeam.__tablename__} (id, user_id, name) VALUES (?, ?, ?)',
+                                   [(team_id, owner_id, f'Fantasy XI {team_id}') for team_id in ids.tolist()])
+            # Eleven distinct players per squad: the lowest eleven of random keys
+            squads = players[np.argsort(rng.random((len(ids), len(players))), axis=1)[:, :SQUAD]]
+            connection.executemany(f'INSERT INTO {UserTeamPlayer.__tablename__} (user_team_id, player_id) VALUES (?, ?)',
+                                   zip(np.repeat(ids, SQUAD).tolist(), squads.ravel().tolist()))
+            for contest in contests:
+                connection.executemany(f'INSERT INTO {FantasyEntry.__tablename__} '
+                                       '(contest_id, user_team_id, points, joined_at) VALUES (?, ?, 0, ?)',
+                                       [(contest.id, team_id, joined) for team_id in ids.tolist()])
+        db.session.commit()
+        count = db.session.query(db.func.count(UserTeam.id)).scalar()
+        db.session.remove()
+        db.engine.dispose()
+    return count
+
+def ensure_database(teams, data_dir=None, rebuild=False):
+    """Path of the seeded database with ``teams`` fantasy user teams."""
+    path = database_path(teams, data_dir)
+    if os.path.exists(path) and not rebuild:
+        return path
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    started = time.perf_counter()
+    count = seed(partial, teams)
+    os.replace(partial, path)
+    print(f'seeded {count} user teams in {time.perf_counter() - started:.1f}s: {path}', file=sys.stderr)
+    return path
+
+def run(args):
+    # Scoring writes to the database, so every run works on a fresh copy
+    seeded = ensure_database(args.teams, rebuild=args.reseed)
+    workdir = tempfile.mkdtemp(prefix='fantasy-')
+    path = os.path.join(workdir, 'fantasy.db')
+    shutil.copy(seeded, path)
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    try:
+        result = subprocess.run([args.python, '-W', 'ignore', '-c', CHILD, path],
+                                cwd=cwd, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'scoring failed:\n{result.stderr[-2000:]}')
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report.update(teams=args.teams, seconds=round(report['seconds'], 2), baseline_mb=round(report['baseline_mb'], 1),
+                  peak_mb=round(report['peak_mb'], 1), leaderboard_load_s=round(report['leaderboard_load_s'], 2),
+                  rank_lookup_ms=round(report['rank_lookup_ms'], 3), budget_s=args.budget_s)
+    return report
+
+def print_report(report):
+    print(f"scored match {report['match_id']} ({report['players']} players) for {report['teams']} user teams "
+          f"in {report['seconds']}s, {report['user_teams']} changed (budget {report['budget_s']}s)")
+    print(f"peak memory {report['peak_mb']}MB (after startup {report['baseline_mb']}MB)")
+    print(f"leaderboard of {report['entries']} entries loaded in {report['leaderboard_load_s']}s, "
+          f"rank lookup {report['rank_lookup_ms']}ms")
+    if not report['points_correct']:
+        print('ENTRY POINTS DO NOT MATCH THEIR SQUADS')
+    if report['seconds'] > report['budget_s']:
+        print('OVER BUDGET')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time scoring a match for every fantasy user team.')
+    parser.add_argument('--teams', type=int, default=1000000)
+    parser.add_argument('--budget-s', type=float, default=30,
+                        help='fail when scoring takes longer than this')
+    parser.add_argument('--reseed', action='store_true', help='rebuild the cached database')
+    parser.add_argument('--python', default=sys.executable)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+    
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if not report['points_correct'] or report['seconds'] > args.budget_s else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Live score replay benchmark.
+
+Replays the seeded match that has ball-by-ball data into a fresh match
+through ``POST /admin/matches/<id>/live``, ``--speed`` times faster than real
+time, while ``--clients`` threads follow ``GET /api/matches/<id>/live`` over a
+local threaded WSGI server. Reports the ingest latency, how long each ball
+took to reach the clients, and fails when a client misses a ball or ends on
+a different score from the match row.
+
+    python -m benchmarks.live_replay --clients 200 --speed 400
+    python -m benchmarks.live_replay --per-over --other-worker --json live.json
+
+With ``--other-worker`` the balls are ingested by a second app instance, as
+by another worker process, so they reach the clients through the poll rather
+than the in-process wake-up.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.extensions import db
+from app.models.match import Match
+from app.models.delivery import Delivery
+from app.services.ball_by_ball import FIELDS
+from benchmarks.auction_simulation import percentile
+from benchmarks.datasets import ensure_database, make_config
+from benchmarks.endpoint_suite import login
+
+def create_live_match(app):
+    """(new match id, the recorded deliveries to replay into it)."""
+    with app.app_context():
+        source_id = db.session.query(db.func.max(Delivery.match_id)).scalar()
+        if source_id is None:
+            raise RuntimeError('The seeded database has no ball-by-ball data')
+        source = Match.get_by_id(source_id)
+        deliveries = [list(row) for row in db.session.query(*[getattr(Delivery, field) for field in FIELDS])
+                      .filter(Delivery.match_id == source_id)
+                      .order_by(Delivery.innings, Delivery.over, Delivery.ball)]
+        match = Match(match_date=source.match_date, venue=source.venue, venue_id=source.venue_id,
+                      team1_id=source.team1_id, team2_id=source.team2_id, season=source.season,
+                      match_type='replay')
+        db.session.add(match)
+        db.session.commit()
+        return match.id, deliveries
+
+class Follower(threading.Thread):
+    """One live page: reads the event stream and notes when each ball arrives."""
+    
+    def __init__(self, port, match_id, ready):
+        super().__init__(daemon=True)
+        self.port = port
+        self.match_id = match_id
+        self.ready = ready
+        self.arrived = {}
+        self.score = None
+        self.closed = False
+        self.error = None
+    
+    def run(self):
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            connection.request('GET', f'/api/matches/{self.match_id}/live')
+            response = connection.getresponse()
+            name = None
+            while True:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.decode().rstrip('\n')
+                if line.startswith('event: '):
+                    name = line[7:]
+                elif line.startswith('data: '):
+                    data = json.loads(line[6:])
+                    if name == 'score':
+                        self.ready.release()
+                    elif name == 'ball':
+                        self.arrived[tuple(data['d'][:3])] = time.perf_counter()
+                        self.score = (data['d'][0], data['s'])
+                    elif name == 'result':
+                        self.closed = True
+                        break
+            connection.close()
+        except Exception as e:
+            self.error = repr(e)
+            self.ready.release()
+
+def simulate(args):
+    workdir = tempfile.mkdtemp(prefix='live-replay-')
+    path = os.path.join(workdir, 'live.db')
+    shutil.copy(ensure_database(args.scale), path)
+    app = create_app(make_config(path))
+    match_id, deliveries = create_live_match(app)
+    
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    ready = threading.Semaphore(0)
+    followers = [Follower(server.server_port, match_id, ready) for _ in range(args.clients)]
+    for follower in followers:
+        follower.start()
+    for _ in followers:
+        ready.acquire()
+    
+    scorer = login(create_app(make_config(path)) if args.other_worker else app)
+    batches = []
+    for delivery in deliveries:
+        if args.per_over and batches and batches[-1][-1][:2] == delivery[:2]:
+            batches[-1].append(delivery)
+        else:
+            batches.append([delivery])
+    
+    ball_seconds = app.config['LIVE_REPLAY_BALL_SECONDS'] / args.speed
+    sent, ingest_ms, failures = {}, [], []
+    started = time.perf_counter()
+    for batch in batches:
+        posted = time.perf_counter()
+        response = scorer.post(f'/admin/matches/{match_id}/live', json={'deliveries': batch})
+        ingest_ms.append((time.perf_counter() - posted) * 1000)
+        if response.status_code != 201:
+            failures.append(f'{batch[0][:3]}: {response.status_code} {response.get_json()}')
+        for delivery in batch:
+            sent[tuple(delivery[:3])] = posted
+        time.sleep(max(0.0, ball_seconds * len(batch) - (time.perf_counter() - posted)))
+    elapsed = time.perf_counter() - started
+    
+    response = scorer.post(f'/admin/matches/{match_id}/result', json={'result': 'Replay finished'})
+    if response.status_code != 200:
+        failures.append(f'result: {response.status_code}')
+    for follower in followers:
+        follower.join(timeout=30)
+    server.shutdown()
+    
+    with app.app_context():
+        match = Match.get_by_id(match_id)
+        final = {1: [match.team1_score, match.team1_wickets, match.team1_overs],
+                 2: [match.team2_score, match.team2_wickets, match.team2_overs]}
+    lags, missing, wrong_score, unclosed = [], 0, 0, 0
+    for follower in followers:
+        if follower.error:
+            failures.append(f'client: {follower.error}')
+        missing += len(set(sent) - set(follower.arrived))
+        lags.extend((follower.arrived[key] - sent[key]) * 1000 for key in sent if key in follower.arrived)
+        if follower.score is None or final[follower.score[0]] != follower.score[1]:
+            wrong_score += 1
+        unclosed += not follower.closed
+    lags.sort()
+    ingest_ms.sort()
+    
+    return {
+        'scale': args.scale,
+        'clients': args.clients,
+        'deliveries': len(deliveries),
+        'updates': len(batches),
+        'speed': args.speed,
+        'ingested_by': 'other worker' if args.other_worker else 'same worker',
+        'elapsed_s': round(elapsed, 2),
+        'ingest_p50_ms': round(percentile(ingest_ms, 50), 2),
+        'ingest_p99_ms': round(percentile(ingest_ms, 99), 2),
+        'lag_p50_ms': round(percentile(lags, 50), 2),
+        'lag_p99_ms': round(percentile(lags, 99), 2),
+        'lag_max_ms': round(lags[-1], 2) if lags else None,
+        'missed_balls': missing,
+        'wrong_final_score': wrong_score,
+        'streams_not_closed': unclosed,
+        'failures': failures[:20]
+    }
+
+def print_report(report):
+    print(f"{report['deliveries']} deliveries in {report['updates']} updates at {report['speed']}x, "
+          f"{report['clients']} clients, ingested by the {report['ingested_by']}, in {report['elapsed_s']}s")
+    print(f"ingest p50 {report['ingest_p50_ms']}ms p99 {report['ingest_p99_ms']}ms")
+    print(f"ball to client p50 {report['lag_p50_ms']}ms p99 {report['lag_p99_ms']}ms max {report['lag_max_ms']}ms")
+    problems = {key: report[key] for key in ('missed_balls', 'wrong_final_score', 'streams_not_closed') if report[key]}
+    if problems or report['failures']:
+        print(f'FAILED: {problems}')
+        for failure in report['failures']:
+            print(f'  {failure}')
+    else:
+        print('every client saw every ball and the final score')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded match to live score clients.')
+    parser.add_argument('--scale', default='small')
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--speed', type=float, default=400, help='times faster than real time')
+    parser.add_argument('--per-over', action='store_true', help='ingest an over per update instead of a ball')
+    parser.add_argument('--other-worker', action='store_true',
+                        help='ingest through a second app instance, so balls arrive by polling')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+    
+    report = simulate(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    failed = report['missed_balls'] or report['wrong_final_score'] or report['streams_not_closed'] or report['failures']
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Web worker startup benchmark.
+
+Starts fresh interpreters that import the app and build it with
+``create_app()``, the way a web worker boots, under ``python -X importtime``.
+Reports the median import and factory time and the slowest imports, and
+fails when startup exceeds the budget or a worker imports a module that only
+the command line tools need.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 600 --runs 9 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that only scraping and migration commands need
+FORBIDDEN = ('pandas', 'bs4', 'requests', 'selenium', 'alembic', 'flask_migrate')
+
+CHILD = '''
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+print(imported - started, time.perf_counter() - imported)
+'''
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return modules
+
+def measure_once(python, cwd):
+    env = dict(os.environ)
+    # A worker is not the flask command, so it must not pay for CLI-only setup
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    result = subprocess.run([python, '-X', 'importtime', '-W', 'ignore', '-c', CHILD],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'create_app() failed:\n{result.stderr[-2000:]}')
+    import_s, factory_s = (float(value) for value in result.stdout.split()[-2:])
+    return import_s * 1000, factory_s * 1000, parse_importtime(result.stderr)
+
+def run(args):
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # One discarded run so every measured run sees a warm page cache and bytecode
+    measure_once(args.python, cwd)
+    
+    imports, factories, modules = [], [], {}
+    for _ in range(args.runs):
+        import_ms, factory_ms, modules = measure_once(args.python, cwd)
+        imports.append(import_ms)
+        factories.append(factory_ms)
+    
+    totals = sorted(i + f for i, f in zip(imports, factories))
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    return {
+        'runs': args.runs,
+        'import_ms': round(statistics.median(imports), 1),
+        'create_app_ms': round(statistics.median(factories), 1),
+        'startup_ms': round(statistics.median(totals), 1),
+        'startup_max_ms': round(totals[-1], 1),
+        'budget_ms': args.budget_ms,
+        'modules_imported': len(modules),
+        'forbidden_imported': [name for name in FORBIDDEN if name in modules],
+        'slowest_imports': [{'module': name, 'self_ms': round(self_us / 1000, 1),
+                             'cumulative_ms': round(cumulative_us / 1000, 1)}
+                            for name, (self_us, cumulative_us) in slowest]
+    }
+
+def print_report(report):
+    print(f"startup (median of {report['runs']}): {report['startup_ms']}ms "
+          f"= import {report['import_ms']}ms + create_app {report['create_app_ms']}ms "
+          f"(max {report['startup_max_ms']}ms, budget {report['budget_ms']}ms, "
+          f"{report['modules_imported']} modules)")
+    print(f"{'module':<48}{'self ms':>9}{'cumul ms':>10}")
+    for row in report['slowest_imports']:
+        print(f"{row['module']:<48}{row['self_ms']:>9}{row['cumulative_ms']:>10}")
+    if report['forbidden_imported']:
+        print(f"FORBIDDEN IMPORTS: {', '.join(report['forbidden_imported'])}")
+    if report['startup_ms'] > report['budget_ms']:
+        print('OVER BUDGET')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure web worker import and create_app() time.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=900,
+                        help='fail when the median import + create_app time exceeds this')
+    parser.add_argument('--top', type=int, default=15, help='show this many slowest imports (by self time)')
+    parser.add_argument('--python', default=sys.executable)
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args(argv)
+    
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['forbidden_imported'] or report['startup_ms'] > args.budget_ms else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""auction purse ledger
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:41:02.113907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('team_purses',
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('auction_id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('initial_purse', sa.Float(), nullable=False),
+    sa.Column('committed_amount', sa.Float(), nullable=False),
+    sa.Column('spent_amount', sa.Float(), nullable=False),
+    sa.Column('retained_players', sa.Integer(), nullable=False),
+    sa.Column('players_bought', sa.Integer(), nullable=False),
+    sa.Column('leading_lots', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['auction_id'], ['auctions.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('auction_id', 'team_id', name='unique_auction_team_purse')
+    )
+    with op.batch_alter_table('auction_lots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('leading_bid_amount', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('leading_team_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_auction_lots_leading_team_id_teams', 'teams', ['leading_team_id'], ['id'])
+
+    # Carry the leading bid of lots that were already being bid on
+    op.execute("""
+        UPDATE auction_lots SET
+            leading_bid_amount = (SELECT MAX(b.bid_amount) FROM auction_bids b WHERE b.lot_id = auction_lots.id),
+            leading_team_id = (SELECT b.team_id FROM auction_bids b WHERE b.lot_id = auction_lots.id
+                               ORDER BY b.bid_amount DESC LIMIT 1)
+        WHERE status = 'unsold'
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('auction_lots', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_auction_lots_leading_team_id_teams', type_='foreignkey')
+        batch_op.drop_column('leading_team_id')
+        batch_op.drop_column('leading_bid_amount')
+
+    op.drop_table('team_purses')
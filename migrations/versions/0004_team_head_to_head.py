@@ -0,0 +1,48 @@
+"""team head to head
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 15:02:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('team_head_to_head',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=10), nullable=False),
+    sa.Column('team_a_id', sa.Integer(), nullable=False),
+    sa.Column('team_b_id', sa.Integer(), nullable=False),
+    sa.Column('played', sa.Integer(), nullable=False),
+    sa.Column('team_a_wins', sa.Integer(), nullable=False),
+    sa.Column('team_b_wins', sa.Integer(), nullable=False),
+    sa.Column('no_results', sa.Integer(), nullable=False),
+    sa.Column('scored_matches', sa.Integer(), nullable=False),
+    sa.Column('team_a_runs', sa.Integer(), nullable=False),
+    sa.Column('team_b_runs', sa.Integer(), nullable=False),
+    sa.Column('recent_results', sa.String(length=5), nullable=False),
+    sa.Column('last_match_date', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['team_a_id'], ['teams.id'], ),
+    sa.ForeignKeyConstraint(['team_b_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('team_head_to_head', schema=None) as batch_op:
+        batch_op.create_index('ix_team_head_to_head_season_team_a_id_team_b_id', ['season', 'team_a_id', 'team_b_id'], unique=True)
+
+    # Existing results are backfilled with `flask rebuild-head-to-head`
+
+
+def downgrade():
+    with op.batch_alter_table('team_head_to_head', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_head_to_head_season_team_a_id_team_b_id')
+
+    op.drop_table('team_head_to_head')
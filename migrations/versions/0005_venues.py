@@ -0,0 +1,82 @@
+"""venues
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:21:09.734512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('venues',
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('city', sa.String(length=50), nullable=True),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    op.create_table('venue_season_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=10), nullable=False),
+    sa.Column('matches', sa.Integer(), nullable=False),
+    sa.Column('scored_matches', sa.Integer(), nullable=False),
+    sa.Column('first_innings_runs', sa.Integer(), nullable=False),
+    sa.Column('second_innings_runs', sa.Integer(), nullable=False),
+    sa.Column('decided_matches', sa.Integer(), nullable=False),
+    sa.Column('chasing_wins', sa.Integer(), nullable=False),
+    sa.Column('toss_matches', sa.Integer(), nullable=False),
+    sa.Column('toss_winner_wins', sa.Integer(), nullable=False),
+    sa.Column('highest_total', sa.Integer(), nullable=True),
+    sa.Column('lowest_total', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['venue_id'], ['venues.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('venue_season_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_venue_season_stats_venue_id_season', ['venue_id', 'season'], unique=True)
+
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('venue_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('toss_winner_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('toss_decision', sa.String(length=10), nullable=True))
+        batch_op.create_foreign_key('fk_matches_venue_id_venues', 'venues', ['venue_id'], ['id'])
+        batch_op.create_foreign_key('fk_matches_toss_winner_id_teams', 'teams', ['toss_winner_id'], ['id'])
+        batch_op.create_index('ix_matches_venue_id_season', ['venue_id', 'season'], unique=False)
+
+    with op.batch_alter_table('teams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('home_venue_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_teams_home_venue_id_venues', 'venues', ['home_venue_id'], ['id'])
+
+    # Venues are created from the existing ground names with `flask rebuild-venues`
+
+
+def downgrade():
+    with op.batch_alter_table('teams', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_teams_home_venue_id_venues', type_='foreignkey')
+        batch_op.drop_column('home_venue_id')
+
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_venue_id_season')
+        batch_op.drop_constraint('fk_matches_toss_winner_id_teams', type_='foreignkey')
+        batch_op.drop_constraint('fk_matches_venue_id_venues', type_='foreignkey')
+        batch_op.drop_column('toss_decision')
+        batch_op.drop_column('toss_winner_id')
+        batch_op.drop_column('venue_id')
+
+    with op.batch_alter_table('venue_season_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_venue_season_stats_venue_id_season')
+
+    op.drop_table('venue_season_stats')
+    op.drop_table('venues')
@@ -0,0 +1,47 @@
+"""season standings
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 17:08:44.260917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('season_standings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=10), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('played', sa.Integer(), nullable=False),
+    sa.Column('won', sa.Integer(), nullable=False),
+    sa.Column('lost', sa.Integer(), nullable=False),
+    sa.Column('tied', sa.Integer(), nullable=False),
+    sa.Column('no_result', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('runs_for', sa.Integer(), nullable=False),
+    sa.Column('balls_faced', sa.Integer(), nullable=False),
+    sa.Column('runs_against', sa.Integer(), nullable=False),
+    sa.Column('balls_bowled', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('season_standings', schema=None) as batch_op:
+        batch_op.create_index('ix_season_standings_season_team_id', ['season', 'team_id'], unique=True)
+
+    # Existing results are counted with `flask rebuild-standings`
+
+
+def downgrade():
+    with op.batch_alter_table('season_standings', schema=None) as batch_op:
+        batch_op.drop_index('ix_season_standings_season_team_id')
+
+    op.drop_table('season_standings')
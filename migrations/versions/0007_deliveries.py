@@ -0,0 +1,51 @@
+"""deliveries
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 18:41:09.275311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deliveries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('innings', sa.SmallInteger(), nullable=False),
+    sa.Column('over', sa.SmallInteger(), nullable=False),
+    sa.Column('ball', sa.SmallInteger(), nullable=False),
+    sa.Column('batter_id', sa.Integer(), nullable=False),
+    sa.Column('bowler_id', sa.Integer(), nullable=False),
+    sa.Column('runs', sa.SmallInteger(), nullable=False),
+    sa.Column('extras', sa.SmallInteger(), nullable=False),
+    sa.Column('extra_kind', sa.SmallInteger(), nullable=False),
+    sa.Column('wicket_kind', sa.SmallInteger(), nullable=False),
+    sa.Column('player_out_id', sa.Integer(), nullable=True),
+    sa.Column('fielder_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['batter_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['bowler_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['fielder_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+    sa.ForeignKeyConstraint(['player_out_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deliveries', schema=None) as batch_op:
+        batch_op.create_index('ix_deliveries_match_id_innings_over_ball', ['match_id', 'innings', 'over', 'ball'], unique=True)
+
+    # Performances and totals are derived with `flask rebuild-from-deliveries` once deliveries are loaded
+
+
+def downgrade():
+    with op.batch_alter_table('deliveries', schema=None) as batch_op:
+        batch_op.drop_index('ix_deliveries_match_id_innings_over_ball')
+
+    op.drop_table('deliveries')
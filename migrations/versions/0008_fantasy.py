@@ -0,0 +1,75 @@
+"""fantasy contests
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 20:12:37.481092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fantasy_contests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('season', sa.String(length=10), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('fantasy_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('contest_id', sa.Integer(), nullable=False),
+    sa.Column('user_team_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['contest_id'], ['fantasy_contests.id'], ),
+    sa.ForeignKeyConstraint(['user_team_id'], ['user_teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fantasy_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_fantasy_entries_contest_id_user_team_id', ['contest_id', 'user_team_id'], unique=True)
+        batch_op.create_index('ix_fantasy_entries_user_team_id', ['user_team_id'], unique=False)
+
+    op.create_table('fantasy_player_points',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('scored_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fantasy_player_points', schema=None) as batch_op:
+        batch_op.create_index('ix_fantasy_player_points_match_id_player_id', ['match_id', 'player_id'], unique=True)
+        batch_op.create_index('ix_fantasy_player_points_player_id', ['player_id'], unique=False)
+
+    with op.batch_alter_table('user_team_players', schema=None) as batch_op:
+        batch_op.create_index('ix_user_team_players_player_id', ['player_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_team_players', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_team_players_player_id')
+
+    with op.batch_alter_table('fantasy_player_points', schema=None) as batch_op:
+        batch_op.drop_index('ix_fantasy_player_points_player_id')
+        batch_op.drop_index('ix_fantasy_player_points_match_id_player_id')
+
+    op.drop_table('fantasy_player_points')
+    with op.batch_alter_table('fantasy_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_fantasy_entries_user_team_id')
+        batch_op.drop_index('ix_fantasy_entries_contest_id_user_team_id')
+
+    op.drop_table('fantasy_entries')
+    op.drop_table('fantasy_contests')
@@ -0,0 +1,30 @@
+"""player picker indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 21:04:18.527316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.create_index('ix_players_name', ['name'], unique=False)
+        batch_op.create_index('ix_players_nationality', ['nationality'], unique=False)
+        batch_op.create_index('ix_players_current_value', ['current_value'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('players', schema=None) as batch_op:
+        batch_op.drop_index('ix_players_current_value')
+        batch_op.drop_index('ix_players_nationality')
+        batch_op.drop_index('ix_players_name')
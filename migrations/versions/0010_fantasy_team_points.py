@@ -0,0 +1,48 @@
+"""fantasy team points
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 23:41:09.318254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fantasy_team_points',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_team_id', sa.Integer(), nullable=False),
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+    sa.ForeignKeyConstraint(['user_team_id'], ['user_teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('fantasy_team_points', schema=None) as batch_op:
+        batch_op.create_index('ix_fantasy_team_points_match_id', ['match_id'], unique=False)
+        batch_op.create_index('ix_fantasy_team_points_user_team_id_match_id', ['user_team_id', 'match_id'], unique=True)
+
+    # Matches scored so far, credited to the squads as they are now
+    op.execute(
+        'INSERT INTO fantasy_team_points (user_team_id, match_id, points) '
+        'SELECT user_team_players.user_team_id, fantasy_player_points.match_id, SUM(fantasy_player_points.points) '
+        'FROM fantasy_player_points JOIN user_team_players '
+        'ON user_team_players.player_id = fantasy_player_points.player_id '
+        'GROUP BY user_team_players.user_team_id, fantasy_player_points.match_id'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('fantasy_team_points', schema=None) as batch_op:
+        batch_op.drop_index('ix_fantasy_team_points_user_team_id_match_id')
+        batch_op.drop_index('ix_fantasy_team_points_match_id')
+
+    op.drop_table('fantasy_team_points')
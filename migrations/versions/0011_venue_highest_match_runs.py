@@ -0,0 +1,34 @@
+"""venue highest match runs
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-20 09:12:44.501937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('venue_season_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('highest_match_runs', sa.Integer(), nullable=True))
+
+    # Highest two-innings aggregate of the completed matches each row counts
+    op.execute(
+        'UPDATE venue_season_stats SET highest_match_runs = ('
+        'SELECT MAX(matches.team1_score + matches.team2_score) FROM matches '
+        'WHERE matches.venue_id = venue_season_stats.venue_id AND matches.result IS NOT NULL '
+        "AND (venue_season_stats.season = 'all' OR matches.season = venue_season_stats.season))"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('venue_season_stats', schema=None) as batch_op:
+        batch_op.drop_column('highest_match_runs')
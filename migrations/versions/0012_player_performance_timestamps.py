@@ -0,0 +1,30 @@
+"""player performance timestamps
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-20 10:03:27.116482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('player_performances', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_player_performances_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('player_performances', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_performances_updated_at')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
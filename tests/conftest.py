@@ -0,0 +1,87 @@
+import pytest
+from config import Config
+from app import create_app
+from app.extensions import db
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_REPLICA_URIS = []
+    RATELIMIT_ENABLED = False
+    PROFILER_ENABLED = False
+    METRICS_ENABLED = False
+    CACHE_TYPE = 'simple'
+
+def create_test_app(database_path, **settings):
+    """An app on the SQLite file ``database_path``, with ``settings`` on top of TestConfig."""
+    settings['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+    return create_app(type('DatabaseConfig', (TestConfig,), settings))
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite file, inside an app context."""
+    app = create_test_app(tmp_path / 'test.db')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make(app):
+    """Add and commit a model instance: make(Team, name=..., short_name=...)."""
+    def make(model, **values):
+        instance = model(**values)
+        db.session.add(instance)
+        db.session.commit()
+        return instance
+    return make
+
+@pytest.fixture
+def auction(app, make):
+    """An ongoing auction with two teams and three lots, and purses of 1000."""
+    from datetime import datetime
+    from app.models.team import Team, Player
+    from app.models.auction import Auction, AuctionLot
+    
+    app.config['AUCTION_INITIAL_PURSE'] = 1000.0
+    app.config['AUCTION_MAX_SQUAD_SIZE'] = 3
+    teams = [make(Team, name=f'Team {code}', short_name=code) for code in ('A', 'B')]
+    auction = make(Auction, season='2024', auction_date=datetime(2024, 1, 1), status='ongoing')
+    lots = []
+    for number in range(3):
+        player = make(Player, name=f'Lot player {number}', role='Batsman')
+        lots.append(make(AuctionLot, auction_id=auction.id, player_id=player.id, base_price=50.0, status='unsold'))
+    return auction, teams, lots
+
+@pytest.fixture
+def league_match(app, make):
+    """A league match between two teams of two players each:
+    (match, [team A player ids], [team B player ids])."""
+    from datetime import datetime
+    from app.models.team import Team, Player
+    from app.models.match import Match
+    
+    teams = [make(Team, name=f'Team {code}', short_name=code) for code in ('A', 'B')]
+    squads = [[make(Player, name=f'{team.short_name}{number}', team_id=team.id, role='All-Rounder').id
+               for number in (1, 2)] for team in teams]
+    match = make(Match, match_date=datetime(2024, 4, 1), venue='Wankhede', season='2024',
+                 team1_id=teams[0].id, team2_id=teams[1].id)
+    return match, squads[0], squads[1]
+
+def log_in(client, email='fan@example.com', role='user'):
+    """Create a user (in the current app context) and log the client in as them."""
+    from app.models.user import User
+    
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        user = User(username=email.split('@')[0], email=email, role=role)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+    response = client.post('/login', data={'email': email, 'password': 'password'})
+    assert response.status_code == 302
+    return user
@@ -0,0 +1,65 @@
+import pytest
+from app.extensions import db
+from app.models.auction import AuctionBid, AuctionLot, TeamPurse
+from app.services.auction_ledger import BidError, place_bid
+
+def purse(auction, team):
+    return TeamPurse.get_for_team(auction.id, team.id)
+
+def test_outbid_team_gets_its_commitment_back(auction):
+    auction, (a, b), (lot, _, _) = auction
+    place_bid(lot, a, 100)
+    assert (purse(auction, a).committed_amount, purse(auction, a).leading_lots) == (100, 1)
+    
+    place_bid(lot, b, 150)
+    assert (purse(auction, a).committed_amount, purse(auction, a).leading_lots) == (0, 0)
+    assert (purse(auction, b).committed_amount, purse(auction, b).leading_lots) == (150, 1)
+    assert (lot.leading_bid_amount, lot.leading_team_id) == (150, b.id)
+
+def test_raising_own_bid_commits_the_difference(auction):
+    auction, (a, _), (lot, _, _) = auction
+    place_bid(lot, a, 100)
+    place_bid(lot, a, 400)
+    assert (purse(auction, a).committed_amount, purse(auction, a).leading_lots) == (400, 1)
+
+def test_commitments_across_lots_cannot_exceed_the_purse(auction):
+    auction, (a, _), (first, second, _) = auction
+    place_bid(first, a, 700)
+    with pytest.raises(BidError, match='Insufficient purse'):
+        place_bid(second, a, 301)
+    db.session.rollback()
+    assert purse(auction, a).committed_amount == 700
+    assert second.leading_team_id is None
+    assert AuctionBid.query.count() == 1
+
+def test_bid_must_beat_the_leading_bid(auction):
+    _, (a, b), (lot, _, _) = auction
+    with pytest.raises(BidError):
+        place_bid(lot, a, 50)
+    place_bid(lot, a, 100)
+    with pytest.raises(BidError):
+        place_bid(lot, b, 100)
+
+def test_full_squad_cannot_lead_another_lot(auction, app):
+    auction, (a, _), lots = auction
+    app.config['AUCTION_MAX_SQUAD_SIZE'] = 2
+    place_bid(lots[0], a, 100)
+    place_bid(lots[1], a, 100)
+    with pytest.raises(BidError, match='Squad is already full'):
+        place_bid(lots[2], a, 100)
+    # Raising a bid it already leads does not add a player
+    place_bid(lots[0], a, 200)
+
+def test_stale_leading_bid_is_rejected_without_moving_purses(auction):
+    auction, (a, b), (lot, _, _) = auction
+    place_bid(lot, a, 100)
+    lot = AuctionLot.query.get(lot.id)
+    # Another worker's bid lands after this request read the lot
+    db.session.execute(AuctionLot.__table__.update().where(AuctionLot.id == lot.id)
+                       .values(leading_bid_amount=300))
+    with pytest.raises(BidError) as error:
+        place_bid(lot, b, 200)
+    assert error.value.status_code == 409
+    db.session.rollback()
+    assert purse(auction, a).committed_amount == 100
+    assert purse(auction, b) is None or purse(auction, b).committed_amount == 0
@@ -0,0 +1,103 @@
+import sqlite3
+import pytest
+from sqlalchemy import event
+from app.extensions import db, cache
+from app.models.team import Player
+from app.models.auction import Auction, AuctionLot, TeamPurse
+from app.services import homepage
+from app.services.auction_ledger import place_bid
+from app.services.auction_settlement import SETTLE_ATTEMPTS, SettlementError, settle_auction, settle_lot
+from app.services.team_profile import get_team_profile
+
+def purse(auction, team):
+    return TeamPurse.get_for_team(auction.id, team.id)
+
+def squad(team):
+    return [player['id'] for player in get_team_profile(team.id)['players']]
+
+def bid_during_settlement(app, amount, team, times=1):
+    """Commit a rival bid (on the lot and both purses) from another
+    connection just before each of the next ``times`` settlement UPDATEs,
+    as a concurrent bidder would."""
+    engine = db.engine
+    state = {'left': times}
+    
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if state['left'] and statement.startswith('UPDATE auction_lots') and 'sold_to_team_id' in statement:
+            state['left'] -= 1
+            with sqlite3.connect(engine.url.database) as other:
+                lot_id, leader, previous = other.execute(
+                    'SELECT id, leading_team_id, leading_bid_amount FROM auction_lots '
+                    "WHERE status = 'unsold' AND leading_team_id IS NOT NULL LIMIT 1").fetchone()
+                bid = previous + amount
+                other.execute('UPDATE auction_lots SET leading_bid_amount = ?, leading_team_id = ? WHERE id = ?',
+                              (bid, team.id, lot_id))
+                other.execute('UPDATE team_purses SET committed_amount = committed_amount - ?, '
+                              'leading_lots = leading_lots - 1 WHERE team_id = ?', (previous, leader))
+                other.execute('UPDATE team_purses SET committed_amount = committed_amount + ?, '
+                              'leading_lots = leading_lots + 1 WHERE team_id = ?', (bid, team.id))
+            other.close()
+    
+    event.listen(engine, 'before_cursor_execute', before)
+    return lambda: event.remove(engine, 'before_cursor_execute', before)
+
+def test_settlement_moves_commitments_to_spend(auction):
+    auction, (a, b), (first, second, unbid) = auction
+    place_bid(first, a, 100)
+    place_bid(second, b, 200)
+    place_bid(second, a, 250)
+    
+    report = settle_auction(auction.id)
+    assert (report['lots_sold'], report['lots_without_bids'], report['total_value']) == (2, 1, 350)
+    purse_a, purse_b = purse(auction, a), purse(auction, b)
+    assert (purse_a.committed_amount, purse_a.spent_amount, purse_a.leading_lots, purse_a.players_bought) == \
+        (0, 350, 0, 2)
+    assert (purse_b.committed_amount, purse_b.spent_amount, purse_b.players_bought) == (0, 0, 0)
+    assert {lot.status for lot in AuctionLot.query.filter(AuctionLot.id != unbid.id)} == {'sold'}
+    assert Player.query.get(second.player_id).team_id == a.id
+    assert Auction.query.get(auction.id).status == 'completed'
+    
+    again = settle_lot(auction.id, first.id)
+    assert (again['lots_sold'], again['lots_already_sold']) == (0, 1)
+    assert purse(auction, a).spent_amount == 350
+
+def test_bid_between_read_and_sale_is_settled_at_the_new_price(auction, app):
+    auction, (a, b), (lot, _, _) = auction
+    place_bid(lot, a, 100)
+    place_bid(lot, b, 150)
+    stop = bid_during_settlement(app, 100, a)
+    try:
+        report = settle_lot(auction.id, lot.id)
+    finally:
+        stop()
+    
+    assert report['sales'] == [{'lot_id': lot.id, 'player_id': lot.player_id, 'team_id': a.id, 'sold_price': 250}]
+    sold = AuctionLot.query.get(lot.id)
+    assert (sold.sold_price, sold.sold_to_team_id) == (250, a.id)
+    assert (purse(auction, a).spent_amount, purse(auction, a).committed_amount) == (250, 0)
+    assert (purse(auction, b).spent_amount, purse(auction, b).committed_amount) == (0, 0)
+
+def test_settlement_gives_up_when_bids_keep_landing(auction, app):
+    auction, (a, b), (lot, _, _) = auction
+    place_bid(lot, b, 60)
+    place_bid(lot, a, 100)
+    stop = bid_during_settlement(app, 10, b, times=SETTLE_ATTEMPTS)
+    try:
+        with pytest.raises(SettlementError):
+            settle_lot(auction.id, lot.id)
+    finally:
+        stop()
+    assert AuctionLot.query.get(lot.id).status == 'unsold'
+    assert purse(auction, a).spent_amount == purse(auction, b).spent_amount == 0
+
+def test_settlement_refreshes_team_pages_and_homepage(auction, make):
+    auction, (a, b), (lot, _, _) = auction
+    Player.query.get(lot.player_id).team_id = b.id
+    db.session.commit()
+    assert squad(a) == [] and squad(b) == [lot.player_id]
+    
+    place_bid(lot, a, 100)
+    cache.delete(homepage.CHANGED_KEY)
+    settle_lot(auction.id, lot.id)
+    assert squad(a) == [lot.player_id] and squad(b) == []
+    assert cache.get(homepage.CHANGED_KEY) is not None
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from app.extensions import db
+from app.models.match import PlayerPerformance
+from app.services.player_similarity import RUNS, get_index
+from conftest import log_in
+
+def test_create_app_registers_the_deliveries_table():
+    # A fresh interpreter, since importing the services here would register it anyway
+    check = ('from app import create_app; from app.extensions import db; create_app(); '
+             'assert "deliveries" in db.metadata.tables')
+    subprocess.run([sys.executable, '-c', check], check=True)
+
+def _over(over, batter, bowler, runs):
+    return [[1, over, ball, batter, bowler, runs] for ball in range(1, 7)]
+
+def _db_runs(player_id):
+    return db.session.query(db.func.sum(PlayerPerformance.runs_scored)).filter_by(player_id=player_id).scalar()
+
+def test_rederiving_keeps_rows_and_cached_stats_in_step(app, client, league_match):
+    match, batters, bowlers = league_match
+    log_in(client, 'admin@example.com', role='admin')
+    post = lambda deliveries: client.post(f'/admin/matches/{match.id}/deliveries', json={'deliveries': deliveries})
+    
+    assert post(_over(0, batters[0], bowlers[0], 1)).status_code == 201
+    ids = {row.player_id: row.id for row in PlayerPerformance.query.filter_by(match_id=match.id)}
+    assert client.get(f'/api/players/{batters[0]}/stats').get_json()['stats']['runs'] == 6
+    assert get_index().nearest(batters[0])[0].sums[:, RUNS].sum() == 6
+    
+    assert post(_over(1, batters[0], bowlers[1], 4)).status_code == 201
+    db.session.expire_all()
+    rows = PlayerPerformance.query.filter_by(match_id=match.id).all()
+    # Rows are updated in place, so their ids (and the timelines' watermark) still hold
+    assert {row.player_id: row.id for row in rows if row.player_id in ids} == ids
+    assert len(rows) == 3
+    
+    assert _db_runs(batters[0]) == 30
+    assert client.get(f'/api/players/{batters[0]}/stats').get_json()['stats']['runs'] == 30
+    state = get_index().nearest(batters[0])[0]
+    assert state.sums[state.rows[batters[0]], RUNS] == 30
+    assert client.get(f'/api/players/{bowlers[1]}/stats').get_json()['stats']['runs_conceded'] == 24
@@ -0,0 +1,18 @@
+from app.models.match import PlayerPerformance
+from app.services.comparison import compare_players
+from conftest import log_in
+
+def test_economy_counts_balls_not_decimal_overs(app, make, league_match):
+    match, players, _ = league_match
+    for overs, conceded in ((3.4, 33), (2.2, 21)):
+        make(PlayerPerformance, match_id=match.id, player_id=players[0], team_id=match.team1_id,
+             overs_bowled=overs, runs_conceded=conceded)
+    
+    # 3.4 + 2.2 overs is 36 balls, so six overs at 9 an over
+    assert compare_players([players[0]])['values']['economy'] == [9.0]
+
+def test_compare_errors_carry_a_message(app, client):
+    log_in(client)
+    response = client.get('/api/compare?players=one,two')
+    assert response.status_code == 400
+    assert response.get_json()['message']
@@ -0,0 +1,22 @@
+from flask import g
+from conftest import create_test_app
+from app.extensions import replica_router
+
+def route_read(app, user_id):
+    with app.test_request_context('/api/matches'):
+        g.token_user_id = user_id
+        replica_router.choose_replica()
+        return g.db_replica
+
+def test_token_clients_read_their_writes_from_the_primary(tmp_path):
+    app = create_test_app(tmp_path / 'primary.db', SQLALCHEMY_REPLICA_URIS=[f'sqlite:///{tmp_path}/replica.db'])
+    with app.app_context():
+        assert route_read(app, 7) == 'replica_0'
+        
+        # A bid with a bearer token, and so without the session cookie
+        with app.test_request_context('/api/auctions/1/bid', method='POST'):
+            g.token_user_id = 7
+            replica_router.remember_writes(app.response_class(status=201))
+        
+        assert route_read(app, 7) is None
+        assert route_read(app, 8) == 'replica_0'
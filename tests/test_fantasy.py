@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+import pytest
+from app.extensions import db
+from app.models.match import PlayerPerformance
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.models.fantasy import FantasyContest, FantasyEntry, FantasyTeamPoints
+from app.services.fantasy import (contest_standing, join_contest, player_points, remove_team, score_match,
+                                  team_fantasy_summary)
+from conftest import log_in
+
+@pytest.fixture
+def contest(app, client, make, league_match):
+    """Two user teams in an all-seasons contest, one holding a batter and
+    the other a bowler who both played ``league_match``."""
+    match, batters, bowlers = league_match
+    user = log_in(client)
+    last_week = datetime.utcnow() - timedelta(days=7)
+    contest = make(FantasyContest, name='All seasons', version=0)
+    teams = []
+    for name, player_id in (('Batters', batters[0]), ('Bowlers', bowlers[0])):
+        team = make(UserTeam, user_id=user.id, name=name)
+        make(UserTeamPlayer, user_team_id=team.id, player_id=player_id, added_at=last_week)
+        make(FantasyEntry, contest_id=contest.id, user_team_id=team.id, points=0, joined_at=last_week)
+        teams.append(team)
+    make(PlayerPerformance, match_id=match.id, player_id=batters[0], team_id=match.team1_id,
+         runs_scored=30, balls_faced=20, fours=2)
+    make(PlayerPerformance, match_id=match.id, player_id=bowlers[0], team_id=match.team2_id,
+         overs_bowled=4.0, runs_conceded=30, wickets_taken=1)
+    return match, contest, teams
+
+def _points(contest, team):
+    return contest_standing(contest, team.id)['points']
+
+def _rules(app):
+    return app.config['FANTASY_POINTS']
+
+def test_scoring_credits_each_squad(app, contest):
+    match, contest, (batters, bowlers) = contest
+    rules = _rules(app)
+    assert score_match(match) == (2, 2)
+    db.session.commit()
+    
+    assert _points(contest, batters) == rules['played'] + 30 * rules['run'] + 2 * rules['four']
+    assert _points(contest, bowlers) == rules['played'] + rules['wicket']
+    assert [contest_standing(contest, team.id)['rank'] for team in (batters, bowlers)] == [1, 2]
+
+def test_rescoring_applies_only_the_difference(app, contest):
+    match, contest, (batters, bowlers) = contest
+    rules = _rules(app)
+    score_match(match)
+    db.session.commit()
+    before = _points(contest, batters)
+    
+    # Rescoring an unchanged match changes nothing
+    assert score_match(match) == (2, 0)
+    performance = PlayerPerformance.query.filter_by(match_id=match.id, player_id=batters.players[0].id).one()
+    performance.runs_scored = 52
+    db.session.commit()
+    score_match(match)
+    db.session.commit()
+    
+    assert _points(contest, batters) == before + 22 * rules['run'] + rules['half_century']
+    assert _points(contest, bowlers) == rules['played'] + rules['wicket']
+
+def test_corrections_skip_players_added_after_scoring(app, contest):
+    match, contest, (batters, bowlers) = contest
+    score_match(match)
+    db.session.commit()
+    batter = batters.players[0]
+    
+    # The batter moves to the bowlers' squad after the match was scored
+    UserTeamPlayer.query.filter_by(user_team_id=batters.id).delete()
+    db.session.add(UserTeamPlayer(user_team_id=bowlers.id, player_id=batter.id))
+    PlayerPerformance.query.filter_by(match_id=match.id, player_id=batter.id).one().runs_scored = 31
+    db.session.commit()
+    before = {team.id: _points(contest, team) for team in (batters, bowlers)}
+    score_match(match)
+    db.session.commit()
+    
+    # Neither squad holds the batter as they were when the match was scored
+    assert {team.id: _points(contest, team) for team in (batters, bowlers)} == before
+
+def test_summary_agrees_with_the_entries_after_squad_changes(app, contest):
+    match, contest, (batters, bowlers) = contest
+    score_match(match)
+    db.session.commit()
+    
+    UserTeamPlayer.query.filter_by(user_team_id=batters.id).delete()
+    db.session.commit()
+    for team in (batters, bowlers):
+        summary = team_fantasy_summary(team)
+        assert summary['total_points'] == _points(contest, team)
+        assert summary['match_points'] == {match.id: _points(contest, team)}
+        assert summary['contests'][0]['points'] == _points(contest, team)
+
+def test_late_entries_miss_earlier_matches(app, contest):
+    match, contest, (batters, _) = contest
+    score_match(match)
+    db.session.commit()
+    
+    other = FantasyContest(name='Late', version=0)
+    db.session.add(other)
+    db.session.flush()
+    join_contest(other, batters)
+    PlayerPerformance.query.filter_by(match_id=match.id, player_id=batters.players[0].id).one().sixes = 1
+    db.session.commit()
+    score_match(match)
+    db.session.commit()
+    
+    assert _points(other, batters) == 0
+    assert _points(contest, batters) == team_fantasy_summary(batters)['total_points']
+
+def test_removing_a_team_drops_its_fantasy_rows(app, contest):
+    match, contest, (batters, bowlers) = contest
+    score_match(match)
+    db.session.commit()
+    version = contest.version
+    
+    remove_team(batters)
+    db.session.commit()
+    assert FantasyEntry.query.filter_by(user_team_id=batters.id).count() == 0
+    assert FantasyTeamPoints.query.filter_by(user_team_id=batters.id).count() == 0
+    db.session.refresh(contest)
+    assert contest.version == version + 1
+    assert contest_standing(contest, bowlers.id)['entries'] == 1
+
+def test_player_points_milestones(app):
+    rules = _rules(app)
+    century = PlayerPerformance(runs_scored=100, wickets_taken=5)
+    assert player_points(century, rules) == (rules['played'] + 100 * rules['run'] + rules['century'] +
+                                             5 * rules['wicket'] + rules['five_wickets'])
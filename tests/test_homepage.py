@@ -0,0 +1,14 @@
+import pytest
+from app.extensions import db
+from app.models.match import PlayerPerformance
+from app.services.homepage import build_homepage_snapshot
+
+def test_economy_counts_balls_not_decimal_overs(app, league_match):
+    match, team_a, _ = league_match
+    db.session.add(PlayerPerformance(match_id=match.id, player_id=team_a[0], team_id=match.team1_id,
+                                     overs_bowled=3.4, runs_conceded=33, wickets_taken=2))
+    db.session.commit()
+    
+    bowler = next(bowler for bowler in build_homepage_snapshot()['top_bowlers'] if bowler['id'] == team_a[0])
+    # 3.4 overs is 22 balls
+    assert bowler['economy_rate'] == pytest.approx(9.0)
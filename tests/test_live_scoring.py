@@ -0,0 +1,45 @@
+from app.extensions import db
+from app.models.match import PlayerPerformance
+from app.services.player_similarity import RUNS, SimilarityIndex, get_index
+from app.services.player_timeline import TimelineStore
+from conftest import log_in
+
+def test_live_balls_reach_cached_player_stats(app, client, league_match):
+    match, batters, bowlers = league_match
+    log_in(client, 'admin@example.com', role='admin')
+    
+    for over, runs in enumerate((1, 4, 6)):
+        balls = [[1, over, ball, batters[0], bowlers[0], runs] for ball in range(1, 7)]
+        response = client.post(f'/admin/matches/{match.id}/live', json={'deliveries': balls})
+        assert response.status_code == 201
+        
+        db.session.expire_all()
+        total = db.session.query(db.func.sum(PlayerPerformance.runs_scored)).filter_by(player_id=batters[0]).scalar()
+        assert total == response.get_json()['score']['team1'][0]
+        
+        stats = client.get(f'/api/players/{batters[0]}/stats').get_json()['stats']
+        assert stats['runs'] == total
+        assert client.get(f'/api/players/{bowlers[0]}/stats').get_json()['stats']['overs'] == over + 1
+        state = get_index().nearest(batters[0])[0]
+        assert state.sums[state.rows[batters[0]], RUNS] == total
+
+def test_other_workers_fold_live_balls_into_their_caches(app, client, league_match):
+    match, batters, bowlers = league_match
+    log_in(client, 'admin@example.com', role='admin')
+    # Another worker's caches, which this worker's commit hooks never reach
+    timelines, index = TimelineStore(poll_seconds=0), SimilarityIndex(poll_seconds=0)
+    
+    for over, runs in enumerate((1, 4, 6)):
+        balls = [[1, over, ball, batters[0], bowlers[0], runs] for ball in range(1, 7)]
+        assert client.post(f'/admin/matches/{match.id}/live', json={'deliveries': balls}).status_code == 201
+        db.session.remove()
+        
+        if over == 0:
+            timeline = timelines.get(batters[0])
+        # The same timeline, with the over folded in rather than reloaded
+        assert timelines.get(batters[0]) is timeline
+        assert timeline.totals(0, len(timeline))['runs'] == 6 * sum((1, 4, 6)[:over + 1])
+        bowling = timelines.get(bowlers[0])
+        assert bowling.totals(0, len(bowling))['balls_bowled'] == 6 * (over + 1)
+        state = index.current()
+        assert state.sums[state.rows[batters[0]], RUNS] == 6 * sum((1, 4, 6)[:over + 1])
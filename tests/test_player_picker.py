@@ -0,0 +1,104 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+from app.models.team import Player
+from app.models.user_team import UserTeam, UserTeamPlayer
+from app.services.player_picker import MAX_PAGE_SIZE, PAGE_SIZE, available_players, parse_filters, parse_page
+from conftest import log_in
+
+NAMES = ['Ashwin', 'Bumrah', 'Bumrah', 'Bumrah', 'Chahal', 'Dhoni', 'Dhoni']
+
+@pytest.fixture
+def picker(app, client, make):
+    """A user team holding the first Chahal, plus players named NAMES."""
+    user = log_in(client)
+    team = make(UserTeam, user_id=user.id, name='Picker')
+    players = [make(Player, name=name, role='Bowler', current_value=10.0 * number)
+               for number, name in enumerate(NAMES)]
+    make(UserTeamPlayer, user_team_id=team.id, player_id=players[4].id)
+    return team, players
+
+def _pages(team, limit, filters=None):
+    after, pages = None, []
+    while True:
+        players, after = available_players(team.id, filters or {}, after, limit)
+        pages.append([player.id for player in players])
+        if after is None:
+            return pages
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 6, 7])
+def test_pages_cover_every_player_once_in_name_order(picker, limit):
+    team, players = picker
+    expected = [player.id for player in sorted(players, key=lambda player: (player.name, player.id))
+                if player.name != 'Chahal']
+    pages = _pages(team, limit)
+    
+    assert [player_id for page in pages for player_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+    # A page that ends exactly on the last player has no next page
+    assert pages[-1]
+
+def test_ties_on_name_split_across_pages_by_id(picker):
+    team, players = picker
+    bumrahs = [player.id for player in players if player.name == 'Bumrah']
+    
+    first, after = available_players(team.id, {}, None, 2)
+    assert [player.id for player in first] == [players[0].id, bumrahs[0]]
+    second, _ = available_players(team.id, {}, after, 2)
+    assert [player.id for player in second] == bumrahs[1:]
+
+def test_after_the_last_player_is_an_empty_page(picker):
+    team, players = picker
+    assert available_players(team.id, {}, players[-1].id, 5) == ([], None)
+
+def test_after_a_squad_member_continues_past_them(picker):
+    team, players = picker
+    page, after = available_players(team.id, {}, players[4].id, 5)
+    assert [player.name for player in page] == ['Dhoni', 'Dhoni']
+    assert after is None
+
+def test_after_an_unknown_player_is_rejected(picker):
+    team, _ = picker
+    with pytest.raises(ValueError):
+        available_players(team.id, {}, 10 ** 6, 5)
+
+def test_filters_apply_on_every_page(picker):
+    team, players = picker
+    pages = _pages(team, 1, {'q': 'Bum', 'min_price': 20.0})
+    assert pages == [[players[2].id], [players[3].id]]
+
+@pytest.mark.parametrize('args, page', [
+    ({}, (None, PAGE_SIZE)),
+    ({'after': '7', 'limit': '1'}, (7, 1)),
+    ({'limit': str(MAX_PAGE_SIZE)}, (None, MAX_PAGE_SIZE))
+])
+def test_parse_page(args, page):
+    assert parse_page(MultiDict(args)) == page
+
+@pytest.mark.parametrize('args', [{'limit': '0'}, {'limit': str(MAX_PAGE_SIZE + 1)}, {'after': 'x'},
+                                  {'limit': 'nan'}])
+def test_parse_page_rejects(args):
+    with pytest.raises(ValueError):
+        parse_page(MultiDict(args))
+
+def test_parse_filters_rejects_an_inverted_price_range():
+    with pytest.raises(ValueError):
+        parse_filters(MultiDict({'min_price': '5', 'max_price': '1'}))
+
+def test_picker_route_follows_next(picker, client):
+    team, players = picker
+    url = f'/myteam/{team.id}/players/available'
+    response = client.get(url, query_string={'limit': 4})
+    data = response.get_json()
+    assert len(data['players']) == 4
+    
+    rest = client.get(url, query_string={'limit': 4, 'after': data['next']}).get_json()
+    assert rest['next'] is None
+    assert len(data['players']) + len(rest['players']) == len(players) - 1
+    assert client.get(url, query_string={'limit': 0}).status_code == 400
+
+def test_adding_an_unknown_player_leaves_the_squad_alone(picker, client):
+    team, players = picker
+    unknown = max(player.id for player in players) + 1
+    response = client.post(f'/players/{unknown}/add_to_team', data={'team_id': team.id})
+    assert response.status_code == 404
+    assert UserTeamPlayer.query.filter_by(user_team_id=team.id).count() == 1
@@ -0,0 +1,36 @@
+from datetime import datetime
+import pytest
+from app.extensions import db
+from app.models.team import Team, Player
+from app.models.match import Match, PlayerPerformance
+from app.services.player_similarity import FEATURES, SimilarityIndex
+from app.services.player_timeline import balls_expression
+
+@pytest.mark.parametrize('overs, balls', [(0, 0), (3.4, 22), (4.0, 24), (19.5, 119), (None, 0)])
+def test_balls_expression_reads_cricket_notation(app, overs, balls):
+    assert db.session.query(balls_expression(db.literal(overs, db.Float))).scalar() == balls
+
+def test_economy_counts_balls_not_decimal_overs(app, make):
+    team = make(Team, name='Team A', short_name='A')
+    match = make(Match, match_date=datetime(2024, 4, 1), venue='Wankhede', season='2024',
+                 team1_id=team.id, team2_id=team.id)
+    bowler = make(Player, name='Bowler', team_id=team.id, role='Bowler')
+    make(PlayerPerformance, match_id=match.id, player_id=bowler.id, team_id=team.id,
+         overs_bowled=3.4, runs_conceded=33, wickets_taken=1)
+    make(PlayerPerformance, match_id=match.id, player_id=bowler.id, team_id=team.id,
+         overs_bowled=2.2, runs_conceded=21, wickets_taken=0)
+    
+    state = SimilarityIndex().build()
+    row = state.rows[bowler.id]
+    # 3.4 + 2.2 overs is 36 balls, so six overs at 9 an over
+    assert state.raw[row][FEATURES.index('economy')] == pytest.approx(9.0)
+
+def test_unknown_seasons_get_no_index(app, client, league_match):
+    match, team_a, _ = league_match
+    
+    response = client.get(f'/api/players/{team_a[0]}/similar?season=made-up')
+    assert response.status_code == 404
+    assert 'made-up' not in app.extensions.get('player_similarity', {})
+    
+    client.get(f'/api/players/{team_a[0]}/similar?season={match.season}')
+    assert match.season in app.extensions['player_similarity']
@@ -0,0 +1,28 @@
+import pytest
+from app.extensions import db
+from app.services.points_table import build_points_table, innings_balls, rebuild_standings
+
+@pytest.mark.parametrize('overs, wickets, balls', [
+    (20.0, 5, 120),
+    (18.3, 6, 111),
+    (15.2, 10, 120),
+    (19.5, 10, 120),
+    (None, None, None)
+])
+def test_innings_balls(overs, wickets, balls):
+    assert innings_balls(overs, wickets, 120) == balls
+
+def test_net_run_rate_charges_a_side_bowled_out_its_full_quota(app, league_match):
+    match, _, _ = league_match
+    match.team1_score, match.team1_overs, match.team1_wickets = 180, 20.0, 5
+    match.team2_score, match.team2_overs, match.team2_wickets = 120, 15.2, 10
+    match.result = 'Team A won by 60 runs'
+    rebuild_standings('2024')
+    db.session.commit()
+    
+    standings = {row['team']['short_name']: row for row in build_points_table('2024')['standings']}
+    # 180 and 120 both over 20 overs, although B was all out after 15.2
+    assert standings['A']['net_run_rate'] == 3.0
+    assert standings['B']['net_run_rate'] == -3.0
+    assert standings['B']['overs_faced'] == 20.0
+    assert (standings['A']['points'], standings['B']['points']) == (2, 0)
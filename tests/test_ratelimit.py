@@ -0,0 +1,70 @@
+import pytest
+from config import Config
+from app.extensions import db
+from app.utils.ratelimit import parse_limits
+from conftest import create_test_app, log_in
+
+@pytest.fixture
+def limited(tmp_path):
+    """A logged in client of an app with rate limiting on;
+    ``limited(**settings)`` overrides the limits."""
+    apps = []
+    
+    def limited(**settings):
+        app = create_test_app(tmp_path / 'limited.db', RATELIMIT_ENABLED=True, **settings)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            log_in(client)
+        apps.append(app)
+        return client
+    yield limited
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+def test_parse_limits():
+    assert parse_limits('200 per day;50 per hour;1 per second') == ((200, 86400), (50, 3600), (1, 1))
+    assert parse_limits('10 per 5 minutes') == ((10, 300),)
+    assert parse_limits(None) == ()
+    with pytest.raises(ValueError):
+        parse_limits('10 per fortnight')
+
+@pytest.mark.parametrize('endpoint', ['api.place_bid', 'api.get_dashboard_data'])
+def test_tightened_endpoints_are_stricter_than_the_default_in_every_window(endpoint):
+    override = dict((window, count) for count, window in parse_limits(Config.RATELIMIT_ENDPOINTS[endpoint]))
+    for count, window in parse_limits(Config.RATELIMIT_DEFAULT):
+        assert override.get(window, count + 1) <= count, f'{endpoint} allows more per {window}s'
+
+def test_page_and_its_own_requests_have_separate_budgets(limited):
+    client = limited()
+    assert client.get('/compare').status_code == 200
+    assert client.get('/api/compare', query_string={'players': '1'}).status_code != 429
+    assert client.get('/api/players/search', query_string={'q': 'ab'}).status_code != 429
+    # Typing in the typeahead sends several requests a second
+    for query in ('abc', 'abcd', 'abcde'):
+        assert client.get('/api/players/search', query_string={'q': query}).status_code != 429
+
+def test_default_limit_is_counted_per_endpoint(limited):
+    client = limited(RATELIMIT_DEFAULT='1 per minute', RATELIMIT_ENDPOINTS={})
+    assert client.get('/api/teams').status_code == 200
+    assert client.get('/api/players').status_code == 200
+    response = client.get('/api/teams')
+    assert response.status_code == 429
+    assert response.get_json() == {'message': 'Rate limit exceeded'}
+    assert int(response.headers['Retry-After']) >= 1
+
+def test_blueprint_entry_covers_its_endpoints(limited):
+    client = limited(RATELIMIT_ENDPOINTS={'main_bp': '1 per minute', 'api.get_teams': None})
+    assert client.get('/compare').status_code == 200
+    assert client.get('/compare').status_code == 429
+    for _ in range(3):
+        assert client.get('/api/teams').status_code == 200
+
+def test_pages_get_an_html_429(limited):
+    client = limited(RATELIMIT_ENDPOINTS={'main_bp': '1 per minute'})
+    client.get('/compare', headers={'Accept': 'text/html'})
+    response = client.get('/compare', headers={'Accept': 'text/html'})
+    assert response.status_code == 429
+    assert response.mimetype == 'text/html'
+    assert 'Too Many Requests' in response.get_data(as_text=True)
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.extensions import db
+from app.utils.sql_instrumentation import RequestQueryStats, current_query_stats, fingerprint
+
+def test_fingerprint_folds_parameters_and_in_lists():
+    assert fingerprint("SELECT * FROM players WHERE id IN (?, ?, ?) AND name = 'Kohli'") == \
+        fingerprint('SELECT * FROM players WHERE id IN (?, ?) AND name = ?')
+
+def test_failed_statement_does_not_skew_later_timings(app):
+    with app.test_request_context():
+        app.preprocess_request()
+        connection = db.session.connection()
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql('SELECT * FROM no_such_table')
+        db.session.rollback()
+        
+        connection = db.session.connection()
+        for _ in range(3):
+            connection.exec_driver_sql('SELECT 1')
+        
+        stats = current_query_stats()
+        assert isinstance(stats, RequestQueryStats)
+        assert stats.count == 3
+        assert stats.seconds >= 0
+        assert 'query_started' not in connection.info
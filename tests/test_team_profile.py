@@ -0,0 +1,30 @@
+from app.extensions import db, cache
+from app.models.delivery import Delivery
+from app.services.ball_by_ball import rebuild_from_deliveries
+from app.services.team_profile import get_team_profile, mark_team_profiles_changed
+
+def _cached(team_id):
+    return cache.get(f'team_profile:{team_id}')
+
+def test_marked_profiles_drop_on_commit(app, league_match):
+    match, _, _ = league_match
+    get_team_profile(match.team1_id)
+    
+    mark_team_profiles_changed([match.team1_id])
+    assert _cached(match.team1_id) is not None
+    db.session.commit()
+    assert _cached(match.team1_id) is None
+
+def test_rebuild_from_deliveries_refreshes_team_profiles(app, league_match):
+    match, batters, bowlers = league_match
+    db.session.add_all(Delivery(match_id=match.id, innings=1, over=0, ball=ball, batter_id=batters[0],
+                                bowler_id=bowlers[0], runs=4) for ball in range(1, 7))
+    db.session.commit()
+    assert get_team_profile(match.team1_id)['players'][0].get('batting_average') is None
+    
+    rebuild_from_deliveries()
+    db.session.commit()
+    
+    assert _cached(match.team1_id) is None
+    assert _cached(match.team2_id) is None
+    assert get_team_profile(match.team1_id)['players'][0]['batting_average'] == 24
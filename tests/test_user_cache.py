@@ -0,0 +1,22 @@
+from app.extensions import db
+from app.models.user import User, user_cache
+
+def test_invalidation_reaches_other_workers_snapshots(app, make, monkeypatch):
+    user_cache.clear()
+    user_id = make(User, username='fan', email='fan@example.com', role='user').id
+    assert not User.get_cached(user_id).is_admin()
+    
+    users = User.__table__
+    db.session.execute(users.update().where(users.c.id == user_id).values(role='admin', is_active=False))
+    db.session.commit()
+    db.session.remove()
+    # The snapshot is served until someone invalidates it
+    assert not User.get_cached(user_id).is_admin()
+    
+    # Invalidated by another worker: only the shared stamp changes, not this worker's snapshot
+    monkeypatch.setattr(user_cache, 'pop', lambda user_id: None)
+    User.invalidate_cache(user_id)
+    db.session.remove()
+    cached = User.get_cached(user_id)
+    assert cached.is_admin()
+    assert cached.is_active is False